@@ -0,0 +1 @@
+"""华为云API分析MCP服务器的离线基准测试"""
@@ -0,0 +1,73 @@
+"""HuaweiCloudApiClient端到端基准测试"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict
+
+from .common import (add_mock_arguments, make_explorer, make_client, measure, summarize,
+                     print_results, write_json)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """运行客户端基准测试"""
+    explorer = make_explorer(args)
+    product_name = explorer.product_names()[0]
+    product_short = explorer.product_shorts()[0]
+    interface_name = explorer.api_summary(args.apis - 1)
+    results = {}
+
+    async def cold(func):
+        # 每次使用新客户端，模拟没有缓存的首次调用
+        async def call():
+            async with make_client(explorer) as client:
+                await func(client)
+        return call
+
+    results["client.get_products (cold)"] = await measure(
+        await cold(lambda c: c.get_products()), args.iterations)
+    results["client.get_all_apis (cold)"] = await measure(
+        await cold(lambda c: c.get_all_apis(product_short)), args.iterations)
+    results["client.get_api_detail (cold)"] = await measure(
+        await cold(lambda c: c.get_api_detail(product_short, f"{product_short.title()}Api0")), args.iterations)
+    results["client.get_api_info_by_user_input (cold)"] = await measure(
+        await cold(lambda c: c.get_api_info_by_user_input(product_name, interface_name)), args.iterations)
+
+    batch_names = [explorer.api_summary(index) for index in range(min(20, args.apis))]
+    results["client.get_api_infos_by_user_input x20 (cold)"] = await measure(
+        await cold(lambda c: c.get_api_infos_by_user_input(product_name, batch_names)), args.iterations)
+
+    async with make_client(explorer) as client:
+        await client.get_api_info_by_user_input(product_name, interface_name)
+        results["client.get_api_info_by_user_input (warm)"] = await measure(
+            lambda: client.get_api_info_by_user_input(product_name, interface_name), args.iterations)
+
+        # 并发吞吐：不同接口的详情并发获取
+        names = [explorer.api_summary(index) for index in range(args.apis)]
+        latencies = []
+
+        async def timed(name):
+            begin = time.perf_counter()
+            await client.get_api_info_by_user_input(product_name, name)
+            latencies.append(time.perf_counter() - begin)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(timed(name) for name in names))
+        results[f"client.get_api_info_by_user_input x{len(names)} (concurrent)"] = summarize(
+            latencies, time.perf_counter() - started)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HuaweiCloudApiClient基准测试")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    results = asyncio.run(run(args))
+    print_results("HuaweiCloudApiClient", results)
+    if args.json:
+        write_json(args.json, {"client": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""YamlExporter各导出函数基准测试"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+from typing import Any, Dict
+
+from .common import add_mock_arguments, make_explorer, make_client, measure, measure_sync, print_results, write_json
+
+from scan.yaml_exporter import YamlExporter, YamlExportCLI
+
+
+async def run_multiple_export(args: argparse.Namespace, explorer, api_specs, output_dir: str,
+                              workers: int) -> Dict[str, Any]:
+    """测量YamlExportCLI.export_multiple_api_details，详情已缓存，只计入序列化和写文件"""
+    # 屏蔽逐条进度输出
+    with contextlib.redirect_stdout(io.StringIO()):
+        async with YamlExportCLI(output_dir, workers=workers, client=make_client(explorer)) as cli:
+            await cli.export_multiple_api_details(api_specs)
+            return await measure(lambda: cli.export_multiple_api_details(api_specs), max(1, args.iterations // 10))
+
+
+def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """运行导出基准测试，数据直接取自本地模拟，不经过网络"""
+    explorer = make_explorer(args)
+    product_name = explorer.product_names()[0]
+    product_short = explorer.product_shorts()[0]
+    apis_data = explorer.apis_page(product_short, 0, args.apis)["api_basic_infos"]
+
+    def api_info(index: int) -> Dict[str, Any]:
+        return {
+            "product_name": product_name,
+            "product_short": product_short,
+            "api_basic_info": apis_data[index],
+            "api_detail": explorer.api_detail(product_short, apis_data[index]["name"])
+        }
+
+    multiple = [api_info(index) for index in range(min(100, args.apis))]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        exporter = YamlExporter(output_dir)
+        results["export_products_to_yaml"] = measure_sync(
+            lambda: exporter.export_products_to_yaml(explorer.catalog()), args.iterations)
+        results[f"export_product_apis_to_yaml ({len(apis_data)} apis)"] = measure_sync(
+            lambda: exporter.export_product_apis_to_yaml(product_name, apis_data), args.iterations)
+        results["export_api_detail_to_yaml"] = measure_sync(
+            lambda: exporter.export_api_detail_to_yaml(api_info(0)), args.iterations)
+        results[f"export_multiple_apis_to_yaml ({len(multiple)} apis)"] = measure_sync(
+            lambda: exporter.export_multiple_apis_to_yaml(multiple), max(1, args.iterations // 10))
+
+        api_specs = [(product_name, explorer.api_summary(index)) for index in range(args.apis)]
+        for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+            results[f"export_multiple_api_details ({len(api_specs)} apis, workers={workers})"] = asyncio.run(
+                run_multiple_export(args, explorer, api_specs, output_dir, workers))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YamlExporter基准测试")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    results = run(args)
+    print_results("YamlExporter", results)
+    if args.json:
+        write_json(args.json, {"exporter": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""MCP服务器 tools/call 路径基准测试"""
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict
+
+from .common import add_mock_arguments, make_explorer, make_client, measure, print_results, write_json
+
+from scan.cursor_optimized_server import CursorOptimizedMCPServer
+from scan.prefetch import PrefetchConfig
+
+
+def tool_request(request_id: int, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """构造tools/call请求"""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {"name": name, "arguments": arguments}
+    }
+
+
+def make_server(explorer) -> CursorOptimizedMCPServer:
+    """创建使用本地模拟客户端的服务器，关闭后台预热以免干扰计时"""
+    server = CursorOptimizedMCPServer()
+    server.prefetcher.config = PrefetchConfig(enabled=False)
+    server.client = make_client(explorer, accountant=server.memory)
+    return server
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """运行服务器基准测试"""
+    explorer = make_explorer(args)
+    product_name = explorer.product_names()[0]
+    interface_name = explorer.api_summary(args.apis - 1)
+    scenarios = {
+        "list_huawei_cloud_products": {},
+        "list_product_apis": {"product_name": product_name},
+        "get_huawei_cloud_api_info": {"product_name": product_name, "interface_name": interface_name},
+        "get_huawei_cloud_api_info (section=full)": {
+            "product_name": product_name, "interface_name": interface_name, "section": "full"
+        },
+        "batch_get_huawei_cloud_api_info x20": {
+            "product_name": product_name,
+            "interface_names": [explorer.api_summary(index) for index in range(min(20, args.apis))]
+        },
+    }
+    results = {}
+
+    for label, arguments in scenarios.items():
+        tool_name = label.split(" ")[0]
+
+        async def call(server, tool_name=tool_name, arguments=arguments):
+            # 与run()一致，包含响应的JSON序列化
+            response = await server.handle_request(tool_request(1, tool_name, dict(arguments)))
+            if "error" in response:
+                raise RuntimeError(response["error"]["message"])
+            json.dumps(response, ensure_ascii=False)
+
+        async def cold_call(call=call):
+            server = make_server(explorer)
+            try:
+                await call(server)
+            finally:
+                await server.close()
+
+        results[f"tools/call {label} (cold)"] = await measure(cold_call, args.iterations)
+
+        server = make_server(explorer)
+        try:
+            await call(server)
+            results[f"tools/call {label} (warm)"] = await measure(lambda: call(server), args.iterations)
+            # 关闭渲染结果缓存，对比每次重新渲染的耗时
+            server.render_cache.max_bytes = 0
+            server.render_cache.clear()
+            results[f"tools/call {label} (warm, no render cache)"] = await measure(lambda: call(server), args.iterations)
+        finally:
+            await server.close()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP服务器tools/call基准测试")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    results = asyncio.run(run(args))
+    print_results("MCP tools/call", results)
+    if args.json:
+        write_json(args.json, {"server": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""快照存储基准测试 - 比较按内容寻址去重、zstd压缩后的快照大小、详情读取耗时和内存占用"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+from typing import Any, Dict
+
+from .common import add_mock_arguments, make_explorer, make_client, measure_sync, print_results, write_json
+
+from scan.cache import estimate_size
+from scan.packed_snapshot import PackedSnapshot, pack_store
+from scan.snapshot_store import SnapshotStore, mirror
+
+
+async def build_snapshot(explorer, root: str, compression: str, product_shorts) -> SnapshotStore:
+    """将本地模拟的数据镜像到快照目录"""
+    store = SnapshotStore(root, compression)
+    async with make_client(explorer) as client:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await mirror(client, store, product_shorts)
+    return store
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """运行快照存储基准测试"""
+    explorer = make_explorer(args)
+    product_shorts = explorer.product_shorts()[:args.snapshot_products]
+    api_names = [(product_short, explorer.apis_page(product_short, 0, args.apis)["api_basic_infos"])
+                 for product_short in product_shorts]
+    keys = [(product_short, api["name"]) for product_short, apis in api_names for api in apis]
+
+    results = {}
+    sizes = {}
+    for compression in ("none", "zstd"):
+        with tempfile.TemporaryDirectory() as root:
+            store = asyncio.run(build_snapshot(explorer, root, compression, product_shorts))
+            if compression == "zstd" and store.compression != "zstd":
+                # 未安装zstandard
+                continue
+            sizes[compression] = store.stats()
+
+            # 每次重新打开快照，测量首次读取（含解压、解析）和已解码后的读取
+            def cold_read():
+                fresh = SnapshotStore(root, compression)
+                for product_short, api_name in keys:
+                    fresh.get_detail(product_short, api_name)
+
+            results[f"读取{len(keys)}个详情 ({compression}, 首次)"] = measure_sync(cold_read, args.iterations)
+            reader = SnapshotStore(root, compression)
+            details = [reader.get_detail(product_short, api_name) for product_short, api_name in keys]
+            results[f"读取{len(keys)}个详情 ({compression}, 已解码)"] = measure_sync(
+                lambda: [reader.get_detail(product_short, api_name) for product_short, api_name in keys],
+                args.iterations)
+            sizes[compression]["memory_bytes"] = estimate_size(details)
+
+            # 打包为单文件后按键读取，记录按相同方式压缩
+            path = os.path.join(root, "snapshot.pack")
+            pack_store(SnapshotStore(root, compression), path, compression)
+            sizes[compression]["packed_bytes"] = os.path.getsize(path)
+            results[f"打开打包快照 ({compression})"] = measure_sync(lambda: PackedSnapshot(path).close(), args.iterations)
+            with PackedSnapshot(path) as packed:
+                results[f"读取{len(keys)}个详情 ({compression}, 打包)"] = measure_sync(
+                    lambda: [packed.get_detail(product_short, api_name) for product_short, api_name in keys],
+                    args.iterations)
+
+    # 对照：每个详情单独解析JSON，即客户端缓存上游响应时的内存占用
+    parsed = [json.loads(json.dumps(explorer.api_detail(product_short, api_name), ensure_ascii=False))
+              for product_short, api_name in keys]
+    sizes["json"] = {"memory_bytes": estimate_size(parsed)}
+    return {"latency": results, "sizes": sizes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="快照存储基准测试")
+    add_mock_arguments(parser)
+    parser.set_defaults(iterations=5, apis=100)
+    parser.add_argument('--snapshot-products', type=int, default=3, help='镜像的产品数量（默认：3）')
+    args = parser.parse_args()
+    report = run(args)
+    print_results("快照存储", report["latency"])
+    print("\n== 快照大小与内存 ==")
+    for label, stats in report["sizes"].items():
+        if "stored_bytes" in stats:
+            print(f"  {label}: 原始JSON {stats['logical_bytes'] / 1024:.0f}KB，"
+                  f"磁盘占用 {stats['stored_bytes'] / 1024:.0f}KB（{stats['ratio']}倍），blob {stats['blobs']}个，"
+                  f"解码后内存 {stats['memory_bytes'] / 1024:.0f}KB，打包文件 {stats['packed_bytes'] / 1024:.0f}KB")
+        else:
+            print(f"  逐个解析JSON: 内存 {stats['memory_bytes'] / 1024:.0f}KB")
+    if args.json:
+        write_json(args.json, {"snapshot": report})
+
+
+if __name__ == "__main__":
+    main()
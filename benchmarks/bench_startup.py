@@ -0,0 +1,84 @@
+"""MCP服务器冷启动基准测试 - 从启动进程到返回initialize和tools/list响应的耗时"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict
+
+from .common import print_results, summarize, write_json
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'run_cursor_server.py')
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "bench", "version": "1.0"}}
+}
+TOOLS_LIST = {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}
+
+
+def start_once(python: str) -> Dict[str, float]:
+    """启动一次服务器，返回收到initialize和tools/list响应的耗时（秒）"""
+    env = dict(os.environ, API_SCAN_WARMUP="0")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [python, SERVER_SCRIPT],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env
+    )
+    try:
+        process.stdin.write((json.dumps(INITIALIZE) + "\n").encode("utf-8"))
+        process.stdin.flush()
+        if not process.stdout.readline():
+            raise RuntimeError("服务器未返回initialize响应")
+        initialized = time.perf_counter()
+
+        process.stdin.write((json.dumps(TOOLS_LIST) + "\n").encode("utf-8"))
+        process.stdin.flush()
+        if not process.stdout.readline():
+            raise RuntimeError("服务器未返回tools/list响应")
+        listed = time.perf_counter()
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    return {"initialize": initialized - started, "tools/list": listed - started}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """运行冷启动基准测试"""
+    # 先启动一次，生成字节码缓存，避免首次编译计入结果
+    start_once(args.python)
+
+    samples = {"initialize": [], "tools/list": []}
+    for _ in range(args.iterations):
+        for key, value in start_once(args.python).items():
+            samples[key].append(value)
+
+    return {
+        "启动到initialize响应": summarize(samples["initialize"]),
+        "启动到tools/list响应": summarize(samples["tools/list"])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP服务器冷启动基准测试")
+    parser.add_argument('--iterations', type=int, default=10, help='启动次数（默认：10）')
+    parser.add_argument('--python', default=sys.executable, help='用于启动服务器的Python解释器（默认：当前解释器）')
+    parser.add_argument('--json', metavar='FILE', help='将结果以JSON格式写入文件')
+    args = parser.parse_args()
+    results = run(args)
+    print_results("MCP服务器冷启动", results)
+    if args.json:
+        write_json(args.json, {"startup": results})
+
+
+if __name__ == "__main__":
+    main()
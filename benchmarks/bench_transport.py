@@ -0,0 +1,110 @@
+"""HTTP传输选项基准测试 - 通过真实套接字比较连接复用、压缩、分页并发和HTTP/2对批量抓取吞吐的影响"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from .common import add_mock_arguments, make_explorer, summarize, print_results, write_json
+
+from scan.client import HuaweiCloudApiClient, ClientOptions
+from scan.metrics import metrics
+
+# 每组传输选项相对默认值的改动
+SCENARIOS = {
+    "HTTP/1.1 不复用连接": {"http2": False, "max_keepalive_connections": 0},
+    "HTTP/1.1 连接池": {"http2": False},
+    "HTTP/1.1 连接池 + 关闭压缩": {"http2": False, "compression": False},
+    "HTTP/1.1 连接池 + 逐页获取": {"http2": False, "page_concurrency": 1},
+    "HTTP/2 多路复用": {"http2": True, "max_connections": 4, "max_keepalive_connections": 4},
+}
+
+
+def upstream_requests() -> float:
+    """返回累计的上游请求数"""
+    return sum(value for (name, _), value in metrics.counters.items() if name == "upstream_requests_total")
+
+
+async def crawl(client: HuaweiCloudApiClient, product_shorts: List[str], details: int, concurrency: int):
+    """批量抓取：并发获取多个产品的完整API列表，再并发获取每个产品前details个API的详情"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_product(product_short: str):
+        async with semaphore:
+            apis = await client.get_all_apis(product_short)
+
+        async def fetch_detail(api):
+            async with semaphore:
+                await client.get_api_detail(product_short, api.name)
+
+        await asyncio.gather(*(fetch_detail(api) for api in apis[:details]))
+
+    await asyncio.gather(*(fetch_product(product_short) for product_short in product_shorts))
+
+
+async def run_scenario(base_url: str, options: ClientOptions, product_shorts: List[str],
+                       args: argparse.Namespace) -> Dict[str, Any]:
+    """每次迭代使用新客户端（无缓存、无已建立的连接）完成一轮批量抓取"""
+    latencies = []
+    requests_before = upstream_requests()
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        begin = time.perf_counter()
+        async with HuaweiCloudApiClient(options=options) as client:
+            client.base_url = base_url
+            await crawl(client, product_shorts, args.details, args.concurrency)
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - started
+
+    stats = summarize(latencies, elapsed)
+    stats["upstream_requests_per_s"] = round((upstream_requests() - requests_before) / elapsed, 2)
+    return stats
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """运行传输选项基准测试"""
+    explorer = make_explorer(args)
+    product_shorts = args.product_short or explorer.product_shorts()[:args.crawl_products]
+    server = None
+    base_url = args.url
+    if not base_url:
+        server = explorer.serve()
+        base_url = server.base_url
+
+    results = {}
+    try:
+        for label, overrides in SCENARIOS.items():
+            options = ClientOptions(**overrides)
+            if options.http2 and not options.use_http2():
+                continue
+            if options.use_http2() and base_url.startswith("http://"):
+                # 标准库HTTP服务只支持HTTP/1.1，明文HTTP/2需要服务端支持h2c
+                continue
+            results[label] = await run_scenario(base_url, options, product_shorts, args)
+    finally:
+        if server:
+            server.close()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP传输选项基准测试")
+    add_mock_arguments(parser)
+    parser.set_defaults(iterations=5)
+    parser.add_argument('--crawl-products', type=int, default=5, help='每轮抓取的产品数量（默认：5）')
+    parser.add_argument('--details', type=int, default=50, help='每个产品获取详情的API数量（默认：50）')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发请求数（默认：16）')
+    parser.add_argument('--url', help='改为对指定地址测试（如华为云API Explorer），默认启动本地模拟HTTP服务')
+    parser.add_argument('--product-short', action='append', help='配合--url使用的产品简称，可重复指定')
+    args = parser.parse_args()
+    results = asyncio.run(run(args))
+    print_results("HTTP传输选项（批量抓取）", results)
+    for label, stats in results.items():
+        print(f"  {label}: {stats['upstream_requests_per_s']:.1f} 上游请求/秒")
+    if args.json:
+        write_json(args.json, {"transport": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""基准测试公共工具 - 计时、统计和基于本地模拟的客户端构造"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from scan.client import HuaweiCloudApiClient
+from scan.mock_explorer import MockExplorer
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    """添加本地模拟数据规模和延迟相关的命令行参数"""
+    parser.add_argument('--products', type=int, default=50, help='模拟产品数量（默认：50）')
+    parser.add_argument('--apis', type=int, default=300, help='每个产品的API数量（默认：300）')
+    parser.add_argument('--definitions', type=int, default=5, help='每个API详情的definitions数量（默认：5）')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个上游请求注入的延迟，单位秒（默认：0）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延迟的随机抖动比例（默认：0）')
+    parser.add_argument('--iterations', type=int, default=20, help='每项测试的重复次数（默认：20）')
+    parser.add_argument('--json', metavar='FILE', help='将结果以JSON格式写入文件')
+
+
+def make_explorer(args: argparse.Namespace) -> MockExplorer:
+    """根据命令行参数创建本地模拟"""
+    return MockExplorer(
+        products=args.products,
+        apis_per_product=args.apis,
+        definitions_per_api=args.definitions,
+        latency=args.latency,
+        jitter=args.jitter
+    )
+
+
+def make_client(explorer: MockExplorer, **kwargs) -> HuaweiCloudApiClient:
+    """创建连接本地模拟的API客户端"""
+    return HuaweiCloudApiClient(transport=explorer.transport(), **kwargs)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies: List[float], elapsed: float = None) -> Dict[str, Any]:
+    """汇总一组耗时（秒），返回以毫秒为单位的统计"""
+    total = elapsed if elapsed is not None else sum(latencies)
+    return {
+        "count": len(latencies),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0,
+        "throughput_per_s": round(len(latencies) / total, 2) if total else 0.0
+    }
+
+
+async def measure(func: Callable[[], Awaitable[Any]], iterations: int) -> Dict[str, Any]:
+    """顺序执行iterations次异步调用并统计耗时"""
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def measure_sync(func: Callable[[], Any], iterations: int) -> Dict[str, Any]:
+    """顺序执行iterations次同步调用并统计耗时"""
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def print_results(title: str, results: Dict[str, Dict[str, Any]]):
+    """以表格形式打印结果"""
+    print(f"\n== {title} ==")
+    print(f"{'用例':<60} {'次数':>6} {'p50(ms)':>10} {'p95(ms)':>10} {'p99(ms)':>10} {'吞吐(/s)':>10}")
+    for name, stats in results.items():
+        print(f"{name:<60} {stats['count']:>6} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} "
+              f"{stats['p99_ms']:>10.3f} {stats['throughput_per_s']:>10.2f}")
+
+
+def write_json(path: str, data: Dict[str, Any]):
+    """将结果写入JSON文件"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"\n📄 结果已写入: {path}")
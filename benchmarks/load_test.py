@@ -0,0 +1,330 @@
+"""MCP服务器负载测试 - 以子进程方式启动服务器，通过stdio按场景文件的比例并发发送tools/call请求"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .common import make_explorer, make_client, summarize, print_results, write_json
+
+from scan.packed_snapshot import pack_store
+from scan.snapshot_store import SnapshotStore, mirror
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SERVER = os.path.join(ROOT, "run_cursor_server.py")
+DEFAULT_SCENARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios", "mock.json")
+
+# 服务器单行响应可能很大（如完整的API详情），读取stdout时的行长度上限
+LINE_LIMIT = 64 * 1024 * 1024
+
+# 采样子进程常驻内存的间隔（秒）
+RSS_INTERVAL = 0.1
+
+
+def load_scenario(path: str) -> Dict[str, Any]:
+    """读取场景文件：requests中每项包含tool、arguments、weight（默认1）和可选的label"""
+    with open(path, 'r', encoding='utf-8') as f:
+        scenario = json.load(f)
+    requests = scenario.get("requests") or []
+    if not requests:
+        raise ValueError(f"场景文件中没有请求: {path}")
+    for entry in requests:
+        if "tool" not in entry:
+            raise ValueError(f"场景中的请求缺少tool字段: {entry}")
+        entry.setdefault("arguments", {})
+        entry.setdefault("weight", 1)
+        entry.setdefault("label", entry["tool"])
+    return scenario
+
+
+def read_rss(pid: int, field: str = "VmRSS") -> Optional[int]:
+    """读取进程的常驻内存（字节），仅Linux可用"""
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def build_mock_snapshot(args: argparse.Namespace, directory: str) -> str:
+    """将本地模拟数据镜像并打包为快照，供子进程中的服务器离线读取"""
+    explorer = make_explorer(args)
+    store = SnapshotStore(os.path.join(directory, "store"), compression="none")
+
+    async def run_mirror():
+        async with make_client(explorer) as client:
+            with contextlib.redirect_stdout(io.StringIO()):
+                await mirror(client, store)
+
+    asyncio.run(run_mirror())
+    path = os.path.join(directory, "mock.pack")
+    pack_store(store, path)
+    return path
+
+
+class ServerProcess:
+    """stdio上的MCP服务器子进程，按请求ID匹配响应"""
+
+    def __init__(self, command: List[str], env: Dict[str, str]):
+        self.command = command
+        self.env = env
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.notifications = 0
+        self.peak_rss = 0
+        self._next_id = 0
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL, env=self.env, limit=LINE_LIMIT)
+        self._tasks = [asyncio.create_task(self._read()), asyncio.create_task(self._sample_rss())]
+
+    async def _read(self):
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            future = self.pending.pop(message.get("id"), None) if "id" in message else None
+            if future is None:
+                # 通知或无法对应请求的响应
+                self.notifications += 1
+            elif not future.done():
+                future.set_result(message)
+        # 服务器退出后，未完成的请求全部失败
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("服务器进程已退出"))
+        self.pending.clear()
+
+    async def _sample_rss(self):
+        while True:
+            rss = read_rss(self.process.pid)
+            if rss is None:
+                return
+            self.peak_rss = max(self.peak_rss, rss)
+            await asyncio.sleep(RSS_INTERVAL)
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None,
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
+        """发送请求并等待对应ID的响应"""
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}}
+        self.process.stdin.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        try:
+            await self.process.stdin.drain()
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def notify(self, method: str):
+        message = {"jsonrpc": "2.0", "method": method}
+        self.process.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+        await self.process.stdin.drain()
+
+    async def stop(self, timeout: float = 10.0):
+        """关闭stdin使服务器正常退出，超时后强制结束"""
+        # 退出前读取整个生命周期的内存峰值
+        self.peak_rss = max(self.peak_rss, read_rss(self.process.pid, "VmHWM") or 0)
+        self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        for task in self._tasks:
+            task.cancel()
+        if not self.peak_rss:
+            # 没有/proc时使用已回收子进程的最大常驻内存（macOS单位为字节，其余为KB），Windows上不统计
+            try:
+                import resource
+            except ImportError:
+                return
+            maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            self.peak_rss = maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def classify_error(response: Dict[str, Any]) -> Optional[str]:
+    """返回错误类别，成功时返回None"""
+    if "error" in response:
+        return f"rpc{response['error'].get('code')}"
+    if (response.get("result") or {}).get("isError"):
+        return "tool_error"
+    return None
+
+
+async def run(args: argparse.Namespace, scenario: Dict[str, Any], env: Dict[str, str]) -> Dict[str, Any]:
+    """启动服务器并按场景发送请求，返回统计结果"""
+    requests = scenario["requests"]
+    weights = [entry["weight"] for entry in requests]
+    chooser = random.Random(args.seed)
+    total = args.requests
+    warmup = scenario.get("warmup", 0) if args.warmup is None else args.warmup
+
+    server = ServerProcess([sys.executable, args.server], env)
+    started = time.perf_counter()
+    await server.start()
+    try:
+        await server.request("initialize", {"protocolVersion": "2024-11-05", "capabilities": {},
+                                            "clientInfo": {"name": "load_test", "version": "1.0"}},
+                             timeout=args.timeout)
+        startup = time.perf_counter() - started
+        await server.notify("initialized")
+
+        # 预热请求依次发送，填充服务器缓存，不计入结果
+        for _ in range(warmup):
+            entry = chooser.choices(requests, weights)[0]
+            with contextlib.suppress(Exception):
+                await server.request("tools/call", {"name": entry["tool"], "arguments": entry["arguments"]},
+                                     timeout=args.timeout)
+
+        latencies: Dict[str, List[float]] = {entry["label"]: [] for entry in requests}
+        errors: Dict[str, Counter] = {entry["label"]: Counter() for entry in requests}
+        plan = [chooser.choices(requests, weights)[0] for _ in range(total)]
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def call(entry: Dict[str, Any], scheduled: float):
+            async with semaphore:
+                try:
+                    response = await server.request(
+                        "tools/call", {"name": entry["tool"], "arguments": entry["arguments"]}, timeout=args.timeout)
+                    error = classify_error(response)
+                except asyncio.TimeoutError:
+                    error = "timeout"
+                except (ConnectionError, BrokenPipeError):
+                    error = "disconnected"
+            # 固定速率时从计划发送时间开始计时，服务器积压造成的排队也计入延迟
+            latencies[entry["label"]].append(time.perf_counter() - scheduled)
+            if error:
+                errors[entry["label"]][error] += 1
+
+        begin = time.perf_counter()
+        if args.rate:
+            tasks = []
+            for index, entry in enumerate(plan):
+                scheduled = begin + index / args.rate
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                tasks.append(asyncio.create_task(call(entry, scheduled)))
+            await asyncio.gather(*tasks)
+        else:
+            async def worker(entries):
+                for entry in entries:
+                    await call(entry, time.perf_counter())
+
+            await asyncio.gather(*(worker(plan[index::args.concurrency]) for index in range(args.concurrency)))
+        elapsed = time.perf_counter() - begin
+    finally:
+        await server.stop()
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    all_errors = sum((counter for counter in errors.values()), Counter())
+    tools = {}
+    for label, values in latencies.items():
+        if values:
+            tools[label] = summarize(values, elapsed)
+            tools[label]["errors"] = dict(errors[label])
+            tools[label]["error_rate"] = round(sum(errors[label].values()) / len(values), 4)
+    return {
+        "config": {
+            "scenario": args.scenario,
+            "requests": total,
+            "warmup": warmup,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "seed": args.seed
+        },
+        "startup_ms": round(startup * 1000, 1),
+        "elapsed_s": round(elapsed, 3),
+        "overall": summarize(all_latencies, elapsed),
+        "errors": dict(all_errors),
+        "error_rate": round(sum(all_errors.values()) / len(all_latencies), 4) if all_latencies else 0.0,
+        "tools": tools,
+        "peak_rss_bytes": server.peak_rss,
+        "server_notifications": server.notifications
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP服务器stdio负载测试")
+    parser.add_argument('--products', type=int, default=6, help='--mock时的模拟产品数量（默认：6）')
+    parser.add_argument('--apis', type=int, default=100, help='--mock时每个产品的API数量（默认：100）')
+    parser.add_argument('--definitions', type=int, default=5, help='--mock时每个API详情的definitions数量（默认：5）')
+    parser.set_defaults(latency=0.0, jitter=0.0)
+    parser.add_argument('--scenario', default=DEFAULT_SCENARIO, help='场景文件（默认：scenarios/mock.json）')
+    parser.add_argument('--requests', type=int, default=200, help='计入结果的请求数（默认：200）')
+    parser.add_argument('--warmup', type=int, help='预热请求数（默认：使用场景文件中的warmup）')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='同时未完成的请求数上限，大于1时延迟包含服务器端的排队时间（默认：1）')
+    parser.add_argument('--rate', type=float, help='固定发送速率（请求/秒），不指定时按并发数连续发送')
+    parser.add_argument('--timeout', type=float, default=60.0, help='单个请求的超时时间，单位秒（默认：60）')
+    parser.add_argument('--seed', type=int, default=0, help='选择请求的随机种子（默认：0）')
+    parser.add_argument('--server', default=DEFAULT_SERVER, help='服务器启动脚本（默认：run_cursor_server.py）')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--mock', action='store_true', help='使用本地模拟数据打包的快照（规模由--products、--apis决定）')
+    source.add_argument('--snapshot', help='使用打包快照（API_SCAN_SNAPSHOT）')
+    source.add_argument('--cassette', help='回放录制的cassette（API_SCAN_CASSETTE）')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='回放cassette时的延迟倍数（默认：1）')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE', help='传给服务器的环境变量，可重复指定')
+    parser.add_argument('--json', metavar='FILE', help='将结果以JSON格式写入文件，为-时输出到stdout')
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error("--concurrency必须大于0")
+    try:
+        scenario = load_scenario(args.scenario)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    env = dict(os.environ)
+    # 关闭后台预热和守护进程代理，使结果只反映被测服务器进程本身
+    env.update({"API_SCAN_WARMUP": "0", "API_SCAN_DAEMON": "0"})
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.mock:
+            print("📦 正在打包本地模拟数据...", file=sys.stderr)
+            env["API_SCAN_SNAPSHOT"] = build_mock_snapshot(args, directory)
+        elif args.snapshot:
+            env["API_SCAN_SNAPSHOT"] = os.path.abspath(args.snapshot)
+        elif args.cassette:
+            env["API_SCAN_CASSETTE"] = os.path.abspath(args.cassette)
+            env["API_SCAN_CASSETTE_MODE"] = "replay"
+            env["API_SCAN_REPLAY_LATENCY"] = str(args.latency_scale)
+        report = asyncio.run(run(args, scenario, env))
+
+    if args.json == "-":
+        # stdout只输出JSON，便于管道处理
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print_results("MCP负载测试", {**report["tools"], "全部": report["overall"]})
+    print(f"\n启动 {report['startup_ms']}ms，错误率 {report['error_rate']:.2%} {report['errors'] or ''}，"
+          f"内存峰值 {report['peak_rss_bytes'] / 1024 / 1024:.1f}MB")
+    if args.concurrency > 1 or args.rate:
+        print("⚠️ 服务器逐个处理stdio上的请求，以上延迟包含请求在服务器端排队等待的时间，不是单个请求的处理耗时")
+    if args.json:
+        write_json(args.json, {"load_test": report})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""运行全部基准测试"""
+
+import argparse
+import asyncio
+import platform
+import sys
+import time
+
+from .common import add_mock_arguments, print_results, write_json
+from . import bench_client, bench_server, bench_exporter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="华为云API分析MCP服务器离线基准测试")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    report = {
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "config": {
+            "products": args.products,
+            "apis": args.apis,
+            "definitions": args.definitions,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "iterations": args.iterations
+        }
+    }
+
+    report["client"] = asyncio.run(bench_client.run(args))
+    print_results("HuaweiCloudApiClient", report["client"])
+    report["server"] = asyncio.run(bench_server.run(args))
+    print_results("MCP tools/call", report["server"])
+    report["exporter"] = bench_exporter.run(args)
+    print_results("YamlExporter", report["exporter"])
+
+    if args.json:
+        write_json(args.json, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""进程内缓存 - 为华为云API客户端提供带过期时间的结果缓存，以及多个缓存共享的内存预算"""
+
+import os
+import sys
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Callable, Container, Dict, Hashable, List, Optional, Tuple
+
+# lookup返回的缓存状态
+FRESH = "fresh"
+STALE = "stale"
+MISSING = "missing"
+
+# 共享内存预算的默认值（MB），可通过API_SCAN_CACHE_MB调整，0表示不限制
+DEFAULT_CACHE_MB = 256
+
+# 淘汰时从每个缓存最久未使用的一端取出比较的条目数
+EVICTION_SAMPLE = 8
+
+# 缓存条目各字段在列表中的位置
+_WRITTEN, _VALUE, _SIZE, _HITS, _ACCESSED = range(5)
+
+
+def estimate_size(value: Any, skip: Optional[Container[int]] = None) -> int:
+    """估算对象占用的内存字节数，递归统计容器元素和普通对象的属性，共享的对象只计一次；id在skip中的对象及其内容不计入"""
+    seen = set()
+    stack = [value]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or (skip is not None and id(obj) in skip):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.append(obj.__dict__)
+    return total
+
+
+class MemoryAccountant:
+    """多个缓存共享的内存预算，超出时综合条目大小、访问次数和最近访问时间选择淘汰对象"""
+
+    def __init__(self, max_bytes: Optional[int] = None, sample: int = EVICTION_SAMPLE):
+        # None表示不限制，只统计
+        self.max_bytes = max_bytes
+        self.sample = sample
+        self.bytes = 0
+        self.evictions = 0
+        self.caches: Dict[str, "TTLCache"] = {}
+
+    @classmethod
+    def from_env(cls) -> "MemoryAccountant":
+        """根据API_SCAN_CACHE_MB创建内存预算"""
+        megabytes = float(os.environ.get("API_SCAN_CACHE_MB", DEFAULT_CACHE_MB))
+        return cls(int(megabytes * 1024 * 1024) if megabytes > 0 else None)
+
+    def register(self, name: str, cache: "TTLCache"):
+        """登记共享预算的缓存"""
+        self.caches[name] = cache
+
+    @staticmethod
+    def _priority(cache: "TTLCache", entry: List[Any], now: float) -> float:
+        """条目的保留优先级，越小越先淘汰：访问次数越多、越近被访问、占用越小越优先保留"""
+        if now - entry[_WRITTEN] > cache.ttl + cache.max_stale:
+            # 已彻底过期的条目最先淘汰
+            return -1.0
+        idle = now - entry[_ACCESSED]
+        return (1 + entry[_HITS]) / (max(entry[_SIZE], 1) * (1 + idle))
+
+    def enforce(self, keep: Optional[Tuple["TTLCache", Hashable]] = None):
+        """超出预算时淘汰条目直到回到预算内，keep为刚写入、不参与本次淘汰的条目"""
+        if self.max_bytes is None:
+            return
+        while self.bytes > self.max_bytes:
+            now = time.monotonic()
+            victim = None
+            lowest = None
+            for cache in self.caches.values():
+                for key, entry in islice(cache._data.items(), self.sample):
+                    if keep is not None and keep[0] is cache and keep[1] == key:
+                        continue
+                    priority = self._priority(cache, entry, now)
+                    if lowest is None or priority < lowest:
+                        victim, lowest = (cache, key), priority
+            if victim is None:
+                return
+            victim[0]._remove(victim[1])
+            victim[0].evictions += 1
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """返回预算使用情况及各缓存占用的字节数"""
+        return {
+            "max_bytes": self.max_bytes,
+            "bytes": self.bytes,
+            "evictions": self.evictions,
+            "caches": {name: cache.bytes for name, cache in self.caches.items()}
+        }
+
+
+class TTLCache:
+    """带过期时间、条目上限和可选字节预算的LRU缓存，支持在有限时间内返回过期数据"""
+
+    def __init__(self, ttl: float, max_entries: int = 1024, max_stale: float = 0.0,
+                 max_bytes: Optional[int] = None, accountant: Optional[MemoryAccountant] = None,
+                 name: Optional[str] = None, sizer: Callable[[Any], int] = estimate_size):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # 过期后仍可返回旧值的最长时间，超过后必须重新加载
+        self.max_stale = max_stale
+        # 本缓存自身的字节上限，None表示只按条目数限制
+        self.max_bytes = max_bytes
+        # 与其他缓存共享的内存预算，写入时未给出size则估算值的大小
+        self.accountant = accountant
+        if accountant is not None:
+            accountant.register(name or f"cache{len(accountant.caches)}", self)
+        # 写入时未给出size时估算值大小的函数
+        self.sizer = sizer
+        self.bytes = 0
+        self._data = OrderedDict()  # key -> [写入时间, 值, 字节数, 命中次数, 最近访问时间]
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key: Hashable) -> Tuple[Any, str]:
+        """读取缓存值及其状态（FRESH/STALE/MISSING）"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, MISSING
+
+        now = time.monotonic()
+        age = now - entry[_WRITTEN]
+        if age > self.ttl + self.max_stale:
+            self._remove(key)
+            self.misses += 1
+            return None, MISSING
+
+        self._data.move_to_end(key)
+        entry[_HITS] += 1
+        entry[_ACCESSED] = now
+        if age > self.ttl:
+            self.stale_hits += 1
+            return entry[_VALUE], STALE
+
+        self.hits += 1
+        return entry[_VALUE], FRESH
+
+    def state(self, key: Hashable) -> str:
+        """返回缓存项的状态，不计入命中统计"""
+        entry = self._data.get(key)
+        if entry is None:
+            return MISSING
+        age = time.monotonic() - entry[_WRITTEN]
+        if age > self.ttl + self.max_stale:
+            return MISSING
+        return STALE if age > self.ttl else FRESH
+
+    def written_at(self, key: Hashable) -> Optional[float]:
+        """返回缓存项的写入时间，可作为缓存值的版本号；不存在时返回None"""
+        entry = self._data.get(key)
+        return None if entry is None else entry[_WRITTEN]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取未过期的缓存值"""
+        value, state = self.lookup(key)
+        return value if state == FRESH else default
+
+    def set(self, key: Hashable, value: Any, size: Optional[int] = None):
+        """写入缓存值，超出条目上限、字节上限或共享预算时淘汰条目"""
+        self._remove(key)
+        if size is None:
+            size = self.sizer(value) if self.max_bytes is not None or self.accountant is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # 单个值超过整个预算时不缓存，避免清空其他条目
+            return
+
+        now = time.monotonic()
+        self._data[key] = [now, value, size, 0, now]
+        self._charge(size)
+        while len(self._data) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+        if self.accountant is not None:
+            self.accountant.enforce(keep=(self, key))
+
+    def _charge(self, size: int):
+        self.bytes += size
+        if self.accountant is not None:
+            self.accountant.bytes += size
+
+    def _remove(self, key: Hashable) -> Optional[List[Any]]:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._charge(-entry[_SIZE])
+        return entry
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """删除并返回缓存值"""
+        entry = self._remove(key)
+        return default if entry is None else entry[_VALUE]
+
+    def remove_if(self, predicate: Callable[[Hashable], bool]) -> int:
+        """删除键满足条件的缓存项，返回删除的数量"""
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        """清空缓存"""
+        self._data.clear()
+        self._charge(-self.bytes)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and time.monotonic() - entry[_WRITTEN] <= self.ttl
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计信息"""
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.stale_hits) / total, 4) if total else 0.0
+        }
@@ -0,0 +1,283 @@
+"""录制与回放 - 将上游接口的真实响应录制到压缩的cassette文件，离线按原始或缩放后的延迟回放"""
+
+import argparse
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+
+from .snapshot_store import _zstd
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_FORMAT = 1
+
+# 文件内容的压缩格式由魔数识别，写入时由扩展名决定
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# 回放时保留的响应头，其余（Content-Encoding、Content-Length等）由httpx按回放的正文重新生成
+KEPT_HEADERS = ("content-type",)
+
+
+def request_key(method: str, path: str, query: str) -> Tuple[str, str, str]:
+    """请求的匹配键：方法、路径和按参数名排序后的查询字符串"""
+    return method.upper(), path, urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+
+def _query(request: httpx.Request) -> str:
+    return request.url.query.decode("ascii")
+
+
+def _body_bytes(interaction: Dict[str, Any]) -> bytes:
+    if "body_base64" in interaction:
+        return base64.b64decode(interaction["body_base64"])
+    return interaction["body"].encode("utf-8")
+
+
+def endpoint_name(path: str) -> str:
+    """按路径归类为products、apis、detail等接口名"""
+    for suffix, name in (("/v5/products", "products"), ("/v3/apis", "apis"), ("/v4/apis/detail", "detail")):
+        if path.endswith(suffix):
+            return name
+    return "other"
+
+
+class Cassette:
+    """录制的请求与响应，同一请求录制多次时按录制顺序轮流回放"""
+
+    def __init__(self, path: str, interactions: Optional[List[Dict[str, Any]]] = None,
+                 recorded_at: Optional[str] = None):
+        self.path = path
+        self.interactions = interactions or []
+        self.recorded_at = recorded_at
+        self._index: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self._cursor: Counter = Counter()
+        for interaction in self.interactions:
+            self._index[self._key(interaction)].append(interaction)
+
+    @staticmethod
+    def _key(interaction: Dict[str, Any]) -> Tuple[str, str, str]:
+        return request_key(interaction["method"], interaction["path"], interaction["query"])
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """读取cassette文件，自动识别gzip和zstd压缩"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data.startswith(GZIP_MAGIC):
+            data = gzip.decompress(data)
+        elif data.startswith(ZSTD_MAGIC):
+            zstd = _zstd()
+            if zstd is None:
+                raise ValueError(f"cassette使用zstd压缩，读取需要安装zstandard: {path}")
+            data = zstd.ZstdDecompressor().decompress(data)
+        document = json.loads(data)
+        if document.get("format") != CASSETTE_FORMAT:
+            raise ValueError(f"不支持的cassette格式: {path}")
+        return cls(path, document["interactions"], document.get("recorded_at"))
+
+    def save(self, path: Optional[str] = None):
+        """写入cassette文件，扩展名为.zst时用zstd压缩，.gz时用gzip压缩"""
+        path = path or self.path
+        document = {
+            "format": CASSETTE_FORMAT,
+            "recorded_at": self.recorded_at or datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "interactions": self.interactions
+        }
+        data = json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if path.endswith(".zst"):
+            zstd = _zstd()
+            if zstd is None:
+                raise ValueError("zstd压缩需要安装zstandard，或改用.gz扩展名")
+            data = zstd.ZstdCompressor(level=10).compress(data)
+        elif path.endswith(".gz"):
+            data = gzip.compress(data, compresslevel=6)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def record(self, request: httpx.Request, response: httpx.Response, elapsed: float):
+        """记录一次请求和已读取正文的响应"""
+        interaction = {
+            "method": request.method,
+            "path": request.url.path,
+            "query": _query(request),
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+            "elapsed": round(elapsed, 6)
+        }
+        try:
+            interaction["body"] = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            interaction["body_base64"] = base64.b64encode(response.content).decode("ascii")
+        self.interactions.append(interaction)
+        self._index[self._key(interaction)].append(interaction)
+
+    def find(self, request: httpx.Request) -> Optional[Dict[str, Any]]:
+        """查找与请求匹配的录制，未录制时返回None"""
+        key = request_key(request.method, request.url.path, _query(request))
+        candidates = self._index.get(key)
+        if not candidates:
+            return None
+        position = self._cursor[key]
+        self._cursor[key] = position + 1
+        return candidates[position % len(candidates)]
+
+    def stats(self) -> Dict[str, Any]:
+        """按接口统计录制数、正文大小和录制时的延迟"""
+        endpoints: Dict[str, Dict[str, Any]] = {}
+        for interaction in self.interactions:
+            stats = endpoints.setdefault(endpoint_name(interaction["path"]),
+                                         {"requests": 0, "body_bytes": 0, "elapsed": []})
+            stats["requests"] += 1
+            stats["body_bytes"] += len(_body_bytes(interaction))
+            stats["elapsed"].append(interaction["elapsed"])
+        for stats in endpoints.values():
+            elapsed = sorted(stats.pop("elapsed"))
+            stats["median_elapsed_ms"] = round(elapsed[len(elapsed) // 2] * 1000, 1)
+        return {
+            "recorded_at": self.recorded_at,
+            "interactions": len(self.interactions),
+            "file_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "endpoints": endpoints
+        }
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """转发请求到真实上游并录制响应，关闭时写入cassette"""
+
+    def __init__(self, cassette: Cassette, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.cassette = cassette
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        # 读取并解压正文，录制的是解码后的内容
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        elapsed = time.perf_counter() - started
+        self.cassette.record(request, response, elapsed)
+        return httpx.Response(
+            response.status_code,
+            headers={name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+            content=response.content
+        )
+
+    async def aclose(self):
+        await self.transport.aclose()
+        self.cassette.save()
+        logger.info(f"已录制{len(self.cassette.interactions)}个请求到: {self.cassette.path}")
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """按录制的响应回放，latency_scale为1时保持录制时的延迟，为0时不等待"""
+
+    def __init__(self, cassette: Cassette, latency_scale: float = 1.0):
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+        self.replayed = 0
+        self.misses = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        interaction = self.cassette.find(request)
+        if interaction is None:
+            self.misses += 1
+            logger.warning(f"cassette中没有录制的请求: {request.method} {request.url}")
+            return httpx.Response(404, json={"error_code": "CASSETTE.0404", "error_msg": "请求未录制"})
+
+        self.replayed += 1
+        delay = interaction["elapsed"] * self.latency_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return httpx.Response(interaction["status"], headers=interaction["headers"], content=_body_bytes(interaction))
+
+
+def transport_from_env(options=None) -> Optional[httpx.AsyncBaseTransport]:
+    """根据API_SCAN_CASSETTE、API_SCAN_CASSETTE_MODE和API_SCAN_REPLAY_LATENCY创建录制或回放transport"""
+    path = os.environ.get("API_SCAN_CASSETTE", "").strip()
+    if not path:
+        return None
+
+    mode = os.environ.get("API_SCAN_CASSETTE_MODE", "replay").strip().lower()
+    if mode == "record":
+        return RecordingTransport(Cassette(path), options.transport() if options is not None else None)
+    if mode != "replay":
+        raise ValueError(f"API_SCAN_CASSETTE_MODE应为record或replay: {mode}")
+    return ReplayTransport(Cassette.load(path), float(os.environ.get("API_SCAN_REPLAY_LATENCY", "1")))
+
+
+async def _record_cli(args: argparse.Namespace):
+    from .client import ClientOptions, HuaweiCloudApiClient
+    options = ClientOptions.from_env()
+    transport = RecordingTransport(Cassette(args.path), options.transport())
+    async with HuaweiCloudApiClient(transport=transport, options=options) as client:
+        print(f"🔍 正在录制到: {args.path}")
+        products = await client.get_products()
+        product_shorts = args.product or [product.productshort for group in products.groups
+                                          for product in group.products]
+        semaphore = asyncio.Semaphore(max(1, args.concurrency))
+
+        async def record_detail(product_short: str, api_name: str):
+            async with semaphore:
+                try:
+                    await client.get_api_detail(product_short, api_name)
+                except Exception as e:
+                    print(f"  ❌ {product_short}/{api_name}: {e}", file=sys.stderr)
+
+        for product_short in product_shorts:
+            apis = await client.get_all_apis(product_short)
+            print(f"  📦 {product_short}: {len(apis)}个API")
+            await asyncio.gather(*(record_detail(product_short, api.name) for api in apis[:args.details]))
+    print(f"✅ 已录制{len(transport.cassette.interactions)}个请求")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="华为云API Explorer请求录制与回放")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="录制产品目录、API列表和API详情")
+    record_parser.add_argument("path", help="cassette文件，扩展名为.gz或.zst时压缩")
+    record_parser.add_argument("--product", action="append", help="录制的产品简称，可重复指定（默认：全部产品）")
+    record_parser.add_argument("--details", type=int, default=50, help="每个产品录制的API详情数（默认：50）")
+    record_parser.add_argument("--concurrency", type=int, default=4, help="并发请求数（默认：4）")
+
+    info_parser = subparsers.add_parser("info", help="显示cassette的录制统计")
+    info_parser.add_argument("path", help="cassette文件")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        asyncio.run(_record_cli(args))
+        return
+
+    try:
+        stats = Cassette.load(args.path).stats()
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"📼 录制于{stats['recorded_at']}，共{stats['interactions']}个请求，文件 {stats['file_bytes'] / 1024:.0f}KB")
+    for endpoint, endpoint_stats in stats["endpoints"].items():
+        print(f"  {endpoint}: {endpoint_stats['requests']}个请求，正文 {endpoint_stats['body_bytes'] / 1024:.0f}KB，"
+              f"录制延迟中位数 {endpoint_stats['median_elapsed_ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
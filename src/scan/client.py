@@ -1,97 +1,540 @@
 """Huawei Cloud API client for fetching API documentation"""
 
+import asyncio
+import copy
+import importlib.util
+import logging
+import os
+import time
+from collections import deque
 import httpx
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 import json
 from .models import ProductsResponse, ApisResponse, ApiBasicInfo, Product
+from .cache import TTLCache, MemoryAccountant, FRESH, STALE, MISSING
+from .product_index import ProductIndex, load_aliases, normalize_name
+from .packed_snapshot import PackedSnapshot
+from .snapshot_store import BlobPool
+from . import cassette
+from .metrics import metrics, traced
+from . import progress
+
+logger = logging.getLogger(__name__)
+
+# 各类缓存的默认过期时间（秒）
+CATALOG_CACHE_TTL = 3600
+APIS_CACHE_TTL = 1800
+DETAIL_CACHE_TTL = 3600
+
+# 产品目录和API列表过期后仍直接返回旧值的最长时间（秒），期间在后台刷新
+CATALOG_MAX_STALE = 6 * 3600
+APIS_MAX_STALE = 2 * 3600
+
+# 未找到产品或接口的结果缓存时间（秒），重复的错误查询直接返回
+NEGATIVE_CACHE_TTL = 60
+
+# 批量获取API详情时的默认并发数
+BATCH_CONCURRENCY = 8
+
+# 获取API列表时每页的数量
+APIS_PAGE_LIMIT = 100
+
+
+def _env_flag(name: str) -> Optional[bool]:
+    """读取布尔型环境变量，未设置或为auto时返回None"""
+    value = os.environ.get(name, "").strip().lower()
+    if not value or value == "auto":
+        return None
+    return value not in ("0", "false", "no", "off")
+
+
+class ClientOptions:
+    """HTTP连接选项：HTTP/2、分项超时、连接池和响应压缩"""
+
+    def __init__(self, **data):
+        # None表示安装了h2时自动启用HTTP/2，多个并发请求复用同一连接
+        self.http2 = data.get('http2')
+        self.connect_timeout = data.get('connect_timeout', 5.0)
+        self.read_timeout = data.get('read_timeout', 30.0)
+        self.write_timeout = data.get('write_timeout', 10.0)
+        # 等待连接池空闲连接的时间
+        self.pool_timeout = data.get('pool_timeout', 10.0)
+        self.max_connections = data.get('max_connections', 20)
+        self.max_keepalive_connections = data.get('max_keepalive_connections', 10)
+        self.keepalive_expiry = data.get('keepalive_expiry', 30.0)
+        # 请求gzip/deflate压缩，安装了brotli或zstandard时一并接受
+        self.compression = data.get('compression', True)
+        # 获取API列表时并发请求的分页数
+        self.page_concurrency = data.get('page_concurrency', 4)
+
+    @classmethod
+    def from_env(cls) -> "ClientOptions":
+        """从环境变量读取配置"""
+        compression = _env_flag("API_SCAN_COMPRESSION")
+        return cls(
+            http2=_env_flag("API_SCAN_HTTP2"),
+            connect_timeout=float(os.environ.get("API_SCAN_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.environ.get("API_SCAN_READ_TIMEOUT", "30")),
+            write_timeout=float(os.environ.get("API_SCAN_WRITE_TIMEOUT", "10")),
+            pool_timeout=float(os.environ.get("API_SCAN_POOL_TIMEOUT", "10")),
+            max_connections=int(os.environ.get("API_SCAN_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.environ.get("API_SCAN_MAX_KEEPALIVE", "10")),
+            compression=compression if compression is not None else True,
+            page_concurrency=int(os.environ.get("API_SCAN_PAGE_CONCURRENCY", "4"))
+        )
+
+    def use_http2(self) -> bool:
+        """判断是否启用HTTP/2，未安装h2时回退到HTTP/1.1"""
+        available = importlib.util.find_spec("h2") is not None
+        if self.http2 and not available:
+            logger.warning("未安装h2（pip install 'httpx[http2]'），回退到HTTP/1.1")
+        return available if self.http2 is None else bool(self.http2 and available)
+
+    def transport(self) -> httpx.AsyncHTTPTransport:
+        """按选项创建真实的HTTP transport，供需要包装transport的场景（如录制）使用"""
+        return httpx.AsyncHTTPTransport(
+            http2=self.use_http2(),
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_keepalive_connections,
+                                keepalive_expiry=self.keepalive_expiry)
+        )
+
+    def build(self, transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+        """按选项创建httpx.AsyncClient"""
+        headers = {}
+        if not self.compression:
+            headers["Accept-Encoding"] = "identity"
+        return httpx.AsyncClient(
+            http2=self.use_http2(),
+            timeout=httpx.Timeout(connect=self.connect_timeout, read=self.read_timeout,
+                                  write=self.write_timeout, pool=self.pool_timeout),
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_keepalive_connections,
+                                keepalive_expiry=self.keepalive_expiry),
+            headers=headers,
+            transport=transport
+        )
+
+
+def normalize_query(text: str) -> str:
+    """规范化用户输入的接口名称：去除首尾空白并合并连续空白"""
+    return " ".join((text or "").split())
+
+
+def _parse_field_path(field: str) -> List[str]:
+    """解析字段路径，支持JSON Pointer（/a/b）和点号分隔（a.b）两种写法"""
+    field = field.strip()
+    if field.startswith("/"):
+        return [token.replace("~1", "/").replace("~0", "~") for token in field[1:].split("/")]
+    return [token for token in field.split(".") if token]
+
+
+def project_fields(data: Any, fields: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+    """从数据中提取指定字段的子树，返回投影结果和未找到的字段；结果是副本，不与缓存对象共享"""
+    paths = [_parse_field_path(field) for field in fields]
+    if any(not tokens for tokens in paths):
+        # 空路径表示整个文档
+        return copy.deepcopy(data), []
+
+    found = []
+    missing = []
+    for field, tokens in zip(fields, paths):
+        value = data
+        for token in tokens:
+            if isinstance(value, dict) and token in value:
+                value = value[token]
+            elif isinstance(value, list) and token.isdigit() and int(token) < len(value):
+                value = value[int(token)]
+            else:
+                missing.append(field)
+                break
+        else:
+            found.append((tuple(tokens), value))
+
+    # 路径重叠时保留较宽的路径，其子树已包含较窄路径的内容
+    selected = {tokens for tokens, _ in found}
+    projected = {}
+    for tokens, value in found:
+        if any(tokens[:length] in selected for length in range(1, len(tokens))):
+            continue
+        # 按原始路径重建嵌套结构，多个字段共享公共前缀
+        target = projected
+        for token in tokens[:-1]:
+            target = target.setdefault(token, {})
+        target[tokens[-1]] = copy.deepcopy(value)
+
+    return projected, missing
+
+
+class ApiPageStream:
+    """同一产品共享的API列表分页流：并发遍历时每页只请求一次，提前结束后已获取的页保留，之后的遍历先重放再继续获取"""
+
+    def __init__(self, pages: AsyncIterator[List[ApiBasicInfo]]):
+        self._source = pages
+        self.pages: List[List[ApiBasicInfo]] = []
+        self.complete = False
+        self.error: Optional[BaseException] = None
+        self.created = time.monotonic()
+        # 正在获取下一页的任务，由所有等待该页的调用方共享
+        self._next: Optional[asyncio.Future] = None
+
+    async def _fetch(self):
+        try:
+            self.pages.append(await self._source.__anext__())
+        except StopAsyncIteration:
+            self.complete = True
+        except BaseException as e:
+            # 分页生成器出错后已结束，不能再继续获取
+            self.error = e
+            raise
+        finally:
+            self._next = None
+
+    async def __aiter__(self) -> AsyncIterator[List[ApiBasicInfo]]:
+        index = 0
+        while True:
+            if index < len(self.pages):
+                yield self.pages[index]
+                index += 1
+                continue
+            if self.complete:
+                return
+            if self.error is not None:
+                raise self.error
+            if self._next is None:
+                self._next = asyncio.ensure_future(self._fetch())
+                # 等待的调用方都已取消时也取走异常，避免未处理异常的警告
+                self._next.add_done_callback(lambda future: future.cancelled() or future.exception())
+            # 单个调用方被取消时不影响其他等待同一页的调用方
+            await asyncio.shield(self._next)
+
+    def apis(self) -> List[ApiBasicInfo]:
+        """返回已获取的全部API信息"""
+        return [api for page in self.pages for api in page]
+
+    def close(self):
+        """取消正在获取的页"""
+        if self._next is not None:
+            self._next.cancel()
 
 
 class HuaweiCloudApiClient:
     """Client for interacting with Huawei Cloud API Explorer"""
 
-    def __init__(self):
+    def __init__(self, catalog_ttl: float = CATALOG_CACHE_TTL, apis_ttl: float = APIS_CACHE_TTL,
+                 detail_ttl: float = DETAIL_CACHE_TTL, catalog_max_stale: float = CATALOG_MAX_STALE,
+                 apis_max_stale: float = APIS_MAX_STALE, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 options: Optional[ClientOptions] = None, negative_ttl: float = NEGATIVE_CACHE_TTL,
+                 aliases: Optional[Dict[str, str]] = None, accountant: Optional[MemoryAccountant] = None,
+                 snapshot: Optional[PackedSnapshot] = None):
         self.base_url = "https://console.huaweicloud.com/apiexplorer/new"
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.options = options or ClientOptions.from_env()
+        # transport可替换为本地模拟或回放实现，用于离线测试和基准测试；
+        # 未传入时按API_SCAN_CASSETTE录制或回放上游响应
+        if transport is None:
+            transport = cassette.transport_from_env(self.options)
+        self.client = self.options.build(transport)
+        # 配置打包快照（API_SCAN_SNAPSHOT）时所有数据从快照读取，不访问上游
+        self.snapshot = snapshot if snapshot is not None else PackedSnapshot.from_env()
+        # 所有缓存共享的内存预算，服务器传入同一个实例使渲染结果缓存也计入其中
+        self.accountant = accountant or MemoryAccountant.from_env()
+        # 产品目录、各产品API列表和已解析的API详情缓存
+        self.catalog_cache = TTLCache(catalog_ttl, max_entries=1, max_stale=catalog_max_stale,
+                                      accountant=self.accountant, name="catalog")
+        self.apis_cache = TTLCache(apis_ttl, max_stale=apis_max_stale, accountant=self.accountant, name="apis")
+        # 各API详情共享的子schema，详情缓存只计入各自独有的部分
+        self.blob_pool = BlobPool(accountant=self.accountant)
+        self.detail_cache = TTLCache(detail_ttl, accountant=self.accountant, name="detail",
+                                     sizer=self.blob_pool.unshared_size)
+        # 未找到的产品和接口，键为规范化后的查询，过期时间较短以便及时发现新上线的产品和接口
+        self.negative_cache = TTLCache(negative_ttl, max_entries=4096, accountant=self.accountant, name="negative")
+        # 逐页查找时提前找到的接口，API列表未完整缓存时避免每次查询都重新下载前几页
+        self.match_cache = TTLCache(apis_ttl, max_entries=4096, accountant=self.accountant, name="match")
+        # 产品名称索引，产品目录变化时重建
+        self.aliases = load_aliases() if aliases is None else aliases
+        self._product_index: Optional[ProductIndex] = None
+        # 正在进行的加载任务，相同请求并发时只访问一次上游
+        self._inflight = {}
+        # 各产品尚未完整获取的API列表分页流，逐页查找和完整加载共享同一个流
+        self._api_streams: Dict[str, ApiPageStream] = {}
 
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """取消后台刷新并关闭底层HTTP连接"""
+        for future in list(self._inflight.values()):
+            future.cancel()
+        for stream in self._api_streams.values():
+            stream.close()
+        self._api_streams.clear()
         await self.client.aclose()
+        if self.snapshot is not None:
+            self.snapshot.close()
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """返回共享内存预算的使用情况"""
+        return self.accountant.stats()
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回各缓存的命中统计"""
+        return {
+            "catalog": self.catalog_cache.stats(),
+            "apis": self.apis_cache.stats(),
+            "detail": self.detail_cache.stats(),
+            "blobs": self.blob_pool.stats(),
+            "negative": self.negative_cache.stats(),
+            "match": self.match_cache.stats()
+        }
 
-    async def get_products(self) -> ProductsResponse:
+    async def _cached(self, cache: TTLCache, key: Any, loader, refresh: bool = False) -> Any:
+        """读取缓存，未命中时调用loader加载并写入缓存，并发的相同加载只执行一次"""
+        if not refresh:
+            value, state = cache.lookup(key)
+            if state == FRESH:
+                return value
+            if state == STALE:
+                # 过期但未超过max_stale时直接返回旧值，同时在后台发起一次刷新
+                self._start_load(cache, key, loader, background=True)
+                return value
+
+        # 单个调用方被取消时不影响其他等待同一加载的调用方
+        return await asyncio.shield(self._start_load(cache, key, loader))
+
+    @staticmethod
+    def _log_refresh_error(future: asyncio.Future):
+        """记录后台刷新失败，旧值继续有效直到超过max_stale"""
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"后台刷新缓存失败: {future.exception()}")
+
+    def _start_load(self, cache: TTLCache, key: Any, loader, background: bool = False) -> asyncio.Future:
+        """启动或复用同一缓存项正在进行的加载任务"""
+        inflight_key = (id(cache), key)
+
+        async def load():
+            try:
+                value = await loader()
+                cache.set(key, value)
+                return value
+            finally:
+                self._inflight.pop(inflight_key, None)
+
+        future = self._inflight.get(inflight_key)
+        if future is None:
+            future = asyncio.ensure_future(load())
+            self._inflight[inflight_key] = future
+            if background:
+                future.add_done_callback(self._log_refresh_error)
+        return future
+
+    async def _get_json(self, endpoint: str, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """访问上游接口并解析JSON，按接口记录请求数和耗时"""
+        if self.snapshot is not None:
+            metrics.inc("snapshot_reads_total", endpoint=endpoint)
+            return self.snapshot.respond(endpoint, params)
+
+        status = "error"
+        with metrics.track("upstream_request_duration_seconds", in_flight="upstream_requests_in_flight",
+                           endpoint=endpoint):
+            try:
+                response = await self.client.get(f"{self.base_url}{path}", params=params)
+                status = str(response.status_code)
+                response.raise_for_status()
+                return response.json()
+            finally:
+                metrics.inc("upstream_requests_total", endpoint=endpoint, status=status)
+
+    @traced("huaweicloud.get_products")
+    async def get_products(self, refresh: bool = False) -> ProductsResponse:
         """获取所有产品信息"""
-        url = f"{self.base_url}/v5/products"
-        response = await self.client.get(url)
-        response.raise_for_status()
-        return ProductsResponse.model_validate(response.json())
+        if refresh:
+            # 只忘记未找到的产品，各产品的接口查询结果由API列表刷新时处理
+            self.negative_cache.remove_if(lambda key: key[0] == "product")
+        return await self._cached(self.catalog_cache, "products", self._fetch_products, refresh)
+
+    async def _fetch_products(self) -> ProductsResponse:
+        """从上游获取产品目录"""
+        return ProductsResponse.model_validate(await self._get_json("products", "/v5/products"))
+
+    def product_index(self, products_response: ProductsResponse) -> ProductIndex:
+        """返回产品目录对应的名称索引，目录对象变化时重建"""
+        index = self._product_index
+        if index is None or index.catalog is not products_response:
+            index = self._product_index = ProductIndex(products_response, self.aliases)
+        return index
 
+    @traced("huaweicloud.find_product_short")
     async def find_product_short(self, target_product_name: str) -> Optional[str]:
-        """根据产品名称查找产品简称"""
-        products_response = await self.get_products()
+        """根据产品名称、简称、描述中的英文名称或别名查找产品简称"""
+        negative_key = ("product", normalize_name(target_product_name))
+        if self.negative_cache.get(negative_key):
+            return None
 
-        for group in products_response.groups:
-            for product in group.products:
-                if product.name == target_product_name:
-                    return product.productshort
+        product = self.product_index(await self.get_products()).resolve(target_product_name)
+        if product is not None:
+            return product.productshort
 
+        self.negative_cache.set(negative_key, True)
         return None
 
-    async def get_apis_page(self, product_short: str, offset: int = 0, limit: int = 100) -> ApisResponse:
+    async def get_apis_page(self, product_short: str, offset: int = 0, limit: int = APIS_PAGE_LIMIT) -> ApisResponse:
         """获取指定产品的API列表（分页）"""
-        url = f"{self.base_url}/v3/apis"
         params = {
             "offset": offset,
             "limit": limit,
             "product_short": product_short
         }
 
-        response = await self.client.get(url, params=params)
-        response.raise_for_status()
-        return ApisResponse.model_validate(response.json())
+        return ApisResponse.model_validate(await self._get_json("apis", "/v3/apis", params))
 
-    async def get_all_apis(self, product_short: str) -> List[ApiBasicInfo]:
+    @traced("huaweicloud.get_all_apis")
+    async def get_all_apis(self, product_short: str, refresh: bool = False) -> List[ApiBasicInfo]:
         """获取指定产品的所有API信息"""
-        all_apis = []
-        offset = 0
-        limit = 100
+        if refresh:
+            # 只忘记该产品的查询结果，预热器周期刷新热门产品时不影响其他产品
+            self.negative_cache.remove_if(lambda key: key[:2] == ("api", product_short))
+            self.match_cache.remove_if(lambda key: key[0] == product_short)
+            # 之后的遍历重新获取，正在遍历旧流的调用方不受影响
+            self._api_streams.pop(product_short, None)
+        return await self._cached(self.apis_cache, product_short,
+                                  lambda: self._fetch_all_apis(product_short), refresh)
 
-        while True:
-            apis_response = await self.get_apis_page(product_short, offset, limit)
-            all_apis.extend(apis_response.api_basic_infos)
+    async def _fetch_all_apis(self, product_short: str) -> List[ApiBasicInfo]:
+        """从上游获取指定产品的所有API信息，与逐页查找共享已获取的页"""
+        stream = self._api_stream(product_short)
+        async for _ in stream:
+            pass
+        self._finish_stream(product_short, stream)
+        return stream.apis()
 
-            # 如果当前页的数量小于总数，继续获取下一页
-            if offset + limit < apis_response.count:
-                offset += limit
-            else:
-                break
+    def _api_stream(self, product_short: str) -> ApiPageStream:
+        """返回产品共享的分页流，已出错或超过API列表缓存时间的流重新创建"""
+        stream = self._api_streams.get(product_short)
+        if (stream is None or stream.error is not None
+                or time.monotonic() - stream.created > self.apis_cache.ttl):
+            stream = self._api_streams[product_short] = ApiPageStream(self._iter_api_pages(product_short))
+        return stream
 
-        return all_apis
+    def _finish_stream(self, product_short: str, stream: ApiPageStream) -> bool:
+        """完整获取后移除分页流，返回是否由本次调用移除"""
+        if self._api_streams.get(product_short) is stream:
+            del self._api_streams[product_short]
+            return True
+        return False
 
-    async def find_api_by_summary(self, product_short: str, interface_name: str) -> Optional[ApiBasicInfo]:
-        """根据接口名称查找API信息"""
-        all_apis = await self.get_all_apis(product_short)
+    async def _iter_api_pages(self, product_short: str) -> AsyncIterator[List[ApiBasicInfo]]:
+        """从上游按顺序逐页产出API信息，首页返回总数后保持page_concurrency个分页请求并发"""
+        limit = APIS_PAGE_LIMIT
+        first_page = await self.get_apis_page(product_short, 0, limit)
+        # 按首页返回的总数上报已获取的页数
+        total_pages = max(1, -(-first_page.count // limit))
+        fetched = 1
+        await progress.report(progress.PAGES, fetched, total_pages, f"{product_short}: 已获取{fetched}/{total_pages}页API列表")
+        yield first_page.api_basic_infos
 
-        for api in all_apis:
+        offsets = iter(range(limit, first_page.count, limit))
+        window = max(1, self.options.page_concurrency)
+        pending = deque()
+        try:
+            while True:
+                for offset in offsets:
+                    pending.append(asyncio.ensure_future(self.get_apis_page(product_short, offset, limit)))
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    break
+                apis_response = await pending.popleft()
+                fetched += 1
+                await progress.report(progress.PAGES, fetched, total_pages,
+                                      f"{product_short}: 已获取{fetched}/{total_pages}页API列表")
+                yield apis_response.api_basic_infos
+        finally:
+            # 调用方提前结束遍历时取消尚未完成的分页请求
+            for future in pending:
+                future.cancel()
+
+    async def iter_apis(self, product_short: str) -> AsyncIterator[List[ApiBasicInfo]]:
+        """逐页产出指定产品的API信息，调用方可在找到所需API后提前结束"""
+        # 已缓存或已有完整加载在进行时，一次产出完整列表
+        if (self.apis_cache.state(product_short) != MISSING
+                or (id(self.apis_cache), product_short) in self._inflight):
+            yield await self.get_all_apis(product_short)
+            return
+
+        # 并发的遍历共享同一分页流，提前结束时已获取的页留给之后的遍历
+        stream = self._api_stream(product_short)
+        async for apis in stream:
+            yield apis
+        # 完整遍历后写入缓存
+        if self._finish_stream(product_short, stream):
+            self.apis_cache.set(product_short, stream.apis())
+
+    @staticmethod
+    def match_api_by_summary(apis: List[ApiBasicInfo], interface_name: str) -> Optional[ApiBasicInfo]:
+        """在API列表中查找第一个摘要包含接口名称的API"""
+        for api in apis:
             if interface_name in api.summary:
                 return api
 
         return None
 
+    @traced("huaweicloud.find_api_by_summary")
+    async def find_api_by_summary(self, product_short: str, interface_name: str) -> Optional[ApiBasicInfo]:
+        """根据接口名称查找API信息，找到后不再获取后续分页"""
+        query = normalize_query(interface_name)
+        negative_key = ("api", product_short, query)
+        if self.negative_cache.get(negative_key):
+            return None
+
+        match_key = (product_short, query)
+        if self.apis_cache.state(product_short) == MISSING:
+            api_info = self.match_cache.get(match_key)
+            if api_info is not None:
+                return api_info
+
+        pages = self.iter_apis(product_short)
+        try:
+            async for apis in pages:
+                api_info = self.match_api_by_summary(apis, query)
+                if api_info:
+                    self.match_cache.set(match_key, api_info)
+                    return api_info
+        finally:
+            await pages.aclose()
+
+        self.negative_cache.set(negative_key, True)
+        return None
+
+    @traced("huaweicloud.get_api_detail")
     async def get_api_detail(self, product_short: str, api_name: str) -> Dict[str, Any]:
         """获取API详细信息"""
-        url = f"{self.base_url}/v4/apis/detail"
+        return await self._cached(self.detail_cache, (product_short, api_name),
+                                  lambda: self._fetch_api_detail(product_short, api_name))
+
+    async def _fetch_api_detail(self, product_short: str, api_name: str) -> Dict[str, Any]:
+        """从上游获取API详细信息"""
         params = {
             "product_short": product_short,
             "name": api_name
         }
 
-        response = await self.client.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        detail = await self._get_json("detail", "/v4/apis/detail", params)
+        if self.snapshot is None and isinstance(detail, dict):
+            # 快照返回的详情已共享子schema，上游的详情放入子schema池去重
+            detail = self.blob_pool.intern_detail(detail)
+        return detail
 
-    async def get_api_info_by_user_input(self, target_product_name: str, interface_name: str) -> Dict[str, Any]:
-        """根据用户输入获取完整的API信息"""
+    async def get_api_detail_fields(self, product_short: str, api_name: str,
+                                    fields: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """获取API详细信息中指定字段的子树，返回投影结果和未找到的字段"""
+        api_detail = await self.get_api_detail(product_short, api_name)
+        return project_fields(api_detail, fields)
+
+    async def resolve_api(self, target_product_name: str, interface_name: str) -> Tuple[str, ApiBasicInfo]:
+        """根据用户输入解析产品简称和匹配的API，未找到时抛出ValueError"""
         # 步骤1：获取产品简称
         product_short = await self.find_product_short(target_product_name)
         if not product_short:
@@ -102,12 +545,76 @@ class HuaweiCloudApiClient:
         if not api_info:
             raise ValueError(f"未找到接口: {interface_name}")
 
+        return product_short, api_info
+
+    def apis_version(self, product_short: str) -> Optional[float]:
+        """返回产品API列表缓存的版本（写入时间），列表刷新后版本随之变化"""
+        return self.apis_cache.written_at(product_short)
+
+    @traced("huaweicloud.get_api_info_by_user_input")
+    async def get_api_info_by_user_input(self, target_product_name: str, interface_name: str,
+                                         fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """根据用户输入获取完整的API信息，指定fields时只返回对应字段的子树"""
+        product_short, api_info = await self.resolve_api(target_product_name, interface_name)
+
         # 步骤3：获取API详细信息
-        api_detail = await self.get_api_detail(product_short, api_info.name)
+        return await self.build_api_info(target_product_name, product_short, api_info, fields)
 
-        return {
+    @traced("huaweicloud.get_api_infos_by_user_input")
+    async def get_api_infos_by_user_input(self, target_product_name: str, interface_names: List[str],
+                                          fields: Optional[List[str]] = None,
+                                          concurrency: int = BATCH_CONCURRENCY,
+                                          semaphore: Optional[asyncio.Semaphore] = None) -> List[Dict[str, Any]]:
+        """批量获取同一产品下多个接口的API信息，产品和API列表只解析一次"""
+        # 返回列表与interface_names一一对应，每项包含interface_name以及result或error
+        # 传入semaphore时与其他批量调用共享并发限制，此时忽略concurrency
+        product_short = await self.find_product_short(target_product_name)
+        if not product_short:
+            raise ValueError(f"未找到产品: {target_product_name}")
+
+        all_apis = await self.get_all_apis(product_short)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+        # 重复的接口名称只获取一次
+        unique_names = list(dict.fromkeys(interface_names))
+        completed = 0
+
+        async def fetch_one(interface_name: str) -> Dict[str, Any]:
+            nonlocal completed
+            item = {"interface_name": interface_name}
+            api_info = self.match_api_by_summary(all_apis, normalize_query(interface_name))
+            if not api_info:
+                item["error"] = f"未找到接口: {interface_name}"
+            else:
+                try:
+                    async with semaphore:
+                        item["result"] = await self.build_api_info(target_product_name, product_short, api_info,
+                                                                   fields)
+                except Exception as e:
+                    item["error"] = str(e)
+            completed += 1
+            await progress.report(progress.DETAILS, completed, len(unique_names),
+                                  f"已获取{completed}/{len(unique_names)}个API详情")
+            return item
+
+        items = await asyncio.gather(*(fetch_one(name) for name in unique_names))
+        items_by_name = dict(zip(unique_names, items))
+        return [items_by_name[name] for name in interface_names]
+
+    async def build_api_info(self, target_product_name: str, product_short: str, api_info: ApiBasicInfo,
+                             fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """获取API详情并组装完整的API信息"""
+        if fields:
+            api_detail, missing_fields = await self.get_api_detail_fields(product_short, api_info.name, fields)
+        else:
+            api_detail, missing_fields = await self.get_api_detail(product_short, api_info.name), []
+
+        result = {
             "product_name": target_product_name,
             "product_short": product_short,
             "api_basic_info": api_info.model_dump(),
             "api_detail": api_detail
         }
+        if missing_fields:
+            result["missing_fields"] = missing_fields
+        return result
@@ -1,18 +1,31 @@
 """Cursor优化的MCP服务器实现 - 针对Cursor MCP集成优化"""
 
 import asyncio
+import contextvars
 import json
 import sys
 import logging
 import signal
 import os
-from typing import Dict, Any, List, Optional, AsyncIterator
-from .client import HuaweiCloudApiClient
-from .yaml_exporter import YamlExporter
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple, TYPE_CHECKING
+from .cache import TTLCache, MemoryAccountant
+from .prefetch import Prefetcher, PrefetchConfig
+from .metrics import metrics
+from . import progress
+from .rendering import (
+    DEFAULT_MAX_BYTES, MIN_MAX_BYTES, MAX_MAX_BYTES, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE,
+    SECTION_NAMES, encode_cursor, decode_cursor, request_fingerprint, clamp_int, paginate_lines,
+    summarize_detail, detail_section, section_lines, next_page_hint, text_result
+)
+
+# httpx、PyYAML等较重的模块在首次使用时才导入，缩短Cursor启动服务器进程的冷启动时间
+if TYPE_CHECKING:
+    from .client import HuaweiCloudApiClient
+    from .yaml_exporter import YamlExporter
 
-# 配置最小日志，只记录严重错误到stderr
+# 配置最小日志，默认只记录严重错误到stderr，可通过API_SCAN_LOG_LEVEL调整
 logging.basicConfig(
-    level=logging.ERROR,  # 改为ERROR级别以减少干扰
+    level=getattr(logging, os.environ.get("API_SCAN_LOG_LEVEL", "ERROR").upper(), logging.ERROR),
     format='%(asctime)s - %(levelname)s - %(message)s',
     stream=sys.stderr,
     force=True  # 强制重新配置logging，Python 3.10支持
@@ -24,12 +37,69 @@ for handler in logging.root.handlers[:]:
     if handler.stream == sys.stdout:
         logging.root.removeHandler(handler)
 
+# 守护进程模式下各会话的工作目录，相对的导出目录按该目录解析
+WORKING_DIR = contextvars.ContextVar("working_dir", default=None)
+
+# 表示当前项目目录的output_dir写法
+CURRENT_DIR_ALIASES = frozenset({".", "当前目录", "项目根目录", "根目录", "当前项目", "项目下", "项目目录"})
+
+
+def _normalize_output_dir(output_dir: Any) -> str:
+    """规范化导出目录，当前目录的各种说法统一为"." """
+    if not output_dir:
+        return "api_exports"
+    if output_dir in CURRENT_DIR_ALIASES:
+        return "."
+    return output_dir
+
+
+# 渲染结果缓存的过期时间（秒）和默认内存预算（MB），预算可通过API_SCAN_RENDER_CACHE_MB调整，0表示关闭
+RENDER_CACHE_TTL = 3600
+RENDER_CACHE_MB = 16
+
+
+# 调用方请求进度时各工具上报的阶段：逐页获取API列表，或逐个获取API详情
+PROGRESS_PHASES = {
+    "list_product_apis": progress.PAGES,
+    "get_huawei_cloud_api_info": progress.PAGES,
+    "batch_get_huawei_cloud_api_info": progress.DETAILS,
+}
+
+
+# 按方法统计指标时使用的方法名，其他方法统一记为unknown
+KNOWN_METHODS = {
+    "initialize", "initialized", "tools/list", "tools/call", "listOfferings", "serverInfo",
+    "resources/list", "prompts/list", "ping", "metrics"
+}
+
 
 class CursorOptimizedMCPServer:
     """针对Cursor优化的MCP服务器"""
 
     def __init__(self):
         self.running = True
+        # 跨工具调用共享的API客户端，复用连接和缓存
+        self.client = None
+        # 初始化完成后在后台预热缓存
+        self.prefetcher = Prefetcher(self._get_client, PrefetchConfig.from_env())
+        # 设置API_SCAN_PROFILE_DIR时逐请求剖析，只保存慢请求
+        self.profiler = None
+        if os.environ.get("API_SCAN_PROFILE_DIR"):
+            from .profiling import RequestProfiler
+            self.profiler = RequestProfiler.from_env()
+        # 客户端各缓存与渲染结果缓存共享的内存预算，长时间运行时内存保持在预算内
+        self.memory = MemoryAccountant.from_env()
+        # 查询工具渲染好的文本，键为规范化的参数加上数据版本，重复查询不再重新渲染
+        self.render_cache = TTLCache(
+            RENDER_CACHE_TTL,
+            max_entries=4096,
+            max_bytes=int(float(os.environ.get("API_SCAN_RENDER_CACHE_MB", RENDER_CACHE_MB)) * 1024 * 1024),
+            accountant=self.memory,
+            name="rendered"
+        )
+        # 静态结果（initialize、tools/list等）只构建和序列化一次
+        self._static_results = {}
+        self._serialized_results = {}
         # 修正工具名称：使用下划线而不是短横线（Cursor要求）
         self.tools = {
             "get_huawei_cloud_api_info": {
@@ -52,11 +122,68 @@ class CursorOptimizedMCPServer:
                         "output_dir": {
                             "type": "string",
                             "description": "YAML文件输出目录。用户指定'项目根目录'、'当前目录'时使用'.'，其他情况默认为'api_exports'"
+                        },
+                        "section": {
+                            "type": "string",
+                            "enum": SECTION_NAMES,
+                            "description": "返回的内容分段。默认'summary'只返回紧凑摘要；需要请求参数时使用'request'，响应格式使用'response'，数据结构定义使用'definitions'，完整详情使用'full'"
+                        },
+                        "fields": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "只返回API详情中指定字段的子树，支持JSON Pointer（如'/responses/200'）或点号路径（如'definitions.CreateServersRequestBody'）。指定后默认返回投影后的完整内容"
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "分页游标。上一次结果提示内容未完时，原样传入其中的cursor获取下一页"
+                        },
+                        "max_bytes": {
+                            "type": "integer",
+                            "description": f"单次返回文本的最大字节数，默认{DEFAULT_MAX_BYTES}"
                         }
                     },
                     "required": ["product_name", "interface_name"]
                 }
             },
+            "batch_get_huawei_cloud_api_info": {
+                "description": "批量获取华为云同一产品下多个API接口的详细信息。当用户一次询问同一产品的多个接口时调用，比多次调用get_huawei_cloud_api_info更快。每个接口单独返回结果或错误。当用户提到'导出'、'YAML'、'文件'、'保存'、'下载'、'生成文件'时，自动设置export_yaml=true导出YAML文件。",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "product_name": {
+                            "type": "string",
+                            "description": "华为云产品名称，如'ECS'、'云应用'、'对象存储服务'、'弹性云服务器'等"
+                        },
+                        "interface_names": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "API接口名称列表，如['创建云服务器', '删除云服务器']"
+                        },
+                        "fields": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "只返回每个API详情中指定字段的子树，支持JSON Pointer（如'/responses/200'）或点号路径。未指定时每个接口只返回紧凑摘要"
+                        },
+                        "export_yaml": {
+                            "type": "boolean",
+                            "description": "是否导出为YAML文件。当用户明确提到'导出'、'YAML'、'文件'、'保存'、'下载'、'生成文件'、'导出为文件'、'输出文件'时设置为true，否则默认false"
+                        },
+                        "output_dir": {
+                            "type": "string",
+                            "description": "YAML文件输出目录。用户指定'项目根目录'、'当前目录'时使用'.'，其他情况默认为'api_exports'"
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "分页游标。上一次结果提示内容未完时，原样传入其中的cursor获取下一页"
+                        },
+                        "max_bytes": {
+                            "type": "integer",
+                            "description": f"单次返回文本的最大字节数，默认{DEFAULT_MAX_BYTES}"
+                        }
+                    },
+                    "required": ["product_name", "interface_names"]
+                }
+            },
             "list_huawei_cloud_products": {
                 "description": "列出华为云所有可用的产品和服务。当用户询问华为云有哪些产品、服务列表、产品目录、或想了解华为云提供的服务时自动调用。包含计算、存储、网络、数据库、AI等各类服务。当用户提到'导出'、'YAML'、'文件'、'保存'、'下载'、'生成文件'时，自动设置export_yaml=true导出YAML文件。",
                 "inputSchema": {
@@ -90,12 +217,28 @@ class CursorOptimizedMCPServer:
                         "output_dir": {
                             "type": "string",
                             "description": "YAML文件输出目录。用户指定'项目根目录'、'当前目录'时使用'.'，其他情况默认为'api_exports'"
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "分页游标。上一次结果提示内容未完时，原样传入其中的cursor获取下一页"
+                        },
+                        "page_size": {
+                            "type": "integer",
+                            "description": f"每页返回的API数量，默认{DEFAULT_PAGE_SIZE}"
+                        },
+                        "max_bytes": {
+                            "type": "integer",
+                            "description": f"单次返回文本的最大字节数，默认{DEFAULT_MAX_BYTES}"
                         }
                     },
                     "required": ["product_name"]
                 }
             }
         }
+        # 支持YAML导出的工具，调用方只指定output_dir时自动启用导出
+        self._export_tools = frozenset(
+            name for name, tool in self.tools.items() if "export_yaml" in tool["inputSchema"]["properties"]
+        )
         
         # 设置信号处理
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -105,6 +248,46 @@ class CursorOptimizedMCPServer:
         """处理信号"""
         self.running = False
 
+    def _get_client(self) -> "HuaweiCloudApiClient":
+        """获取共享的API客户端，首次使用时创建"""
+        if self.client is None:
+            from .client import HuaweiCloudApiClient
+            self.client = HuaweiCloudApiClient(accountant=self.memory)
+        return self.client
+
+    @staticmethod
+    def _yaml_exporter(output_dir: str) -> "YamlExporter":
+        """创建YAML导出器，首次导出时才导入PyYAML"""
+        from .yaml_exporter import YamlExporter
+        working_dir = WORKING_DIR.get()
+        if working_dir and not os.path.isabs(output_dir):
+            output_dir = os.path.join(working_dir, output_dir)
+        return YamlExporter(output_dir)
+
+    def _static_result(self, name: str, builder) -> Dict[str, Any]:
+        """返回只构建一次的静态结果，并预先序列化供encode_response复用"""
+        result = self._static_results.get(name)
+        if result is None:
+            result = builder()
+            self._static_results[name] = result
+            self._serialized_results[id(result)] = json.dumps(result, ensure_ascii=False)
+        return result
+
+    def encode_response(self, response: Dict[str, Any]) -> str:
+        """序列化JSON-RPC响应，静态结果直接拼接预先序列化的文本"""
+        serialized = self._serialized_results.get(id(response.get("result")))
+        if serialized is not None and "error" not in response:
+            request_id = json.dumps(response.get("id"), ensure_ascii=False)
+            return f'{{"jsonrpc": "2.0", "id": {request_id}, "result": {serialized}}}'
+        return json.dumps(response, ensure_ascii=False)
+
+    async def close(self):
+        """停止后台预热并释放共享的API客户端"""
+        await self.prefetcher.stop()
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
     def create_response(self, request_id: Any, result: Any = None, error: Any = None) -> Dict[str, Any]:
         """创建标准JSON-RPC 2.0响应"""
         response = {
@@ -119,11 +302,24 @@ class CursorOptimizedMCPServer:
             
         return response
 
+    def _tool_descriptors(self) -> List[Dict[str, Any]]:
+        """构建工具描述列表"""
+        return [
+            {
+                "name": name,
+                "description": tool["description"],
+                "inputSchema": tool["inputSchema"]
+            }
+            for name, tool in self.tools.items()
+        ]
+
     async def handle_initialize(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """处理初始化请求"""
+        # 预热在后台进行，不延迟握手响应
+        self.prefetcher.start()
         return self.create_response(
             request.get("id"),
-            {
+            self._static_result("initialize", lambda: {
                 "protocolVersion": "2024-11-05",
                 "capabilities": {
                     "tools": {},
@@ -134,32 +330,25 @@ class CursorOptimizedMCPServer:
                     "name": "api_scan",  # 使用下划线，避免短横线
                     "version": "1.0.0"
                 }
-            }
+            })
         )
 
     async def handle_list_offerings(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """处理ListOfferings请求 - Cursor期望的标准方法"""
         return self.create_response(
             request.get("id"),
-            {
-                "tools": [
-                    {
-                        "name": name,
-                        "description": tool["description"],
-                        "inputSchema": tool["inputSchema"]
-                    }
-                    for name, tool in self.tools.items()
-                ],
+            self._static_result("listOfferings", lambda: {
+                "tools": self._tool_descriptors(),
                 "resources": [],
                 "prompts": []
-            }
+            })
         )
 
     async def handle_server_info(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """处理服务器信息请求"""
         return self.create_response(
             request.get("id"),
-            {
+            self._static_result("serverInfo", lambda: {
                 "name": "api_scan",
                 "version": "1.0.0",
                 "description": "华为云API分析MCP服务器",
@@ -168,21 +357,15 @@ class CursorOptimizedMCPServer:
                     "resources": {},
                     "prompts": {}
                 }
-            }
+            })
         )
 
     async def handle_tools_list(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """处理工具列表请求"""
-        tools = [
-            {
-                "name": name,
-                "description": tool["description"],
-                "inputSchema": tool["inputSchema"]
-            }
-            for name, tool in self.tools.items()
-        ]
-        
-        return self.create_response(request.get("id"), {"tools": tools})
+        return self.create_response(
+            request.get("id"),
+            self._static_result("tools/list", lambda: {"tools": self._tool_descriptors()})
+        )
 
     async def handle_tools_call(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """处理工具调用请求"""
@@ -190,35 +373,36 @@ class CursorOptimizedMCPServer:
             params = request.get("params", {})
             tool_name = params.get("name")
             arguments = params.get("arguments", {})
+            self.prefetcher.record_query(arguments.get("product_name"))
             
-            # 检查用户输入中是否包含导出相关关键词
-            export_keywords = ["导出", "YAML", "yaml", "文件", "保存", "下载", "生成文件"]
-            
-            # 获取工具描述
-            tool_desc = self.tools.get(tool_name, {}).get("description", "")
-            
-            # 检查用户请求中的内容
-            user_request = str(request)
-            
-            # 如果工具描述中提到支持YAML导出，并且用户输入包含导出关键词
-            if any(keyword in tool_desc for keyword in ["YAML", "导出"]) and any(keyword in user_request for keyword in export_keywords):
-                # 设置导出参数
+            # 调用方指定了导出目录但未显式指定export_yaml时，视为要求导出
+            if (tool_name in self._export_tools and "export_yaml" not in arguments
+                    and arguments.get("output_dir")):
                 arguments["export_yaml"] = True
-                arguments["output_dir"] = "."
                 print(f"已启用YAML导出功能，输出目录: {arguments['output_dir']}", file=sys.stderr)
 
-            if tool_name == "get_huawei_cloud_api_info":
-                result = await self._get_api_info(arguments)
-            elif tool_name == "list_huawei_cloud_products":
-                result = await self._list_products(arguments)
-            elif tool_name == "list_product_apis":
-                result = await self._list_product_apis(arguments)
-            else:
+            if tool_name not in self.tools:
                 return self.create_response(
                     request.get("id"),
                     error={"code": -32601, "message": f"Unknown tool: {tool_name}"}
                 )
 
+            status = "error"
+            with metrics.track("mcp_tool_duration_seconds", tool=tool_name), \
+                    progress.tracking(params, PROGRESS_PHASES.get(tool_name)):
+                try:
+                    if tool_name == "get_huawei_cloud_api_info":
+                        result = await self._get_api_info(arguments)
+                    elif tool_name == "batch_get_huawei_cloud_api_info":
+                        result = await self._batch_get_api_info(arguments)
+                    elif tool_name == "list_huawei_cloud_products":
+                        result = await self._list_products(arguments)
+                    else:
+                        result = await self._list_product_apis(arguments)
+                    status = "ok"
+                finally:
+                    metrics.inc("mcp_tool_calls_total", tool=tool_name, status=status)
+
             return self.create_response(request.get("id"), result)
 
         except Exception as e:
@@ -248,10 +432,66 @@ class CursorOptimizedMCPServer:
             {"status": "ok"}
         )
 
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回共享客户端各缓存及渲染结果缓存的统计"""
+        stats = self.client.cache_stats() if self.client is not None else {}
+        stats["rendered"] = self.render_cache.stats()
+        return stats
+
+    def _collect_cache_metrics(self):
+        """将缓存统计同步到指标注册表"""
+        for cache_name, stats in self.cache_stats().items():
+            metrics.set_gauge("cache_entries", stats["entries"], cache=cache_name)
+            metrics.set_gauge("cache_bytes", stats["bytes"], cache=cache_name)
+            metrics.set_counter("cache_evictions_total", stats["evictions"], cache=cache_name)
+            metrics.set_counter("cache_requests_total", stats["hits"], cache=cache_name, result="hit")
+            metrics.set_counter("cache_requests_total", stats["stale_hits"], cache=cache_name, result="stale")
+            metrics.set_counter("cache_requests_total", stats["misses"], cache=cache_name, result="miss")
+        memory = self.memory.stats()
+        metrics.set_gauge("cache_memory_bytes", memory["bytes"])
+        if memory["max_bytes"] is not None:
+            metrics.set_gauge("cache_memory_limit_bytes", memory["max_bytes"])
+
+    async def handle_metrics(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """处理metrics请求，返回JSON快照或Prometheus文本"""
+        self._collect_cache_metrics()
+        params = request.get("params") or {}
+        if params.get("format") == "prometheus":
+            result = {"format": "prometheus", "text": metrics.to_prometheus()}
+        else:
+            result = metrics.snapshot()
+            result["caches"] = self.cache_stats()
+            result["memory"] = self.memory.stats()
+        return self.create_response(request.get("id"), result)
+
+    def dump_metrics(self):
+        """按API_SCAN_METRICS_FILE和API_SCAN_PROMETHEUS_FILE配置将指标写入文件"""
+        json_path = os.environ.get("API_SCAN_METRICS_FILE")
+        prometheus_path = os.environ.get("API_SCAN_PROMETHEUS_FILE")
+        if not json_path and not prometheus_path:
+            return
+        try:
+            self._collect_cache_metrics()
+            metrics.dump(json_path, prometheus_path)
+        except Exception as e:
+            print(f"写入指标文件失败: {e}", file=sys.stderr)
+
     async def handle_request(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """处理MCP请求"""
         method = request.get("method")
+        method_label = method if method in KNOWN_METHODS else "unknown"
         
+        with metrics.track("mcp_request_duration_seconds", in_flight="mcp_requests_in_flight",
+                           method=method_label):
+            if self.profiler is not None:
+                label = method_label
+                if method == "tools/call":
+                    label = f"tools_call-{(request.get('params') or {}).get('name')}"
+                return await self.profiler.run(label, self._dispatch, method, request)
+            return await self._dispatch(method, request)
+
+    async def _dispatch(self, method: Any, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """按方法分发MCP请求"""
         try:
             if method == "initialize":
                 return await self.handle_initialize(request)
@@ -272,6 +512,8 @@ class CursorOptimizedMCPServer:
                 return await self.handle_prompts_list(request)
             elif method == "ping":
                 return await self.handle_ping(request)
+            elif method == "metrics":
+                return await self.handle_metrics(request)
             else:
                 return self.create_response(
                     request.get("id"),
@@ -287,148 +529,193 @@ class CursorOptimizedMCPServer:
         """列出所有产品"""
         try:
             export_yaml = arguments.get("export_yaml", False)
-            output_dir = arguments.get("output_dir", "api_exports")
+            output_dir = _normalize_output_dir(arguments.get("output_dir"))
             
-            # 智能处理输出目录
-            if output_dir in [".", "当前目录", "项目根目录", "根目录", "当前项目", "项目下", "项目目录"]:
-                output_dir = "."
+            client = self._get_client()
+            products_response = await client.get_products()
             
-            client = HuaweiCloudApiClient()
-            async with client:
-                products_response = await client.get_products()
-                
-                # 整理产品列表
-                all_products = []
-                for group in products_response.groups:
-                    for product in group.products:
-                        all_products.append(product.name)
-                
-                # 构建响应文本
-                if all_products:
-                    product_list = "\n".join([f"- {product}" for product in all_products])
-                    response_text = f"华为云产品列表（共{len(all_products)}个）：\n\n{product_list}"
-                else:
-                    response_text = "无法获取产品列表"
-                
-                # 如果需要导出YAML
-                yaml_info = ""
-                if export_yaml:
-                    try:
-                        exporter = YamlExporter(output_dir)
-                        
-                        # 构建产品数据
-                        products_data = {
-                            "groups": []
+            # 整理产品列表
+            all_products = []
+            for group in products_response.groups:
+                for product in group.products:
+                    all_products.append(product.name)
+            
+            # 构建响应文本
+            if all_products:
+                product_list = "\n".join([f"- {product}" for product in all_products])
+                response_text = f"华为云产品列表（共{len(all_products)}个）：\n\n{product_list}"
+            else:
+                response_text = "无法获取产品列表"
+            
+            # 如果需要导出YAML
+            yaml_info = ""
+            if export_yaml:
+                try:
+                    exporter = self._yaml_exporter(output_dir)
+                    
+                    # 构建产品数据
+                    products_data = {
+                        "groups": []
+                    }
+                    
+                    for group in products_response.groups:
+                        group_data = {
+                            "name": group.name,
+                            "products": []
                         }
+                        for product in group.products:
+                            group_data["products"].append({
+                                "name": product.name,
+                                "productshort": product.productshort,
+                                "description": product.description
+                            })
+                        products_data["groups"].append(group_data)
+                    
+                    yaml_path = exporter.export_products_to_yaml(products_data)
+                    
+                    # 获取绝对路径用于更清晰的显示
+                    abs_yaml_path = os.path.abspath(yaml_path)
+                    
+                    yaml_info = f"\n\n📄 产品列表YAML文件已成功导出到: {yaml_path}"
+                    yaml_info += f"\n📍 完整路径: {abs_yaml_path}"
+                    
+                    # 如果是输出到当前目录，特别说明
+                    if output_dir == ".":
+                        yaml_info += f"\n✅ 已按要求导出到项目根目录"
                         
-                        for group in products_response.groups:
-                            group_data = {
-                                "name": group.name,
-                                "products": []
-                            }
-                            for product in group.products:
-                                group_data["products"].append({
-                                    "name": product.name,
-                                    "productshort": product.productshort,
-                                    "description": product.description
-                                })
-                            products_data["groups"].append(group_data)
-                        
-                        yaml_path = exporter.export_products_to_yaml(products_data)
-                        
-                        # 获取绝对路径用于更清晰的显示
-                        abs_yaml_path = os.path.abspath(yaml_path)
-                        
-                        yaml_info = f"\n\n📄 产品列表YAML文件已成功导出到: {yaml_path}"
-                        yaml_info += f"\n📍 完整路径: {abs_yaml_path}"
-                        
-                        # 如果是输出到当前目录，特别说明
-                        if output_dir == ".":
-                            yaml_info += f"\n✅ 已按要求导出到项目根目录"
-                            
-                    except Exception as e:
-                        yaml_info = f"\n\n⚠️ YAML导出失败: {str(e)}"
-                
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": response_text + yaml_info
-                        }
-                    ]
-                }
-                
+                except Exception as e:
+                    yaml_info = f"\n\n⚠️ YAML导出失败: {str(e)}"
+            
+            return {
+                "content": [
+                    {
+                        "type": "text",
+                        "text": response_text + yaml_info
+                    }
+                ]
+            }
+            
         except Exception as e:
             raise Exception(f"获取产品列表失败: {str(e)}")
 
+    def _remember_rendered(self, key: Tuple, rendered: Tuple[str, Optional[str]]):
+        """缓存渲染好的文本和下一页游标，按字符串实际占用的内存计入预算"""
+        self.render_cache.set(key, rendered, sys.getsizeof(rendered[0]))
+
+    @staticmethod
+    def _render_api_list(product_name: str, product_short: str, apis: List[Any], offset: int,
+                         page_size: int, max_bytes: int) -> Tuple[str, Optional[str]]:
+        """渲染API列表的一页，返回文本和下一页游标"""
+        next_cursor = None
+        if not apis:
+            return f"未找到产品'{product_name}'的API列表", next_cursor
+
+        lines = [f"- {api.summary}" for api in apis]
+        page, next_offset = paginate_lines(lines, offset, max_bytes, page_size)
+        if page:
+            api_list = "\n".join(page)
+            response_text = (f"产品'{product_name}'的API列表（共{len(apis)}个，"
+                             f"当前第{offset + 1}-{offset + len(page)}个）：\n\n{api_list}")
+        else:
+            response_text = f"产品'{product_name}'的API列表（共{len(apis)}个）：没有更多结果"
+        if next_offset is not None:
+            next_cursor = encode_cursor("apis", next_offset, p=product_short)
+            response_text += next_page_hint(next_cursor)
+        return response_text, next_cursor
+
+    @staticmethod
+    def _render_api_info(api_info: Dict[str, Any], section: str, offset: int,
+                         max_bytes: int, request: str) -> Tuple[str, Optional[str]]:
+        """渲染API信息的指定分段，返回文本和下一页游标，request为写入游标的请求摘要"""
+        response_text = (f"华为云API信息：\n\n"
+                         f"产品：{api_info.get('product_name', 'N/A')}\n"
+                         f"接口名称：{api_info.get('api_basic_info', {}).get('summary', 'N/A')}\n"
+                         f"接口描述：{api_info.get('api_basic_info', {}).get('description', 'N/A')}\n"
+                         f"请求方法：{api_info.get('api_basic_info', {}).get('method', 'N/A')}\n")
+
+        # 默认只渲染摘要，其余分段按需获取并按字节预算分页
+        api_detail = api_info.get('api_detail', {})
+        next_cursor = None
+        if section == "summary":
+            response_text += "详细信息摘要：\n" + "\n".join(summarize_detail(api_detail))
+            response_text += ("\n\n💡 使用 section='request'、'response'、'definitions' 或 'full' "
+                              "获取对应分段的完整内容")
+        else:
+            lines = section_lines(detail_section(api_detail, section))
+            page, next_offset = paginate_lines(lines, offset, max_bytes)
+            response_text += (f"详细信息（{section}，第{offset + 1}-{offset + len(page)}行/"
+                              f"共{len(lines)}行）：\n" + "\n".join(page))
+            if next_offset is not None:
+                next_cursor = encode_cursor("detail", next_offset, s=section, r=request)
+                response_text += next_page_hint(next_cursor)
+
+        if api_info.get("missing_fields"):
+            response_text += f"\n\n⚠️ 以下字段不存在: {', '.join(api_info['missing_fields'])}"
+        return response_text, next_cursor
+
     async def _list_product_apis(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """列出指定产品的所有API"""
         try:
             product_name = arguments.get("product_name")
             export_yaml = arguments.get("export_yaml", False)
-            output_dir = arguments.get("output_dir", "api_exports")
-            
-            # 智能处理输出目录
-            if output_dir in [".", "当前目录", "项目根目录", "根目录", "当前项目", "项目下", "项目目录"]:
-                output_dir = "."
+            output_dir = _normalize_output_dir(arguments.get("output_dir"))
             
             if not product_name:
                 raise ValueError("缺少必需参数: product_name")
             
-            client = HuaweiCloudApiClient()
-            async with client:
-                # 查找产品简称
-                product_short = await client.find_product_short(product_name)
-                if not product_short:
-                    return {
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": f"未找到产品'{product_name}'"
-                            }
-                        ]
-                    }
-                
-                # 获取API列表
-                apis = await client.get_all_apis(product_short)
-                
-                # 构建响应文本
-                if apis:
-                    api_list = "\n".join([f"- {api.summary}" for api in apis])
-                    response_text = f"产品'{product_name}'的API列表（共{len(apis)}个）：\n\n{api_list}"
-                else:
-                    response_text = f"未找到产品'{product_name}'的API列表"
-                
-                # 如果需要导出YAML
-                yaml_info = ""
-                if export_yaml and apis:
-                    try:
-                        exporter = YamlExporter(output_dir)
-                        apis_data = [api.model_dump() for api in apis]
-                        yaml_path = exporter.export_product_apis_to_yaml(product_name, apis_data)
-                        
-                        # 获取绝对路径用于更清晰的显示
-                        abs_yaml_path = os.path.abspath(yaml_path)
-                        
-                        yaml_info = f"\n\n📄 {product_name}的API列表YAML文件已成功导出到: {yaml_path}"
-                        yaml_info += f"\n📍 完整路径: {abs_yaml_path}"
-                        
-                        # 如果是输出到当前目录，特别说明
-                        if output_dir == ".":
-                            yaml_info += f"\n✅ 已按要求导出到项目根目录"
-                            
-                    except Exception as e:
-                        yaml_info = f"\n\n⚠️ YAML导出失败: {str(e)}"
-                
+            client = self._get_client()
+            # 查找产品简称
+            product_short = await client.find_product_short(product_name)
+            if not product_short:
                 return {
                     "content": [
                         {
                             "type": "text",
-                            "text": response_text + yaml_info
+                            "text": f"未找到产品'{product_name}'"
                         }
                     ]
                 }
-                
+            
+            # 获取API列表
+            apis = await client.get_all_apis(product_short)
+            
+            # 按条数和字节预算分页，只渲染当前页
+            offset = decode_cursor(arguments.get("cursor"), "apis", p=product_short)
+            page_size = clamp_int(arguments.get("page_size"), DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+            max_bytes = clamp_int(arguments.get("max_bytes"), DEFAULT_MAX_BYTES, MIN_MAX_BYTES, MAX_MAX_BYTES)
+            
+            # API列表刷新后版本变化，旧的渲染结果不再命中
+            render_key = ("list_product_apis", product_name, product_short, client.apis_version(product_short),
+                          offset, page_size, max_bytes)
+            rendered = self.render_cache.get(render_key)
+            if rendered is None:
+                rendered = self._render_api_list(product_name, product_short, apis, offset, page_size, max_bytes)
+                self._remember_rendered(render_key, rendered)
+            response_text, next_cursor = rendered
+            
+            # 如果需要导出YAML（翻页请求不重复导出）
+            yaml_info = ""
+            if export_yaml and apis and offset == 0:
+                try:
+                    exporter = self._yaml_exporter(output_dir)
+                    apis_data = [api.model_dump() for api in apis]
+                    yaml_path = exporter.export_product_apis_to_yaml(product_name, apis_data)
+                    
+                    # 获取绝对路径用于更清晰的显示
+                    abs_yaml_path = os.path.abspath(yaml_path)
+                    
+                    yaml_info = f"\n\n📄 {product_name}的API列表YAML文件已成功导出到: {yaml_path}"
+                    yaml_info += f"\n📍 完整路径: {abs_yaml_path}"
+                    
+                    # 如果是输出到当前目录，特别说明
+                    if output_dir == ".":
+                        yaml_info += f"\n✅ 已按要求导出到项目根目录"
+                        
+                except Exception as e:
+                    yaml_info = f"\n\n⚠️ YAML导出失败: {str(e)}"
+            
+            return text_result(response_text + yaml_info, next_cursor)
+            
         except Exception as e:
             raise Exception(f"获取产品API列表失败: {str(e)}")
 
@@ -438,69 +725,146 @@ class CursorOptimizedMCPServer:
             product_name = arguments.get("product_name")
             interface_name = arguments.get("interface_name")
             export_yaml = arguments.get("export_yaml", False)
-            output_dir = arguments.get("output_dir", "api_exports")
-            
-            # 智能处理输出目录
-            if output_dir in [".", "当前目录", "项目根目录", "根目录", "当前项目", "项目下", "项目目录"]:
-                output_dir = "."
+            output_dir = _normalize_output_dir(arguments.get("output_dir"))
             
             if not product_name or not interface_name:
                 raise ValueError("缺少必需参数: product_name 和 interface_name")
             
-            client = HuaweiCloudApiClient()
-            async with client:
-                api_info = await client.get_api_info_by_user_input(product_name, interface_name)
-                
-                if api_info:
-                    # 构建响应文本
-                    response_text = (f"华为云API信息：\n\n"
-                                   f"产品：{api_info.get('product_name', 'N/A')}\n"
-                                   f"接口名称：{api_info.get('api_basic_info', {}).get('summary', 'N/A')}\n"
-                                   f"接口描述：{api_info.get('api_basic_info', {}).get('description', 'N/A')}\n"
-                                   f"请求方法：{api_info.get('api_basic_info', {}).get('method', 'N/A')}\n"
-                                   f"详细信息：{json.dumps(api_info.get('api_detail', {}), ensure_ascii=False, indent=2)}")
+            fields = arguments.get("fields") or None
+            if isinstance(fields, str):
+                fields = [field for field in fields.split(",") if field.strip()]
+            
+            # 指定字段投影时默认返回投影后的完整内容
+            section = arguments.get("section") or ("full" if fields else "summary")
+            if section not in SECTION_NAMES:
+                raise ValueError(f"不支持的分段: {section}，可选值: {', '.join(SECTION_NAMES)}")
+            max_bytes = clamp_int(arguments.get("max_bytes"), DEFAULT_MAX_BYTES, MIN_MAX_BYTES, MAX_MAX_BYTES)
+            
+            client = self._get_client()
+            product_short, api = await client.resolve_api(product_name, interface_name)
+            
+            # 游标绑定到具体接口和字段，不能用于其他接口的详情
+            request = request_fingerprint(product_short, api.name, fields)
+            offset = decode_cursor(arguments.get("cursor"), "detail", s=section, r=request)
+            
+            # 接口的info_version变化后旧的渲染结果不再命中
+            render_key = ("get_huawei_cloud_api_info", product_name, product_short, api.name, api.info_version,
+                          tuple(fields or ()), section, offset, max_bytes)
+            rendered = self.render_cache.get(render_key)
+            api_info = None
+            if rendered is None:
+                api_info = await client.build_api_info(product_name, product_short, api, fields)
+                rendered = self._render_api_info(api_info, section, offset, max_bytes, request)
+                self._remember_rendered(render_key, rendered)
+            response_text, next_cursor = rendered
+            
+            # 如果需要导出YAML（翻页请求不重复导出）
+            yaml_info = ""
+            if export_yaml and offset == 0:
+                try:
+                    if api_info is None:
+                        api_info = await client.build_api_info(product_name, product_short, api, fields)
+                    exporter = self._yaml_exporter(output_dir)
+                    yaml_path = exporter.export_api_detail_to_yaml(api_info)
                     
-                    # 如果需要导出YAML
-                    yaml_info = ""
-                    if export_yaml:
-                        try:
-                            exporter = YamlExporter(output_dir)
-                            yaml_path = exporter.export_api_detail_to_yaml(api_info)
-                            
-                            # 获取绝对路径用于更清晰的显示
-                            abs_yaml_path = os.path.abspath(yaml_path)
-                            
-                            yaml_info = f"\n\n📄 YAML文件已成功导出到: {yaml_path}"
-                            yaml_info += f"\n📍 完整路径: {abs_yaml_path}"
-                            
-                            # 如果是输出到当前目录，特别说明
-                            if output_dir == ".":
-                                yaml_info += f"\n✅ 已按要求导出到项目根目录"
-                                
-                        except Exception as e:
-                            yaml_info = f"\n\n⚠️ YAML导出失败: {str(e)}"
+                    # 获取绝对路径用于更清晰的显示
+                    abs_yaml_path = os.path.abspath(yaml_path)
                     
-                    return {
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": response_text + yaml_info
-                            }
-                        ]
-                    }
-                else:
-                    return {
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": f"未找到产品'{product_name}'的接口'{interface_name}'"
-                            }
-                        ]
-                    }
+                    yaml_info = f"\n\n📄 YAML文件已成功导出到: {yaml_path}"
+                    yaml_info += f"\n📍 完整路径: {abs_yaml_path}"
                     
+                    # 如果是输出到当前目录，特别说明
+                    if output_dir == ".":
+                        yaml_info += f"\n✅ 已按要求导出到项目根目录"
+                        
+                except Exception as e:
+                    yaml_info = f"\n\n⚠️ YAML导出失败: {str(e)}"
+            
+            return text_result(response_text + yaml_info, next_cursor)
+                
         except Exception as e:
             raise Exception(f"获取API信息失败: {str(e)}")
 
+    async def _batch_get_api_info(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """批量获取同一产品下多个接口的API信息"""
+        try:
+            product_name = arguments.get("product_name")
+            interface_names = arguments.get("interface_names") or []
+            if isinstance(interface_names, str):
+                interface_names = [name.strip() for name in interface_names.split(",") if name.strip()]
+            fields = arguments.get("fields") or None
+            if isinstance(fields, str):
+                fields = [field for field in fields.split(",") if field.strip()]
+            export_yaml = arguments.get("export_yaml", False)
+            output_dir = _normalize_output_dir(arguments.get("output_dir"))
+            
+            if not product_name or not interface_names:
+                raise ValueError("缺少必需参数: product_name 和 interface_names")
+            
+            # 游标绑定到产品、接口名称列表和字段，列表变化后旧游标失效
+            request = request_fingerprint(product_name, interface_names, fields)
+            offset = decode_cursor(arguments.get("cursor"), "batch", r=request)
+            max_bytes = clamp_int(arguments.get("max_bytes"), DEFAULT_MAX_BYTES, MIN_MAX_BYTES, MAX_MAX_BYTES)
+            
+            client = self._get_client()
+            items = await client.get_api_infos_by_user_input(product_name, interface_names, fields=fields)
+            succeeded = [item["result"] for item in items if "result" in item]
+            
+            # 逐个接口渲染：指定字段时输出投影内容，否则输出紧凑摘要
+            lines = [f"华为云API批量查询结果（产品：{product_name}，成功{len(succeeded)}/{len(items)}个）：", ""]
+            for index, item in enumerate(items, 1):
+                if "error" in item:
+                    lines.append(f"[{index}] ❌ {item['interface_name']}：{item['error']}")
+                    lines.append("")
+                    continue
+                
+                api_info = item["result"]
+                basic_info = api_info.get("api_basic_info", {})
+                lines.append(f"[{index}] ✅ {basic_info.get('summary', item['interface_name'])}"
+                             f"（{basic_info.get('method', 'N/A')} {basic_info.get('name', '')}）")
+                if fields:
+                    lines.extend(section_lines(api_info.get("api_detail", {})))
+                    if api_info.get("missing_fields"):
+                        lines.append(f"⚠️ 以下字段不存在: {', '.join(api_info['missing_fields'])}")
+                else:
+                    lines.extend(summarize_detail(api_info.get("api_detail", {})))
+                lines.append("")
+            
+            page, next_offset = paginate_lines(lines, offset, max_bytes)
+            response_text = "\n".join(page).rstrip()
+            next_cursor = None
+            if next_offset is not None:
+                next_cursor = encode_cursor("batch", next_offset, r=request)
+                response_text += next_page_hint(next_cursor)
+            elif not fields and succeeded:
+                response_text += ("\n\n💡 使用 get_huawei_cloud_api_info 的 section 参数，"
+                                  "或本工具的 fields 参数获取具体内容")
+            
+            # 如果需要导出YAML（翻页请求不重复导出）
+            yaml_info = ""
+            if export_yaml and succeeded and offset == 0:
+                try:
+                    exporter = self._yaml_exporter(output_dir)
+                    yaml_path = exporter.export_multiple_apis_to_yaml(succeeded)
+                    
+                    # 获取绝对路径用于更清晰的显示
+                    abs_yaml_path = os.path.abspath(yaml_path)
+                    
+                    yaml_info = f"\n\n📄 {len(succeeded)}个API的YAML文件已成功导出到: {yaml_path}"
+                    yaml_info += f"\n📍 完整路径: {abs_yaml_path}"
+                    
+                    # 如果是输出到当前目录，特别说明
+                    if output_dir == ".":
+                        yaml_info += f"\n✅ 已按要求导出到项目根目录"
+                        
+                except Exception as e:
+                    yaml_info = f"\n\n⚠️ YAML导出失败: {str(e)}"
+            
+            return text_result(response_text + yaml_info, next_cursor)
+            
+        except Exception as e:
+            raise Exception(f"批量获取API信息失败: {str(e)}")
+
     async def read_stdin_lines(self) -> AsyncIterator[str]:
         """异步读取stdin行"""
         loop = asyncio.get_event_loop()
@@ -582,11 +946,19 @@ class CursorOptimizedMCPServer:
             except (EOFError, KeyboardInterrupt):
                 print("\n退出测试模式", file=sys.stderr)
                 break
+        
+        await self.close()
+
+    @staticmethod
+    async def _write_notification(line: str):
+        """stdio模式下将通知写到stdout"""
+        print(line, flush=True)
 
     async def run(self):
         """运行MCP服务器"""
         # 输出启动信息到stderr以便调试
         print("MCP Server ready", file=sys.stderr, flush=True)
+        progress.NOTIFIER.set(self._write_notification)
         
         # 生产模式：始终使用MCP协议，不检测终端
         try:
@@ -600,7 +972,7 @@ class CursorOptimizedMCPServer:
                     
                     # 只有非通知类型的请求才需要响应
                     if response is not None:
-                        response_json = json.dumps(response, ensure_ascii=False)
+                        response_json = self.encode_response(response)
                         print(response_json, flush=True)
                     
                 except json.JSONDecodeError:
@@ -625,10 +997,18 @@ class CursorOptimizedMCPServer:
             pass
         finally:
             self.running = False
+            self.dump_metrics()
+            await self.close()
 
 
 async def main():
-    """主函数"""
+    """主函数，设置API_SCAN_DAEMON=1时作为守护进程的stdio代理运行"""
+    if os.environ.get("API_SCAN_DAEMON", "0").lower() not in ("0", "false", "no", "off"):
+        from .daemon import run_proxy
+        if await run_proxy():
+            return
+        print("无法连接或启动守护进程，改为在当前进程中运行", file=sys.stderr)
+
     server = CursorOptimizedMCPServer()
     await server.run()
 
@@ -0,0 +1,415 @@
+"""守护进程模式 - 多个Cursor窗口通过本地套接字共享同一个MCP服务器进程及其缓存"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Iterator, Optional, Tuple, Union
+
+from .cursor_optimized_server import CursorOptimizedMCPServer, WORKING_DIR
+from . import progress
+
+# 没有任何连接时，守护进程在该时间（秒）后退出
+DEFAULT_IDLE_TIMEOUT = 1800
+
+# 代理启动守护进程后等待其就绪的最长时间（秒）
+SPAWN_TIMEOUT = 10.0
+
+# 代理连接后发送的第一条消息，携带令牌并告知守护进程本会话的工作目录；未通过认证的连接会被关闭
+ATTACH_METHOD = "daemon/attach"
+
+# 认证失败时返回的JSON-RPC错误码
+UNAUTHORIZED_CODE = -32001
+
+# 单条JSON-RPC消息的最大长度
+LINE_LIMIT = 64 * 1024 * 1024
+
+Address = Union[str, Tuple[str, int]]
+
+
+def runtime_dir() -> str:
+    """返回当前用户私有的运行时目录（权限0700），存放套接字、令牌和锁文件"""
+    if hasattr(os, "getuid"):
+        base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+        path = os.path.join(base, f"api-scan-{os.getuid()}")
+    else:
+        # Windows的LOCALAPPDATA只有当前用户可以访问
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        path = os.path.join(base, "api-scan")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid"):
+        # 共享的临时目录中可能有其他用户预先创建的同名目录
+        if os.stat(path).st_uid != os.getuid():
+            raise ValueError(f"运行时目录不属于当前用户: {path}")
+        os.chmod(path, 0o700)
+    return path
+
+
+def default_address() -> str:
+    """返回默认的守护进程地址，可通过API_SCAN_DAEMON_ADDRESS覆盖"""
+    address = os.environ.get("API_SCAN_DAEMON_ADDRESS")
+    if address:
+        return address
+    if not hasattr(socket, "AF_UNIX"):
+        # 不支持Unix套接字的平台（Windows）使用本地TCP端口，连接需通过令牌认证
+        return "127.0.0.1:8765"
+    return os.path.join(runtime_dir(), "daemon.sock")
+
+
+def _state_path(address: str, suffix: str) -> str:
+    """地址对应的令牌或锁文件，位于运行时目录中"""
+    digest = hashlib.sha1(address.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(runtime_dir(), f"daemon-{digest}{suffix}")
+
+
+def token_path(address: str) -> str:
+    """守护进程令牌文件的路径，只有当前用户可以读取"""
+    return _state_path(address, ".token")
+
+
+def write_token(address: str) -> str:
+    """生成新的令牌并以0600权限写入令牌文件"""
+    token = secrets.token_hex(32)
+    path = token_path(address)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    os.replace(tmp_path, path)
+    return token
+
+
+def read_token(address: str) -> str:
+    """读取守护进程的令牌，令牌文件不存在时返回空字符串"""
+    try:
+        with open(token_path(address), "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+@contextlib.contextmanager
+def startup_lock(address: str) -> Iterator[None]:
+    """持有地址对应的锁文件，同时启动的多个守护进程依次检查、清理和绑定地址"""
+    fd = os.open(_state_path(address, ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        import fcntl
+    except ImportError:  # Windows没有fcntl，使用msvcrt锁定文件的第一个字节
+        fcntl = None
+        import msvcrt
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        # 关闭文件即释放锁
+        os.close(fd)
+
+
+def parse_address(address: str) -> Address:
+    """解析地址：host:port为TCP，其余视为Unix套接字路径"""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and os.sep not in address:
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+def format_address(address: Address) -> str:
+    """parse_address的逆操作"""
+    return address if isinstance(address, str) else f"{address[0]}:{address[1]}"
+
+
+async def open_connection(address: Address):
+    """连接守护进程"""
+    if isinstance(address, tuple):
+        return await asyncio.open_connection(*address, limit=LINE_LIMIT)
+    return await asyncio.open_unix_connection(address, limit=LINE_LIMIT)
+
+
+class McpDaemon:
+    """在本地套接字上为多个会话提供MCP服务，所有会话共享同一个服务器实例"""
+
+    def __init__(self, server: CursorOptimizedMCPServer, address: str,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.server = server
+        self.address = parse_address(address)
+        self.idle_timeout = idle_timeout
+        self.connections = 0
+        self.last_active = time.monotonic()
+        # 启动时生成，代理从令牌文件读取后在attach消息中提供
+        self.token = None
+        self._stopped = None
+
+    def stop(self):
+        """请求停止守护进程"""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def _already_running(self) -> bool:
+        """检查地址上是否已有守护进程在运行"""
+        try:
+            _, writer = await open_connection(self.address)
+        except OSError:
+            return False
+        writer.close()
+        return True
+
+    async def serve(self):
+        """运行守护进程直到收到停止信号或空闲超时"""
+        self._stopped = asyncio.Event()
+        address = format_address(self.address)
+        # 从检查到绑定的整个过程持有锁，避免同时启动的守护进程删除对方刚绑定的套接字
+        with startup_lock(address):
+            if await self._already_running():
+                print(f"守护进程已在运行: {self.address}", file=sys.stderr)
+                return
+
+            self.token = write_token(address)
+            if isinstance(self.address, tuple):
+                listener = await asyncio.start_server(self._handle_connection, *self.address, limit=LINE_LIMIT)
+            else:
+                # 清理上次异常退出留下的套接字文件
+                if os.path.exists(self.address):
+                    os.unlink(self.address)
+                # 绑定时即以0600权限创建套接字文件，不留可被其他用户连接的窗口
+                umask = os.umask(0o077)
+                try:
+                    listener = await asyncio.start_unix_server(self._handle_connection, self.address,
+                                                               limit=LINE_LIMIT)
+                finally:
+                    os.umask(umask)
+                os.chmod(self.address, 0o600)
+
+        loop = asyncio.get_event_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        print(f"MCP daemon ready: {self.address}", file=sys.stderr, flush=True)
+        # 守护进程不等待initialize，启动后立即开始预热
+        self.server.prefetcher.start()
+        watcher = asyncio.ensure_future(self._watch_idle())
+        try:
+            await self._stopped.wait()
+        finally:
+            watcher.cancel()
+            listener.close()
+            await listener.wait_closed()
+            if not isinstance(self.address, tuple) and os.path.exists(self.address):
+                os.unlink(self.address)
+            if os.path.exists(token_path(address)):
+                os.unlink(token_path(address))
+            self.server.dump_metrics()
+            await self.server.close()
+
+    async def _watch_idle(self):
+        """没有连接的时间超过idle_timeout时退出"""
+        if not self.idle_timeout:
+            return
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 60))
+            if not self.connections and time.monotonic() - self.last_active >= self.idle_timeout:
+                self.stop()
+                return
+
+    def _authenticate(self, line: bytes) -> Optional[dict]:
+        """校验会话的第一条消息，令牌正确时返回attach参数"""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(request, dict) or request.get("method") != ATTACH_METHOD:
+            return None
+        params = request.get("params") or {}
+        token = params.get("token")
+        if not isinstance(token, str) or not hmac.compare_digest(token, self.token or ""):
+            return None
+        return params
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个会话，同一会话的请求并发执行，响应按完成顺序写回"""
+        self.connections += 1
+        lock = asyncio.Lock()
+        pending = set()
+        try:
+            params = self._authenticate(await reader.readline())
+            if params is None:
+                error_response = self.server.create_response(
+                    None, error={"code": UNAUTHORIZED_CODE, "message": "守护进程认证失败"}
+                )
+                await self._write(writer, lock, json.dumps(error_response, ensure_ascii=False))
+                return
+            # 之后创建的请求任务继承本会话的工作目录
+            WORKING_DIR.set(params.get("cwd"))
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    error_response = self.server.create_response(
+                        None, error={"code": -32700, "message": "Parse error"}
+                    )
+                    await self._write(writer, lock, json.dumps(error_response, ensure_ascii=False))
+                    continue
+
+                task = asyncio.ensure_future(self._process(request, writer, lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            self.connections -= 1
+            self.last_active = time.monotonic()
+            writer.close()
+
+    async def _process(self, request, writer: asyncio.StreamWriter, lock: asyncio.Lock):
+        """处理单个请求并写回响应，进度通知写回同一连接"""
+        progress.NOTIFIER.set(lambda line: self._write(writer, lock, line))
+        try:
+            response = await self.server.handle_request(request)
+            if response is None:
+                return
+            response_json = self.server.encode_response(response)
+        except Exception as e:
+            error_response = self.server.create_response(
+                None, error={"code": -32603, "message": f"Internal error: {str(e)}"}
+            )
+            response_json = json.dumps(error_response, ensure_ascii=False)
+        await self._write(writer, lock, response_json)
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, lock: asyncio.Lock, line: str):
+        async with lock:
+            try:
+                writer.write(line.encode("utf-8") + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+
+def spawn_daemon(address: str, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> subprocess.Popen:
+    """在独立会话中启动守护进程，日志写入地址旁的.log文件"""
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_dir, env.get("PYTHONPATH")]))
+    log_path = f"{address}.log" if not isinstance(parse_address(address), tuple) else os.devnull
+    with open(log_path, "ab") as log:
+        return subprocess.Popen(
+            [sys.executable, "-m", "scan.daemon", "--address", address, "--idle-timeout", str(idle_timeout)],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=log, env=env,
+            start_new_session=True
+        )
+
+
+async def connect_or_spawn(address: str, spawn: bool = True):
+    """连接守护进程，未运行时启动它并等待就绪，失败时返回None"""
+    parsed = parse_address(address)
+    try:
+        return await open_connection(parsed)
+    except OSError:
+        if not spawn:
+            return None
+
+    process = spawn_daemon(address)
+    deadline = time.monotonic() + SPAWN_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        try:
+            return await open_connection(parsed)
+        except OSError:
+            if process.poll() is not None:
+                # 可能有其他窗口同时启动了守护进程，再尝试一次
+                try:
+                    return await open_connection(parsed)
+                except OSError:
+                    return None
+    return None
+
+
+async def run_proxy(address: Optional[str] = None, spawn: bool = True) -> bool:
+    """作为stdio代理，将Cursor的请求转发给守护进程；无法连接时返回False"""
+    address = address or default_address()
+    connection = await connect_or_spawn(address, spawn)
+    if connection is None:
+        return False
+    reader, writer = connection
+
+    # 守护进程在绑定地址前写入令牌，连接成功时令牌文件已存在
+    attach = {"jsonrpc": "2.0", "method": ATTACH_METHOD,
+              "params": {"token": read_token(format_address(parse_address(address))), "cwd": os.getcwd()}}
+    writer.write((json.dumps(attach, ensure_ascii=False) + "\n").encode("utf-8"))
+    print("MCP Server ready (daemon proxy)", file=sys.stderr, flush=True)
+
+    async def pump_stdin():
+        loop = asyncio.get_event_loop()
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.buffer.readline)
+            if not line:
+                break
+            writer.write(line if line.endswith(b"\n") else line + b"\n")
+            await writer.drain()
+        # 通知守护进程不再有新请求，等待剩余响应返回
+        if writer.can_write_eof():
+            writer.write_eof()
+
+    async def pump_daemon():
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            sys.stdout.buffer.write(line)
+            sys.stdout.buffer.flush()
+
+    stdin_task = asyncio.ensure_future(pump_stdin())
+    try:
+        await pump_daemon()
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        stdin_task.cancel()
+        writer.close()
+    return True
+
+
+async def serve(address: Optional[str] = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+    """运行守护进程"""
+    daemon = McpDaemon(CursorOptimizedMCPServer(), address or default_address(), idle_timeout)
+    await daemon.serve()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="华为云API分析MCP服务器守护进程")
+    parser.add_argument('--address', help='Unix套接字路径或host:port（默认：API_SCAN_DAEMON_ADDRESS或运行时目录下的套接字）')
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help=f'无连接时自动退出的秒数，0表示不退出（默认：{DEFAULT_IDLE_TIMEOUT}）')
+    args = parser.parse_args()
+    asyncio.run(serve(args.address, args.idle_timeout))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""运行指标与追踪 - 延迟直方图、计数器、仪表盘，以及可选的OpenTelemetry追踪"""
+
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 延迟直方图的默认分桶上界（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = [(k, v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class Histogram:
+    """固定分桶的直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个桶为+Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """记录一次观测值"""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """根据分桶线性插值估算分位数"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for i, count in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if count and cumulative + count >= target:
+                fraction = (target - cumulative) / count
+                return min(lower + (upper - lower) * fraction, self.max)
+            cumulative += count
+            lower = upper
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回可JSON序列化的统计"""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "p99": round(self.quantile(0.99), 6),
+            "max": round(self.max, 6),
+            "buckets": buckets
+        }
+
+
+class MetricsRegistry:
+    """进程内指标注册表"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.counters = {}  # (name, labels) -> value
+        self.gauges = {}
+        self.histograms = {}
+        self.descriptions = {}
+
+    def describe(self, name: str, description: str):
+        """登记指标说明，用于Prometheus输出"""
+        self.descriptions[name] = description
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """累加计数器"""
+        key = (name, _label_key(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_counter(self, name: str, value: float, **labels):
+        """设置计数器的当前值，用于同步外部维护的累计统计"""
+        self.counters[(name, _label_key(labels))] = value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """设置仪表盘的当前值"""
+        self.gauges[(name, _label_key(labels))] = value
+
+    def add_gauge(self, name: str, delta: float, **labels):
+        """增减仪表盘的当前值"""
+        key = (name, _label_key(labels))
+        self.gauges[key] = self.gauges.get(key, 0) + delta
+
+    def observe(self, name: str, value: float, **labels):
+        """记录直方图观测值"""
+        key = (name, _label_key(labels))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    @contextmanager
+    def track(self, name: str, in_flight: Optional[str] = None, **labels):
+        """记录代码块耗时到直方图，并可同时维护进行中的请求数"""
+        if in_flight:
+            self.add_gauge(in_flight, 1, **labels)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+            if in_flight:
+                self.add_gauge(in_flight, -1, **labels)
+
+    def reset(self):
+        """清空所有指标"""
+        self.started_at = time.time()
+        self.counters.clear()
+        self.gauges.clear()
+        self.histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回全部指标的JSON快照"""
+        def entries(store: Dict, render: Callable[[Any], Any]) -> List[Dict[str, Any]]:
+            return [
+                {"name": name, "labels": dict(labels), "value": render(value)}
+                for (name, labels), value in sorted(store.items())
+            ]
+
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "counters": entries(self.counters, lambda v: v),
+            "gauges": entries(self.gauges, lambda v: v),
+            "histograms": entries(self.histograms, lambda h: h.snapshot())
+        }
+
+    def to_prometheus(self) -> str:
+        """以Prometheus文本格式输出全部指标"""
+        lines = []
+        typed = set()
+
+        def header(name: str, metric_type: str):
+            if name in typed:
+                return
+            typed.add(name)
+            if name in self.descriptions:
+                lines.append(f"# HELP {name} {self.descriptions[name]}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        for (name, labels), value in sorted(self.counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), value in sorted(self.gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', str(bound)))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def dump(self, json_path: Optional[str] = None, prometheus_path: Optional[str] = None):
+        """将指标写入JSON文件和/或Prometheus textfile，先写临时文件再替换"""
+        for path, content in ((json_path, lambda: json.dumps(self.snapshot(), ensure_ascii=False, indent=2)),
+                              (prometheus_path, self.to_prometheus)):
+            if not path:
+                continue
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content())
+            os.replace(tmp_path, path)
+
+
+# 进程级默认注册表
+metrics = MetricsRegistry()
+metrics.describe("mcp_request_duration_seconds", "MCP请求处理耗时（按方法）")
+metrics.describe("mcp_requests_in_flight", "正在处理的MCP请求数")
+metrics.describe("mcp_tool_duration_seconds", "工具调用耗时（按工具）")
+metrics.describe("mcp_tool_calls_total", "工具调用次数（按工具和结果）")
+metrics.describe("upstream_requests_total", "访问华为云API Explorer的请求数（按接口和状态）")
+metrics.describe("upstream_request_duration_seconds", "访问华为云API Explorer的耗时（按接口）")
+metrics.describe("upstream_requests_in_flight", "正在进行的上游请求数")
+metrics.describe("cache_requests_total", "缓存查询次数（按缓存和结果）")
+metrics.describe("cache_entries", "缓存条目数")
+
+
+def _otel_trace():
+    """导入OpenTelemetry追踪API，未安装或通过API_SCAN_OTEL=0关闭时返回None"""
+    if os.environ.get("API_SCAN_OTEL", "1") == "0":
+        return None
+    try:
+        from opentelemetry import trace
+    except ImportError:  # OpenTelemetry为可选依赖
+        return None
+    return trace
+
+
+def traced(span_name: str):
+    """为异步方法包裹OpenTelemetry span，未启用追踪时不做任何包装"""
+    def decorator(func):
+        otel_trace = _otel_trace()
+        if otel_trace is None:
+            return func
+
+        tracer = otel_trace.get_tracer("api_scan")
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name) as span:
+                for key, value in kwargs.items():
+                    if isinstance(value, (str, int, float, bool)):
+                        span.set_attribute(f"api_scan.{key}", value)
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,296 @@
+"""本地模拟的华为云API Explorer - 生成可配置规模的合成数据，用于离线测试和基准测试"""
+
+import asyncio
+import gzip
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+
+# 前几个模拟产品使用真实名称，便于按常见输入查询
+KNOWN_PRODUCTS = [
+    ("弹性云服务器", "ECS", "计算"),
+    ("虚拟私有云", "VPC", "网络"),
+    ("对象存储服务", "OBS", "存储"),
+    ("云硬盘", "EVS", "存储"),
+    ("云数据库 RDS", "RDS", "数据库"),
+    ("弹性伸缩", "AS", "计算"),
+]
+
+GROUP_NAMES = ["计算", "存储", "网络", "数据库", "人工智能", "安全与合规", "管理与监管"]
+ACTIONS = [("创建", "POST"), ("删除", "DELETE"), ("查询", "GET"), ("修改", "PUT"), ("批量查询", "GET")]
+
+# 同一产品的API共享的定义，模拟真实详情中大量重复的definitions
+SHARED_DEFINITIONS = {
+    "PageInfo": {
+        "type": "object",
+        "properties": {
+            "previous_marker": {"type": "string", "description": "上一页最后一条记录的ID"},
+            "current_count": {"type": "integer", "description": "当前页的记录数"},
+            "next_marker": {"type": "string", "description": "下一页第一条记录的ID"}
+        }
+    },
+    "Tag": {
+        "type": "object",
+        "required": ["key"],
+        "properties": {
+            "key": {"type": "string", "description": "标签键，最大长度128个字符"},
+            "value": {"type": "string", "description": "标签值，最大长度255个字符"}
+        }
+    },
+    "ErrorResponse": {
+        "type": "object",
+        "properties": {
+            "error_code": {"type": "string", "description": "错误码"},
+            "error_msg": {"type": "string", "description": "错误描述"},
+            "request_id": {"type": "string", "description": "请求ID"}
+        }
+    }
+}
+
+
+class MockExplorer:
+    """模拟 /v5/products、/v3/apis 和 /v4/apis/detail 接口"""
+
+    def __init__(self, products: int = 50, apis_per_product: int = 100, definitions_per_api: int = 5,
+                 properties_per_definition: int = 10, latency: float = 0.0, jitter: float = 0.0,
+                 seed: int = 0):
+        self.products = products
+        self.apis_per_product = apis_per_product
+        self.definitions_per_api = definitions_per_api
+        self.properties_per_definition = properties_per_definition
+        # 每个请求注入的延迟（秒）及随机抖动比例
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self._random = random.Random(seed)
+        self.request_counts = Counter()
+        self._catalog = self._build_catalog()
+        self._shorts = set(self.product_shorts())
+        self._detail_bodies = {}
+
+    def _build_catalog(self) -> Dict[str, Any]:
+        """生成产品目录"""
+        groups = {}
+        for index in range(self.products):
+            if index < len(KNOWN_PRODUCTS):
+                name, short, group = KNOWN_PRODUCTS[index]
+            else:
+                name = f"模拟产品{index}"
+                short = f"MOCK{index}"
+                group = GROUP_NAMES[index % len(GROUP_NAMES)]
+            groups.setdefault(group, []).append({
+                "name": name,
+                "productshort": short,
+                "description": f"{name}（{short}）是华为云提供的{group}服务"
+            })
+
+        return {"groups": [{"name": group, "products": products} for group, products in groups.items()]}
+
+    def product_shorts(self) -> List[str]:
+        """返回所有产品简称"""
+        return [product["productshort"] for group in self._catalog["groups"] for product in group["products"]]
+
+    def product_names(self) -> List[str]:
+        """返回所有产品名称"""
+        return [product["name"] for group in self._catalog["groups"] for product in group["products"]]
+
+    def api_summary(self, index: int) -> str:
+        """返回第index个API的摘要，即用户查询时使用的接口名称"""
+        action, _ = ACTIONS[index % len(ACTIONS)]
+        return f"{action}资源{index}"
+
+    def _api_basic_info(self, product_short: str, index: int) -> Dict[str, Any]:
+        """生成API基本信息"""
+        _, method = ACTIONS[index % len(ACTIONS)]
+        return {
+            "id": f"{product_short}-{index}",
+            "name": f"{product_short.title()}Api{index}",
+            "alias_name": f"Api{index}",
+            "method": method,
+            "summary": self.api_summary(index),
+            "tags": "模拟接口",
+            "product_short": product_short,
+            "info_version": "v1"
+        }
+
+    def catalog(self) -> Dict[str, Any]:
+        """返回产品目录响应"""
+        return self._catalog
+
+    def apis_page(self, product_short: str, offset: int, limit: int) -> Dict[str, Any]:
+        """返回API列表分页响应"""
+        if product_short not in self._shorts:
+            return {"count": 0, "api_basic_infos": []}
+
+        end = min(offset + limit, self.apis_per_product)
+        return {
+            "count": self.apis_per_product,
+            "api_basic_infos": [self._api_basic_info(product_short, index) for index in range(offset, end)]
+        }
+
+    def api_detail(self, product_short: str, api_name: str) -> Optional[Dict[str, Any]]:
+        """返回API详情响应，未知API返回None"""
+        prefix = f"{product_short.title()}Api"
+        if product_short not in self._shorts or not api_name.startswith(prefix):
+            return None
+        try:
+            index = int(api_name[len(prefix):])
+        except ValueError:
+            return None
+        if index >= self.apis_per_product:
+            return None
+
+        basic_info = self._api_basic_info(product_short, index)
+        rng = random.Random(f"{self.seed}:{product_short}:{index}")
+        definitions = dict(SHARED_DEFINITIONS)
+        for def_index in range(self.definitions_per_api):
+            definitions[f"{basic_info['name']}Body{def_index}"] = {
+                "type": "object",
+                "required": ["field_0"],
+                "properties": {
+                    f"field_{prop}": {
+                        "type": rng.choice(["string", "integer", "boolean"]),
+                        "description": f"参数{prop}的说明。" * rng.randint(1, 4)
+                    }
+                    for prop in range(self.properties_per_definition)
+                }
+            }
+
+        request_body = f"{basic_info['name']}Body0" if self.definitions_per_api else "Tag"
+        return {
+            "name": basic_info["name"],
+            "summary": basic_info["summary"],
+            "description": f"{basic_info['summary']}的接口说明",
+            "method": basic_info["method"],
+            "uri": f"/v1/{{project_id}}/{product_short.lower()}/resources/{index}",
+            "request_params": {
+                "path": [{"name": "project_id", "in": "path", "required": True, "type": "string"}],
+                "query": [{"name": "limit", "in": "query", "required": False, "type": "integer"}],
+                "body": {"$ref": f"#/definitions/{request_body}"}
+            },
+            "responses": {
+                "200": {"description": "OK", "schema": {
+                    "allOf": [{"$ref": f"#/definitions/{request_body}"}, {"$ref": "#/definitions/PageInfo"}]
+                }},
+                "400": {"description": "Bad Request", "schema": {"$ref": "#/definitions/ErrorResponse"}}
+            },
+            "definitions": definitions
+        }
+
+    def _json_response(self, data: Any) -> httpx.Response:
+        return httpx.Response(
+            200,
+            content=json.dumps(data, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+
+    def respond(self, method: str, path: str, params: Dict[str, str]) -> httpx.Response:
+        """根据请求路径和参数生成响应，不包含延迟"""
+        if path.endswith("/v5/products"):
+            self.request_counts["products"] += 1
+            return self._json_response(self._catalog)
+
+        if path.endswith("/v3/apis"):
+            self.request_counts["apis"] += 1
+            offset = int(params.get("offset", 0))
+            limit = int(params.get("limit", 100))
+            return self._json_response(self.apis_page(params.get("product_short", ""), offset, limit))
+
+        if path.endswith("/v4/apis/detail"):
+            self.request_counts["detail"] += 1
+            key = (params.get("product_short", ""), params.get("name", ""))
+            body = self._detail_bodies.get(key)
+            if body is None:
+                detail = self.api_detail(*key)
+                if detail is None:
+                    return httpx.Response(404, json={"error_code": "APIE.0404", "error_msg": "API不存在"})
+                body = json.dumps(detail, ensure_ascii=False).encode("utf-8")
+                self._detail_bodies[key] = body
+            return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+
+        self.request_counts["unknown"] += 1
+        return httpx.Response(404, json={"error_code": "APIE.0404", "error_msg": "未知接口"})
+
+    def delay(self) -> float:
+        """返回本次请求注入的延迟"""
+        if not self.latency:
+            return 0.0
+        spread = self.latency * self.jitter
+        return max(0.0, self.latency + self._random.uniform(-spread, spread))
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        """httpx MockTransport的异步处理函数"""
+        delay = self.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return self.respond(request.method, request.url.path, dict(request.url.params))
+
+    def transport(self) -> httpx.MockTransport:
+        """返回可传给HuaweiCloudApiClient的模拟transport"""
+        return httpx.MockTransport(self.handle)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> "MockExplorerServer":
+        """在后台线程中启动真实的HTTP服务，用于测量连接、超时和压缩等传输层开销"""
+        return MockExplorerServer(self, host, port)
+
+
+class MockExplorerServer:
+    """基于标准库的多线程HTTP/1.1服务，支持keep-alive和gzip响应"""
+
+    def __init__(self, explorer: MockExplorer, host: str = "127.0.0.1", port: int = 0):
+        self.explorer = explorer
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                delay = explorer.delay()
+                if delay:
+                    time.sleep(delay)
+                with server.lock:
+                    response = explorer.respond("GET", url.path, dict(parse_qsl(url.query)))
+                body = response.content
+                self.send_response(response.status_code)
+                self.send_header("Content-Type", "application/json")
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=5)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self) -> str:
+        """可赋给HuaweiCloudApiClient.base_url的地址"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def close(self):
+        """停止服务"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
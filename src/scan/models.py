@@ -10,6 +10,10 @@ class Product:
         self.productshort = data.get('productshort', '')
         self.description = data.get('description')
 
+    def model_dump(self):
+        """兼容Pydantic v1和v2的序列化方法"""
+        return {'name': self.name, 'productshort': self.productshort, 'description': self.description}
+
 
 class ProductGroup:
     """Product group model"""
@@ -17,6 +21,10 @@ class ProductGroup:
         self.name = data.get('name', '')
         self.products = [Product(**p) if isinstance(p, dict) else p for p in data.get('products', [])]
 
+    def model_dump(self):
+        """兼容Pydantic v1和v2的序列化方法"""
+        return {'name': self.name, 'products': [product.model_dump() for product in self.products]}
+
 
 class ProductsResponse:
     """Response model for products API"""
@@ -28,6 +36,10 @@ class ProductsResponse:
         """兼容Pydantic v1和v2的验证方法"""
         return cls(**data)
 
+    def model_dump(self):
+        """兼容Pydantic v1和v2的序列化方法"""
+        return {'groups': [group.model_dump() for group in self.groups]}
+
 
 class ApiBasicInfo:
     """Basic API information model"""
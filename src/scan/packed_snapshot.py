@@ -0,0 +1,303 @@
+"""打包快照 - 单文件、带磁盘哈希索引的只读快照，通过mmap按键随机读取，打开耗时与目录规模无关"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .snapshot_store import (BLOB_CACHE_SIZE, PRODUCTS_KEY, SnapshotStore, apis_key, blob_key, blob_refs,
+                             detail_key, join_detail, _zstd)
+
+# 文件头：魔数、格式版本、保留字段、记录数、哈希桶数、索引起始偏移
+MAGIC = b"APISNAP\x01"
+PACK_VERSION = 1
+HEADER = struct.Struct("<8sIIQQQ")
+
+# 哈希桶：键哈希、键偏移、值偏移、键长度、值长度、标志；键长度为0表示空桶
+BUCKET = struct.Struct("<QQQIII4x")
+
+# 记录标志：值经过zstd压缩
+FLAG_ZSTD = 1
+
+# 保留解码结果的API列表数，客户端逐页请求同一产品时只解码一次
+APIS_MEMO_SIZE = 16
+
+
+def key_hash(key: bytes) -> int:
+    """跨进程稳定的64位键哈希"""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _bucket_count(records: int) -> int:
+    """不小于记录数两倍的2的幂，保持较低的装载率"""
+    count = 1
+    while count < records * 2:
+        count <<= 1
+    return count
+
+
+def pack(documents: Iterator[Tuple[str, bytes]], path: str, compression: str = "none") -> int:
+    """将(键, JSON字节)写入打包快照文件，返回记录数"""
+    compressor = None
+    if compression == "zstd":
+        zstd = _zstd()
+        if zstd is None:
+            raise ValueError("zstd压缩需要安装zstandard")
+        compressor = zstd.ZstdCompressor()
+
+    entries = []
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(b"\0" * HEADER.size)
+        for key, value in documents:
+            encoded_key = key.encode("utf-8")
+            flags = 0
+            if compressor is not None:
+                value = compressor.compress(value)
+                flags |= FLAG_ZSTD
+            key_offset = f.tell()
+            f.write(encoded_key)
+            value_offset = f.tell()
+            f.write(value)
+            entries.append((key_hash(encoded_key), key_offset, value_offset, len(encoded_key), len(value), flags))
+
+        # 索引按8字节对齐
+        f.write(b"\0" * (-f.tell() % 8))
+        index_offset = f.tell()
+        buckets = [None] * _bucket_count(len(entries))
+        mask = len(buckets) - 1
+        for entry in entries:
+            slot = entry[0] & mask
+            while buckets[slot] is not None:
+                slot = (slot + 1) & mask
+            buckets[slot] = entry
+        empty = BUCKET.pack(0, 0, 0, 0, 0, 0)
+        for entry in buckets:
+            f.write(empty if entry is None else BUCKET.pack(*entry))
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, PACK_VERSION, 0, len(entries), len(buckets), index_offset))
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+def pack_store(store: SnapshotStore, path: str, compression: str = "none") -> int:
+    """将快照存储写入打包快照：API详情保存为清单，清单引用的子schema作为blob/<哈希>记录只写一次"""
+    def documents():
+        packed_blobs = set()
+        for key in store.keys():
+            data = store.read_blob(store.documents[key]["hash"])
+            yield key, data
+            if not key.startswith("detail/"):
+                continue
+            for digest in blob_refs(json.loads(data)):
+                if digest not in packed_blobs:
+                    packed_blobs.add(digest)
+                    yield blob_key(digest), store.read_blob(digest)
+
+    return pack(documents(), path, compression)
+
+
+class PackedSnapshot:
+    """只读打包快照，打开时只读取文件头，按键查找时才访问索引和解码对应记录"""
+
+    def __init__(self, path: str):
+        self.path = path
+        # 最近解码的API列表，按最近使用排序
+        self._apis: "OrderedDict[str, Any]" = OrderedDict()
+        # 最近解码的子schema，多个API详情引用同一子schema时共享同一个对象
+        self._blobs: "OrderedDict[str, Any]" = OrderedDict()
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"不是有效的打包快照: {path}")
+        try:
+            magic, version, _, self.records, self.buckets, self.index_offset = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"不是有效的打包快照: {path}")
+        self._mask = self.buckets - 1
+        self._decompressor = None
+
+    @classmethod
+    def from_env(cls) -> Optional["PackedSnapshot"]:
+        """根据API_SCAN_SNAPSHOT打开打包快照，未配置时返回None"""
+        path = os.environ.get("API_SCAN_SNAPSHOT")
+        return cls(path) if path else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """关闭文件，调用前应释放get_bytes返回的切片"""
+        self._apis.clear()
+        self._blobs.clear()
+        self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.records
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key.encode("utf-8")) is not None
+
+    def _bucket(self, slot: int) -> Tuple[int, int, int, int, int, int]:
+        return BUCKET.unpack_from(self._map, self.index_offset + slot * BUCKET.size)
+
+    def _find(self, encoded_key: bytes) -> Optional[Tuple[int, int, int]]:
+        """线性探测查找键，返回(值偏移, 值长度, 标志)"""
+        if not self.buckets:
+            return None
+        target = key_hash(encoded_key)
+        slot = target & self._mask
+        while True:
+            hashed, key_offset, value_offset, key_len, value_len, flags = self._bucket(slot)
+            if not key_len:
+                return None
+            if hashed == target and self._map[key_offset:key_offset + key_len] == encoded_key:
+                return value_offset, value_len, flags
+            slot = (slot + 1) & self._mask
+
+    def keys(self) -> Iterator[str]:
+        """遍历快照中的所有键（顺序不固定）"""
+        for slot in range(self.buckets):
+            _, key_offset, _, key_len, _, _ = self._bucket(slot)
+            if key_len:
+                yield self._map[key_offset:key_offset + key_len].decode("utf-8")
+
+    def get_bytes(self, key: str) -> Optional[memoryview]:
+        """返回记录的原始字节，未压缩时直接是mmap的切片，不复制数据"""
+        found = self._find(key.encode("utf-8"))
+        if found is None:
+            return None
+        value_offset, value_len, flags = found
+        view = memoryview(self._map)[value_offset:value_offset + value_len]
+        if flags & FLAG_ZSTD:
+            if self._decompressor is None:
+                zstd = _zstd()
+                if zstd is None:
+                    raise ValueError("快照使用zstd压缩，读取需要安装zstandard")
+                self._decompressor = zstd.ZstdDecompressor()
+            return memoryview(self._decompressor.decompress(view))
+        return view
+
+    def get(self, key: str) -> Any:
+        """解码记录，未找到时返回None；直接从切片解码为字符串，不先复制为bytes"""
+        view = self.get_bytes(key)
+        if view is None:
+            return None
+        with view:
+            return json.loads(str(view, "utf-8"))
+
+    def _get_apis(self, product_short: str) -> Optional[Dict[str, Any]]:
+        """返回产品的完整API列表，最近使用的列表保留解码结果"""
+        key = apis_key(product_short)
+        data = self._apis.get(key)
+        if data is not None:
+            self._apis.move_to_end(key)
+            return data
+        data = self.get(key)
+        if data is not None:
+            self._apis[key] = data
+            if len(self._apis) > APIS_MEMO_SIZE:
+                self._apis.popitem(last=False)
+        return data
+
+    def _get_blob(self, digest: str) -> Any:
+        """解码子schema记录，最近使用的结果保留BLOB_CACHE_SIZE个"""
+        data = self._blobs.get(digest)
+        if data is not None:
+            self._blobs.move_to_end(digest)
+            return data
+        data = self.get(blob_key(digest))
+        if data is None:
+            raise ValueError(f"快照中缺少子schema: {digest}")
+        self._blobs[digest] = data
+        if len(self._blobs) > BLOB_CACHE_SIZE:
+            self._blobs.popitem(last=False)
+        return data
+
+    def get_detail(self, product_short: str, api_name: str) -> Optional[Dict[str, Any]]:
+        """重组API详情，未找到时返回None；返回的子对象在多个详情间共享，调用方不应修改"""
+        manifest = self.get(detail_key(product_short, api_name))
+        return None if manifest is None else join_detail(manifest, self._get_blob)
+
+    def respond(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """按客户端的上游接口返回与API Explorer相同格式的数据"""
+        params = params or {}
+        if endpoint == "products":
+            data = self.get(PRODUCTS_KEY)
+            if data is None:
+                raise ValueError("快照中没有产品目录")
+            return data
+
+        if endpoint == "apis":
+            data = self._get_apis(params.get("product_short", ""))
+            if data is None:
+                # 与上游一致，未知产品返回空列表
+                return {"count": 0, "api_basic_infos": []}
+            offset = int(params.get("offset", 0))
+            limit = int(params.get("limit", len(data["api_basic_infos"])))
+            return {"count": data["count"], "api_basic_infos": data["api_basic_infos"][offset:offset + limit]}
+
+        if endpoint == "detail":
+            product_short, api_name = params.get("product_short", ""), params.get("name", "")
+            data = self.get_detail(product_short, api_name)
+            if data is None:
+                raise ValueError(f"快照中没有API详情: {product_short}/{api_name}")
+            return data
+
+        raise ValueError(f"快照不支持的接口: {endpoint}")
+
+    def info(self) -> Dict[str, Any]:
+        """返回记录数、哈希桶数和文件大小"""
+        return {
+            "records": self.records,
+            "buckets": self.buckets,
+            "file_bytes": len(self._map)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="华为云API文档打包快照")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = subparsers.add_parser("pack", help="将快照目录打包为单个只读文件")
+    pack_parser.add_argument("store", help="snapshot_store镜像的快照目录")
+    pack_parser.add_argument("output", help="输出的打包文件")
+    pack_parser.add_argument("--compression", choices=["none", "zstd"], default="none",
+                             help="逐条记录压缩，none时读取不复制数据（默认：none）")
+
+    info_parser = subparsers.add_parser("info", help="显示打包快照的信息")
+    info_parser.add_argument("path", help="打包文件")
+
+    args = parser.parse_args()
+    if args.command == "pack":
+        if not os.path.exists(os.path.join(args.store, "snapshot.json")):
+            parser.error(f"不是快照目录: {args.store}")
+        count = pack_store(SnapshotStore(args.store, compression="none"), args.output, args.compression)
+        print(f"✅ 已打包{count}条记录到: {args.output}")
+    else:
+        try:
+            with PackedSnapshot(args.path) as snapshot:
+                info = snapshot.info()
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"📊 记录{info['records']}条，哈希桶{info['buckets']}个，文件 {info['file_bytes'] / 1024 / 1024:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
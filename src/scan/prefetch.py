@@ -0,0 +1,134 @@
+"""后台缓存预热 - 服务启动后预加载产品目录和热门产品的API列表"""
+
+import asyncio
+import logging
+import os
+import sys
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from .product_index import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# 学习到的查询热度每个周期衰减的比例
+DECAY_FACTOR = 0.5
+
+
+def _env_list(name: str) -> List[str]:
+    """读取逗号分隔的环境变量列表"""
+    return [item.strip() for item in os.environ.get(name, "").split(",") if item.strip()]
+
+
+class PrefetchConfig:
+    """预热配置"""
+
+    def __init__(self, **data):
+        self.enabled = data.get('enabled', True)
+        # 启动时预热API列表的产品名称
+        self.hot_products = data.get('hot_products', [])
+        # 根据近期查询额外保持预热的产品数量
+        self.learn_top_n = data.get('learn_top_n', 5)
+        # 刷新周期（秒），应小于API列表缓存的过期时间
+        self.refresh_interval = data.get('refresh_interval', 1200.0)
+        # 同时预热的产品数量
+        self.concurrency = data.get('concurrency', 4)
+
+    @classmethod
+    def from_env(cls) -> "PrefetchConfig":
+        """从环境变量读取配置"""
+        return cls(
+            enabled=os.environ.get("API_SCAN_WARMUP", "1").lower() not in ("0", "false", "no", "off"),
+            hot_products=_env_list("API_SCAN_HOT_PRODUCTS"),
+            learn_top_n=int(os.environ.get("API_SCAN_PREFETCH_TOP", "5")),
+            refresh_interval=float(os.environ.get("API_SCAN_PREFETCH_INTERVAL", "1200")),
+            concurrency=int(os.environ.get("API_SCAN_PREFETCH_CONCURRENCY", "4"))
+        )
+
+
+class Prefetcher:
+    """后台预热器，启动时加载产品目录和热门产品，并根据近期查询保持常用产品的缓存"""
+
+    def __init__(self, get_client: Callable, config: Optional[PrefetchConfig] = None):
+        self.get_client = get_client
+        self.config = config or PrefetchConfig()
+        # 按规范化名称统计查询次数，同一产品的不同写法合并计数
+        self.query_counts = Counter()
+        # 规范化名称对应的最近一次查询写法，预热时用它查找产品
+        self.query_names: Dict[str, str] = {}
+        self._task = None
+
+    def record_query(self, product_name: Optional[str]):
+        """记录一次产品查询，用于学习需要保持预热的产品"""
+        key = normalize_name(product_name)
+        if key:
+            self.query_counts[key] += 1
+            self.query_names[key] = product_name
+
+    def products_to_warm(self) -> List[str]:
+        """返回本周期需要预热的产品：配置的热门产品加上近期查询最多的产品"""
+        products = list(self.config.hot_products)
+        seen = {normalize_name(product_name) for product_name in products}
+        for key, _ in self.query_counts.most_common(self.config.learn_top_n):
+            if key not in seen:
+                seen.add(key)
+                products.append(self.query_names[key])
+        return products
+
+    def _decay(self):
+        """衰减查询热度，使预热集合跟随近期查询变化"""
+        for key in list(self.query_counts):
+            count = self.query_counts[key] * DECAY_FACTOR
+            if count < 1:
+                del self.query_counts[key]
+                del self.query_names[key]
+            else:
+                self.query_counts[key] = count
+
+    async def warm_up(self, refresh: bool = False):
+        """加载产品目录和需要预热产品的API列表"""
+        client = self.get_client()
+        await client.get_products(refresh=refresh)
+
+        semaphore = asyncio.Semaphore(max(1, self.config.concurrency))
+
+        async def warm_product(product_name: str):
+            async with semaphore:
+                try:
+                    product_short = await client.find_product_short(product_name)
+                    if product_short:
+                        await client.get_all_apis(product_short, refresh=refresh)
+                except Exception as e:
+                    logger.warning(f"预热产品{product_name}失败: {e}")
+
+        await asyncio.gather(*(warm_product(name) for name in self.products_to_warm()))
+
+    async def run(self):
+        """执行启动预热，然后周期性刷新预热集合"""
+        refresh = False
+        while True:
+            try:
+                await self.warm_up(refresh=refresh)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"缓存预热失败: {e}", file=sys.stderr)
+
+            refresh = True
+            await asyncio.sleep(self.config.refresh_interval)
+            self._decay()
+
+    def start(self):
+        """在后台启动预热任务，不阻塞调用方"""
+        if self.config.enabled and self._task is None:
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        """停止后台预热任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
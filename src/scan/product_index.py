@@ -0,0 +1,127 @@
+"""产品名称索引 - 将产品名称、简称、描述关键词和别名统一规范化后映射到产品"""
+
+import json
+import logging
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, Optional, Tuple
+
+from .models import Product, ProductsResponse
+
+logger = logging.getLogger(__name__)
+
+# 规范化时忽略的字符：空白和各类括号，使“弹性云服务器 ECS”“弹性云服务器（ECS）”等写法得到相同的键
+IGNORED_CHARACTERS = re.compile(r"[\s()\[\]{}【】〔〕《》<>]+")
+
+# 产品描述中括号内的内容通常是英文全称或简称，如“弹性云服务器（Elastic Cloud Server，ECS）”
+DESCRIPTION_KEYWORD_PATTERN = re.compile(r"[（(]([^（）()]{2,80})[)）]")
+KEYWORD_SEPARATORS = re.compile(r"[，,、/;；]")
+
+# 内置的常用叫法，值为产品简称或产品名称；目录中不存在的目标会被忽略
+DEFAULT_ALIASES = {
+    "云服务器": "ECS",
+    "虚拟机": "ECS",
+    "云硬盘": "EVS",
+    "对象存储": "OBS",
+    "负载均衡": "ELB",
+    "k8s": "CCE",
+    "kubernetes": "CCE",
+    "云数据库": "RDS",
+}
+
+
+def normalize_name(text: str) -> str:
+    """规范化产品名称：全角转半角、忽略大小写、空白和括号"""
+    return IGNORED_CHARACTERS.sub("", unicodedata.normalize("NFKC", text or "").casefold())
+
+
+def load_aliases(value: Optional[str] = None) -> Dict[str, str]:
+    """读取别名表：API_SCAN_PRODUCT_ALIASES可以是JSON文件路径或JSON对象，与内置别名合并"""
+    aliases = dict(DEFAULT_ALIASES)
+    value = os.environ.get("API_SCAN_PRODUCT_ALIASES", "") if value is None else value
+    value = value.strip()
+    if not value:
+        return aliases
+
+    try:
+        if value.startswith("{"):
+            configured = json.loads(value)
+        else:
+            with open(value, 'r', encoding='utf-8') as f:
+                configured = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取产品别名表失败: {e}")
+        return aliases
+
+    if not isinstance(configured, dict):
+        logger.warning("产品别名表应为JSON对象，格式为 {\"别名\": \"产品简称或名称\"}")
+        return aliases
+    aliases.update({str(alias): str(target) for alias, target in configured.items()})
+    return aliases
+
+
+def description_keywords(description: Optional[str]) -> Iterable[str]:
+    """提取产品描述中括号内的英文全称、简称等关键词"""
+    for match in DESCRIPTION_KEYWORD_PATTERN.finditer(description or ""):
+        for keyword in KEYWORD_SEPARATORS.split(match.group(1)):
+            if keyword.strip():
+                yield keyword
+
+
+class ProductIndex:
+    """产品目录的查找索引，构建一次后按规范化的键O(1)解析用户输入"""
+
+    def __init__(self, products_response: ProductsResponse, aliases: Optional[Dict[str, str]] = None):
+        # 构建索引时使用的产品目录，目录对象变化时需要重建
+        self.catalog = products_response
+        self._entries: Dict[str, Product] = {}
+        self._build(aliases or {})
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _products(self) -> Iterable[Product]:
+        for group in self.catalog.groups:
+            yield from group.products
+
+    def _add(self, key: str, product: Product):
+        # 按优先级依次加入，先加入的写法不会被后面的覆盖
+        key = normalize_name(key)
+        if key:
+            self._entries.setdefault(key, product)
+
+    def _build(self, aliases: Dict[str, str]):
+        """按优先级加入：产品名称、简称、名称与简称的组合、别名、描述关键词"""
+        products = list(self._products())
+        for product in products:
+            self._add(product.name, product)
+        for product in products:
+            self._add(product.productshort, product)
+        for product in products:
+            if product.name and product.productshort:
+                self._add(f"{product.name}{product.productshort}", product)
+                self._add(f"{product.productshort}{product.name}", product)
+
+        for alias, target in aliases.items():
+            product = self._entries.get(normalize_name(target))
+            if product is None:
+                logger.debug(f"产品别名{alias}的目标{target}不在产品目录中，已忽略")
+                continue
+            self._add(alias, product)
+
+        # 同一关键词出现在多个产品的描述中时无法确定产品，不加入索引
+        keyword_products: Dict[str, Tuple[Product, bool]] = {}
+        for product in products:
+            for keyword in description_keywords(product.description):
+                key = normalize_name(keyword)
+                previous = keyword_products.get(key)
+                unique = previous is None or previous[0] is product
+                keyword_products[key] = (product, unique and (previous is None or previous[1]))
+        for key, (product, unique) in keyword_products.items():
+            if unique:
+                self._add(key, product)
+
+    def resolve(self, text: str) -> Optional[Product]:
+        """将用户输入的产品名称、简称或别名解析为产品，未找到时返回None"""
+        return self._entries.get(normalize_name(text))
@@ -0,0 +1,235 @@
+"""请求级性能剖析 - 按请求或导出任务采集cProfile/pyinstrument剖析结果，只保留慢请求"""
+
+import asyncio
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+# 按文件路径或函数名归类自身耗时，用于判断热点属于哪一类开销
+CATEGORIES = (
+    ("io_wait", ("select.epoll", "select.kqueue", "select.select", "selectors.py", "_overlapped")),
+    ("network", ("httpx", "httpcore", "h11", "h2", "anyio", "ssl", "socket")),
+    ("json", ("json",)),
+    ("yaml", ("yaml",)),
+    ("models", ("scan/models.py", "scan\\models.py")),
+)
+
+# 剖析报告中列出的函数数量
+REPORT_LIMIT = 40
+
+# 当前正在剖析的cProfile剖析器，请求中启动的任务继承此值
+_PROFILE: contextvars.ContextVar[Optional[cProfile.Profile]] = contextvars.ContextVar("request_profile", default=None)
+
+
+def _sampling_profiler_class():
+    """导入pyinstrument采样剖析器，未安装时返回None"""
+    try:
+        from pyinstrument import Profiler
+    except ImportError:  # pyinstrument为可选依赖
+        return None
+    return Profiler
+
+
+def _categorize(filename: str, function_name: str) -> str:
+    """根据文件路径和函数名归类"""
+    target = f"{filename}:{function_name}"
+    for category, patterns in CATEGORIES:
+        if any(pattern in target for pattern in patterns):
+            return category
+    return "other"
+
+
+class _Scoped:
+    """逐步驱动协程，只在协程自身执行时启用cProfile，挂起等待期间其他请求的执行不计入"""
+
+    def __init__(self, coro, profiler: cProfile.Profile, is_active: Callable[[], bool]):
+        self._coro = coro
+        self._profiler = profiler
+        self._is_active = is_active
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            # 请求结束后仍在运行的后台任务不再计入
+            active = self._is_active()
+            if active:
+                self._profiler.enable()
+            try:
+                if error is not None:
+                    future = self._coro.throw(error)
+                else:
+                    future = self._coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                if active:
+                    self._profiler.disable()
+            try:
+                value, error = (yield future), None
+            except GeneratorExit:
+                self._coro.close()
+                raise
+            except BaseException as e:
+                value, error = None, e
+
+
+async def _scoped(coro, profiler: cProfile.Profile, is_active: Callable[[], bool]) -> Any:
+    return await _Scoped(coro, profiler, is_active)
+
+
+def _safe_label(label: str) -> str:
+    return re.sub(r"[^0-9A-Za-z_.-]+", "_", label).strip("_")[:80] or "request"
+
+
+class RequestProfiler:
+    """对单个请求或导出任务进行剖析，耗时超过阈值时将结果写入目录"""
+
+    def __init__(self, output_dir: str, slow_ms: float = 0.0, engine: str = "auto"):
+        self.output_dir = output_dir
+        self.slow_ms = slow_ms
+        self.sampling_profiler = _sampling_profiler_class() if engine in ("auto", "pyinstrument") else None
+        if engine == "auto":
+            engine = "pyinstrument" if self.sampling_profiler is not None else "cprofile"
+        if engine == "pyinstrument" and self.sampling_profiler is None:
+            print("未安装pyinstrument，改用cProfile", file=sys.stderr)
+            engine = "cprofile"
+        self.engine = engine
+        # cProfile同一时刻只能有一个剖析器生效，并发请求中只剖析第一个
+        self._active = False
+        self.captured = 0
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["RequestProfiler"]:
+        """根据API_SCAN_PROFILE_DIR等环境变量创建剖析器，未配置时返回None"""
+        output_dir = os.environ.get("API_SCAN_PROFILE_DIR")
+        if not output_dir:
+            return None
+        return cls(
+            output_dir,
+            slow_ms=float(os.environ.get("API_SCAN_PROFILE_SLOW_MS", "0")),
+            engine=os.environ.get("API_SCAN_PROFILER", "auto")
+        )
+
+    def _start(self):
+        if self.engine == "pyinstrument":
+            profiler = self.sampling_profiler(async_mode="enabled")
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def _stop(self, profiler):
+        if self.engine == "pyinstrument":
+            profiler.stop()
+        else:
+            profiler.disable()
+
+    async def run(self, label: str, func: Callable, *args, **kwargs) -> Any:
+        """剖析一次异步调用；cProfile只在本请求及其启动的任务执行时启用，等待期间不计入"""
+        if self._active:
+            return await func(*args, **kwargs)
+
+        self._active = True
+        started = time.perf_counter()
+        if self.engine == "pyinstrument":
+            # 采样剖析器的异步模式按调用栈归属，等待时间记在await处
+            profiler = self._start()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self._stop(profiler)
+                self._active = False
+                self._maybe_write(label, profiler, time.perf_counter() - started)
+
+        profiler = cProfile.Profile()
+        loop = asyncio.get_running_loop()
+        previous_factory = loop.get_task_factory()
+
+        running = True
+
+        def is_active() -> bool:
+            return running
+
+        def task_factory(loop, coro, **kwargs):
+            # 在本请求的上下文中创建的任务同样逐步剖析
+            if _PROFILE.get() is profiler:
+                coro = _scoped(coro, profiler, is_active)
+            if previous_factory is not None:
+                return previous_factory(loop, coro, **kwargs)
+            return asyncio.Task(coro, loop=loop, **kwargs)
+
+        loop.set_task_factory(task_factory)
+        reset = _PROFILE.set(profiler)
+        try:
+            return await _Scoped(func(*args, **kwargs), profiler, is_active)
+        finally:
+            running = False
+            _PROFILE.reset(reset)
+            if loop.get_task_factory() is task_factory:
+                loop.set_task_factory(previous_factory)
+            self._active = False
+            self._maybe_write(label, profiler, time.perf_counter() - started)
+
+    def run_sync(self, label: str, func: Callable, *args, **kwargs) -> Any:
+        """剖析一次同步调用"""
+        if self._active:
+            return func(*args, **kwargs)
+
+        self._active = True
+        profiler = self._start()
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._stop(profiler)
+            self._active = False
+            self._maybe_write(label, profiler, time.perf_counter() - started)
+
+    def _maybe_write(self, label: str, profiler, elapsed: float):
+        """耗时达到阈值时写入剖析结果"""
+        elapsed_ms = elapsed * 1000
+        if elapsed_ms < self.slow_ms:
+            return
+
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        base = os.path.join(self.output_dir, f"{timestamp}_{_safe_label(label)}_{elapsed_ms:.0f}ms")
+        try:
+            if self.engine == "pyinstrument":
+                with open(f"{base}.html", 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+                report = profiler.output_text(unicode=True, color=False)
+            else:
+                profiler.dump_stats(f"{base}.prof")
+                report = self._cprofile_report(profiler, label, elapsed_ms)
+            with open(f"{base}.txt", 'w', encoding='utf-8') as f:
+                f.write(report)
+            self.captured += 1
+        except Exception as e:
+            print(f"写入剖析结果失败: {e}", file=sys.stderr)
+
+    def _cprofile_report(self, profiler: cProfile.Profile, label: str, elapsed_ms: float) -> str:
+        """生成包含耗时分类汇总和热点函数的文本报告"""
+        stats = pstats.Stats(profiler)
+        by_category: Dict[str, float] = {}
+        for (filename, _, function_name), (_, _, own_time, _, _) in stats.stats.items():
+            category = _categorize(filename, function_name)
+            by_category[category] = by_category.get(category, 0.0) + own_time
+
+        output = io.StringIO()
+        output.write(f"请求: {label}\n总耗时: {elapsed_ms:.1f}ms\n\n按类别统计的自身耗时:\n")
+        for category, own_time in sorted(by_category.items(), key=lambda item: item[1], reverse=True):
+            output.write(f"  {category:<10} {own_time * 1000:>10.1f}ms\n")
+        output.write("\n")
+
+        stats.stream = output
+        stats.sort_stats("cumulative").print_stats(REPORT_LIMIT)
+        return output.getvalue()
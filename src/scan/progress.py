@@ -0,0 +1,88 @@
+"""进度通知 - 调用方在请求中提供progressToken时，按节流间隔发送MCP notifications/progress"""
+
+import contextlib
+import contextvars
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+from .metrics import metrics
+
+# 两次进度通知的最短间隔（秒），可通过API_SCAN_PROGRESS_INTERVAL调整；完成时的通知不受限制
+PROGRESS_INTERVAL = 0.25
+
+# 各阶段的名称：分页获取API列表、获取API详情、导出API详情
+PAGES = "pages"
+DETAILS = "details"
+EXPORTS = "exports"
+
+# 当前会话写出一行JSON-RPC消息的函数，stdio模式写到stdout，守护进程模式写回对应连接
+NOTIFIER: contextvars.ContextVar[Optional[Callable[[str], Awaitable[None]]]] = \
+    contextvars.ContextVar("progress_notifier", default=None)
+_REPORTER: contextvars.ContextVar[Optional["ProgressReporter"]] = \
+    contextvars.ContextVar("progress_reporter", default=None)
+
+
+class ProgressReporter:
+    """一次工具调用的进度，只上报指定阶段，进度值严格递增"""
+
+    def __init__(self, token: Any, phase: str, notify: Callable[[str], Awaitable[None]],
+                 interval: float = PROGRESS_INTERVAL):
+        self.token = token
+        self.phase = phase
+        self.notify = notify
+        self.interval = interval
+        self.sent = 0
+        # 工具调用返回后不再发送，避免后台继续进行的加载在响应之后发出通知
+        self.closed = False
+        self._last_progress = 0
+        # 首次进度总是发送
+        self._last_sent = float("-inf")
+
+    async def update(self, phase: str, progress: int, total: Optional[int] = None, message: Optional[str] = None):
+        """记录进度，未到节流间隔且未完成时不发送"""
+        if self.closed or phase != self.phase or progress <= self._last_progress:
+            return
+        now = time.monotonic()
+        finished = total is not None and progress >= total
+        if not finished and now - self._last_sent < self.interval:
+            return
+
+        params = {"progressToken": self.token, "progress": progress}
+        if total is not None:
+            params["total"] = total
+        if message:
+            params["message"] = message
+        self._last_progress = progress
+        self._last_sent = now
+        self.sent += 1
+        metrics.inc("progress_notifications_total", phase=phase)
+        await self.notify(json.dumps({"jsonrpc": "2.0", "method": "notifications/progress", "params": params},
+                                     ensure_ascii=False))
+
+
+@contextlib.contextmanager
+def tracking(params: Optional[dict], phase: Optional[str]) -> Iterator[Optional[ProgressReporter]]:
+    """请求的_meta中带有progressToken且当前会话可以发送通知时，在此范围内上报指定阶段的进度"""
+    token = ((params or {}).get("_meta") or {}).get("progressToken")
+    notify = NOTIFIER.get()
+    if token is None or phase is None or notify is None:
+        yield None
+        return
+
+    interval = float(os.environ.get("API_SCAN_PROGRESS_INTERVAL", PROGRESS_INTERVAL))
+    reporter = ProgressReporter(token, phase, notify, interval)
+    reset = _REPORTER.set(reporter)
+    try:
+        yield reporter
+    finally:
+        reporter.closed = True
+        _REPORTER.reset(reset)
+
+
+async def report(phase: str, progress: int, total: Optional[int] = None, message: Optional[str] = None):
+    """上报当前工具调用的进度，调用方未请求进度时不做任何事"""
+    reporter = _REPORTER.get()
+    if reporter is not None:
+        await reporter.update(phase, progress, total, message)
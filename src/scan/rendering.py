@@ -0,0 +1,159 @@
+"""工具结果渲染 - 摘要优先、分段获取与基于游标的分页"""
+
+import base64
+import hashlib
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+# 单次工具调用返回文本的默认字节预算及上限
+DEFAULT_MAX_BYTES = 16 * 1024
+MIN_MAX_BYTES = 1024
+MAX_MAX_BYTES = 256 * 1024
+
+# API列表每页默认条数及上限
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# API详情可单独获取的分段，值为详情中可能承载该分段的顶层字段
+DETAIL_SECTIONS = {
+    "request": (
+        "uri", "method", "request", "request_params", "requestBody", "request_body",
+        "parameters", "path_params", "query_params", "header_params", "body"
+    ),
+    "response": (
+        "response", "responses", "response_params", "response_body", "status_codes"
+    ),
+    "definitions": ("definitions", "components"),
+}
+
+SECTION_NAMES = ["summary", "request", "response", "definitions", "full"]
+
+# 摘要中单个字段值的最大显示长度
+SUMMARY_VALUE_LIMIT = 200
+SUMMARY_KEYS_LIMIT = 10
+
+
+def encode_cursor(kind: str, offset: int, **extra) -> str:
+    """生成不透明的分页游标"""
+    state = {"k": kind, "o": offset}
+    state.update(extra)
+    raw = json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """请求参数的短摘要，写入游标使其只能用于生成它的请求"""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def decode_cursor(cursor: Optional[str], kind: str, **expected) -> int:
+    """解析分页游标并返回偏移量，游标为空时返回0"""
+    if not cursor:
+        return 0
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        offset = int(state["o"])
+    except Exception:
+        raise ValueError(f"无效的分页游标: {cursor}")
+
+    if state.get("k") != kind or offset < 0:
+        raise ValueError(f"分页游标与当前请求不匹配: {cursor}")
+    for key, value in expected.items():
+        if state.get(key) != value:
+            raise ValueError(f"分页游标与当前请求不匹配: {cursor}")
+
+    return offset
+
+
+def clamp_int(value: Any, default: int, minimum: int, maximum: int) -> int:
+    """将用户传入的数值参数限制在合法范围内"""
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(minimum, min(maximum, value))
+
+
+def paginate_lines(lines: List[str], offset: int, max_bytes: int,
+                   max_items: Optional[int] = None) -> Tuple[List[str], Optional[int]]:
+    """从offset开始截取不超过字节预算的行，返回本页内容和下一页偏移量"""
+    page = []
+    used = 0
+    index = offset
+
+    while index < len(lines):
+        if max_items is not None and len(page) >= max_items:
+            break
+        size = len(lines[index].encode("utf-8")) + 1
+        # 每页至少返回一行，避免单行超过预算时无法前进
+        if page and used + size > max_bytes:
+            break
+        page.append(lines[index])
+        used += size
+        index += 1
+
+    next_offset = index if index < len(lines) else None
+    return page, next_offset
+
+
+def _short_value(value: Any) -> str:
+    """生成字段值的紧凑描述"""
+    if isinstance(value, dict):
+        keys = list(value.keys())
+        preview = ", ".join(str(k) for k in keys[:SUMMARY_KEYS_LIMIT])
+        if len(keys) > SUMMARY_KEYS_LIMIT:
+            preview += ", ..."
+        return f"{{{len(keys)}个字段: {preview}}}"
+    if isinstance(value, list):
+        return f"[{len(value)}项]"
+
+    text = str(value).replace("\n", " ")
+    if len(text) > SUMMARY_VALUE_LIMIT:
+        text = text[:SUMMARY_VALUE_LIMIT] + "..."
+    return text
+
+
+def summarize_detail(api_detail: Dict[str, Any]) -> List[str]:
+    """生成API详情的紧凑摘要行"""
+    if not isinstance(api_detail, dict):
+        return [_short_value(api_detail)]
+    return [f"- {key}: {_short_value(value)}" for key, value in api_detail.items()]
+
+
+def detail_section(api_detail: Dict[str, Any], section: str) -> Dict[str, Any]:
+    """提取API详情中的指定分段"""
+    if section == "full" or not isinstance(api_detail, dict):
+        return api_detail
+    if section not in DETAIL_SECTIONS:
+        raise ValueError(f"不支持的分段: {section}，可选值: {', '.join(SECTION_NAMES)}")
+    return {key: api_detail[key] for key in DETAIL_SECTIONS[section] if key in api_detail}
+
+
+def section_lines(data: Any) -> List[str]:
+    """将分段数据渲染为可按行分页的JSON文本"""
+    return json.dumps(data, ensure_ascii=False, indent=2).split("\n")
+
+
+def next_page_hint(cursor: str) -> str:
+    """生成获取下一页的提示"""
+    return f"\n\n⏭️ 内容未完，使用参数 cursor='{cursor}' 获取下一页"
+
+
+def text_result(text: str, next_cursor: Optional[str] = None) -> Dict[str, Any]:
+    """构建MCP工具调用结果"""
+    result = {
+        "content": [
+            {
+                "type": "text",
+                "text": text
+            }
+        ]
+    }
+    if next_cursor:
+        result["_meta"] = {"nextCursor": next_cursor}
+    return result
@@ -0,0 +1,395 @@
+"""快照存储 - 按内容寻址保存产品目录、API列表和API详情，详情中重复的子schema只存储一次"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .cache import TTLCache, MemoryAccountant, estimate_size
+
+# 快照索引文件名及格式版本
+INDEX_FILENAME = "snapshot.json"
+SNAPSHOT_FORMAT = 1
+
+# API详情中这些顶层字段的每个子项单独存储，如definitions下的每个定义、responses下的每个状态码
+SPLIT_FIELDS = ("definitions", "responses", "components")
+
+# 序列化后小于该字节数的子schema直接内联在详情中，避免产生大量小文件
+MIN_BLOB_BYTES = 128
+
+# 详情中引用子schema的占位对象的键
+BLOB_REF = "$blob"
+
+# zstd压缩级别
+ZSTD_LEVEL = 3
+
+# 读取快照时保留的已解码blob数，超出后淘汰最久未使用的
+BLOB_CACHE_SIZE = 4096
+
+# 客户端子schema池的最大条目数
+BLOB_POOL_SIZE = 16384
+
+
+def _zstd():
+    """导入zstandard，未安装时返回None"""
+    try:
+        import zstandard
+    except ImportError:  # zstandard为可选依赖
+        return None
+    return zstandard
+
+
+def canonical_json(data: Any) -> bytes:
+    """按键排序的紧凑JSON，内容相同的对象得到相同的字节"""
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def detail_key(product_short: str, api_name: str) -> str:
+    return f"detail/{product_short}/{api_name}"
+
+
+def apis_key(product_short: str) -> str:
+    return f"apis/{product_short}"
+
+
+def blob_key(digest: str) -> str:
+    return f"blob/{digest}"
+
+
+PRODUCTS_KEY = "products"
+
+
+def split_detail(detail: Dict[str, Any], ref: Callable[[Any], Any]) -> Dict[str, Any]:
+    """按字段拆分API详情：各顶层字段和definitions等字段的子项分别交给ref处理"""
+    manifest = {}
+    for key, value in detail.items():
+        if key in SPLIT_FIELDS and isinstance(value, dict):
+            manifest[key] = {name: ref(child) for name, child in value.items()}
+        else:
+            manifest[key] = ref(value)
+    return manifest
+
+
+def join_detail(manifest: Dict[str, Any], get_blob: Callable[[str], Any]) -> Dict[str, Any]:
+    """将split_detail得到的清单重组为API详情，blob引用替换为get_blob返回的对象"""
+    def resolve(value: Any) -> Any:
+        if isinstance(value, dict) and len(value) == 1 and BLOB_REF in value:
+            return get_blob(value[BLOB_REF])
+        return value
+
+    detail = {}
+    for key, value in manifest.items():
+        if key in SPLIT_FIELDS and isinstance(value, dict):
+            detail[key] = {name: resolve(child) for name, child in value.items()}
+        else:
+            detail[key] = resolve(value)
+    return detail
+
+
+def blob_refs(manifest: Dict[str, Any]) -> Iterator[str]:
+    """产出清单中引用的blob哈希"""
+    for key, value in manifest.items():
+        children = value.values() if key in SPLIT_FIELDS and isinstance(value, dict) else (value,)
+        for child in children:
+            if isinstance(child, dict) and len(child) == 1 and BLOB_REF in child:
+                yield child[BLOB_REF]
+
+
+class BlobPool(TTLCache):
+    """客户端的子schema池：内容相同的子对象在多个API详情间共享同一个对象，池本身计入共享内存预算"""
+
+    def __init__(self, max_entries: int = BLOB_POOL_SIZE, accountant: Optional[MemoryAccountant] = None):
+        super().__init__(float("inf"), max_entries=max_entries, accountant=accountant, name="blobs")
+        # 池中对象的id，估算详情大小时跳过这些共享对象
+        self._ids: Dict[int, str] = {}
+
+    def set(self, key: str, value: Any, size: Optional[int] = None):
+        super().set(key, value, size)
+        if key in self._data:
+            self._ids[id(value)] = key
+
+    def _remove(self, key):
+        entry = super()._remove(key)
+        if entry is not None:
+            self._ids.pop(id(entry[1]), None)
+        return entry
+
+    def intern(self, value: Any) -> Any:
+        """返回与value内容相同的共享对象，池中没有时放入池中"""
+        if not isinstance(value, (dict, list)):
+            return value
+        encoded = canonical_json(value)
+        if len(encoded) < MIN_BLOB_BYTES:
+            return value
+        digest = hashlib.sha256(encoded).hexdigest()
+        shared = self.get(digest)
+        if shared is None:
+            self.set(digest, value)
+            return value
+        return shared
+
+    def intern_detail(self, detail: Dict[str, Any]) -> Dict[str, Any]:
+        """将API详情中较大的子schema替换为池中的共享对象"""
+        return split_detail(detail, self.intern)
+
+    def unshared_size(self, value: Any) -> int:
+        """估算value中不属于池的部分占用的字节数，共享的子schema已计入池"""
+        # 池淘汰仍被详情引用的对象后，该对象不再计入预算，直到引用它的详情也被淘汰
+        return estimate_size(value, skip=self._ids)
+
+
+class SnapshotStore:
+    """按内容寻址的快照目录：blobs下按sha256保存去重后的JSON对象，snapshot.json记录各文档对应的blob"""
+
+    def __init__(self, root: str, compression: str = "auto", level: int = ZSTD_LEVEL):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        zstd = _zstd() if compression in ("auto", "zstd") else None
+        if compression == "zstd" and zstd is None:
+            print("未安装zstandard，快照不压缩", file=sys.stderr)
+        self.compression = "zstd" if zstd is not None else "none"
+        self._compressor = zstd.ZstdCompressor(level=level) if zstd is not None else None
+        self._decompressor = None
+        # 读取时已解码的blob，多个详情引用同一子schema时共享同一个对象；按最近使用排序，最多保留BLOB_CACHE_SIZE个
+        self._blobs: "OrderedDict[str, Any]" = OrderedDict()
+        # 本实例写入或确认过已存在的blob，写入时只记录哈希，镜像大量详情时内存不随之增长
+        self._written = set()
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+        index_path = os.path.join(root, INDEX_FILENAME)
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get("format") != SNAPSHOT_FORMAT:
+                raise ValueError(f"不支持的快照格式: {index.get('format')}")
+            self.documents = index.get("documents", {})
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.documents
+
+    def keys(self) -> List[str]:
+        return list(self.documents)
+
+    def _blob_path(self, digest: str, compressed: bool) -> str:
+        suffix = ".json.zst" if compressed else ".json"
+        return os.path.join(self.blob_dir, digest[:2], digest[2:] + suffix)
+
+    def _put_blob(self, data: Any, encoded: Optional[bytes] = None) -> str:
+        """保存一个JSON对象并返回其sha256，已存在的内容不重复写入"""
+        encoded = canonical_json(data) if encoded is None else encoded
+        digest = hashlib.sha256(encoded).hexdigest()
+        if digest in self._written:
+            return digest
+
+        compressed = self._compressor is not None
+        path = self._blob_path(digest, compressed)
+        if not os.path.exists(path) and not os.path.exists(self._blob_path(digest, not compressed)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(self._compressor.compress(encoded) if compressed else encoded)
+            os.replace(tmp_path, path)
+        self._written.add(digest)
+        return digest
+
+    def read_blob(self, digest: str) -> bytes:
+        """读取blob解压后的JSON字节"""
+        path = self._blob_path(digest, False)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        with open(self._blob_path(digest, True), 'rb') as f:
+            raw = f.read()
+        if self._decompressor is None:
+            zstd = _zstd()
+            if zstd is None:
+                raise ValueError("快照使用zstd压缩，读取需要安装zstandard")
+            self._decompressor = zstd.ZstdDecompressor()
+        return self._decompressor.decompress(raw)
+
+    def _get_blob(self, digest: str) -> Any:
+        """读取并解码blob，最近使用的结果在本实例内共享"""
+        data = self._blobs.get(digest)
+        if data is not None:
+            self._blobs.move_to_end(digest)
+            return data
+
+        data = self._blobs[digest] = json.loads(self.read_blob(digest))
+        if len(self._blobs) > BLOB_CACHE_SIZE:
+            self._blobs.popitem(last=False)
+        return data
+
+    def _ref_or_inline(self, value: Any) -> Any:
+        """较大的对象替换为blob引用，较小的值原样内联"""
+        if not isinstance(value, (dict, list)):
+            return value
+        encoded = canonical_json(value)
+        if len(encoded) < MIN_BLOB_BYTES:
+            return value
+        return {BLOB_REF: self._put_blob(value, encoded)}
+
+    def _put_document(self, key: str, data: Any, manifest: Any):
+        digest = self._put_blob(manifest)
+        if self.documents.get(key, {}).get("hash") != digest:
+            self.documents[key] = {"hash": digest, "size": len(canonical_json(data))}
+            self._dirty = True
+
+    def put_detail(self, product_short: str, api_name: str, detail: Dict[str, Any]):
+        """拆分并保存API详情：各顶层字段和definitions等字段的子项分别按内容寻址保存"""
+        self._put_document(detail_key(product_short, api_name), detail, split_detail(detail, self._ref_or_inline))
+
+    def get_manifest(self, product_short: str, api_name: str) -> Optional[Dict[str, Any]]:
+        """返回API详情的清单，子schema为blob引用，未保存时返回None"""
+        entry = self.documents.get(detail_key(product_short, api_name))
+        return None if entry is None else json.loads(self.read_blob(entry["hash"]))
+
+    def get_detail(self, product_short: str, api_name: str) -> Optional[Dict[str, Any]]:
+        """重组API详情，未保存时返回None；返回的子对象在多个详情间共享，调用方不应修改"""
+        manifest = self.get_manifest(product_short, api_name)
+        return None if manifest is None else join_detail(manifest, self._get_blob)
+
+    def put_products(self, products: Dict[str, Any]):
+        """保存产品目录（/v5/products的响应）"""
+        self._put_document(PRODUCTS_KEY, products, products)
+
+    def get_products(self) -> Optional[Dict[str, Any]]:
+        entry = self.documents.get(PRODUCTS_KEY)
+        return None if entry is None else self._get_blob(entry["hash"])
+
+    def put_apis(self, product_short: str, apis: Dict[str, Any]):
+        """保存产品的完整API列表，格式与/v3/apis的响应相同"""
+        self._put_document(apis_key(product_short), apis, apis)
+
+    def get_apis(self, product_short: str) -> Optional[Dict[str, Any]]:
+        entry = self.documents.get(apis_key(product_short))
+        return None if entry is None else self._get_blob(entry["hash"])
+
+    def flush(self):
+        """写入快照索引"""
+        if not self._dirty:
+            return
+        index_path = os.path.join(self.root, INDEX_FILENAME)
+        index = {"format": SNAPSHOT_FORMAT, "compression": self.compression, "documents": self.documents}
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, index_path)
+        self._dirty = False
+
+    def stats(self) -> Dict[str, Any]:
+        """返回文档数、blob数、原始JSON总大小和实际占用的磁盘空间"""
+        blobs = 0
+        compressed_blobs = 0
+        stored_bytes = 0
+        for directory, _, filenames in os.walk(self.blob_dir):
+            for filename in filenames:
+                if filename.endswith((".json", ".json.zst")):
+                    blobs += 1
+                    compressed_blobs += filename.endswith(".zst")
+                    stored_bytes += os.path.getsize(os.path.join(directory, filename))
+        logical_bytes = sum(entry["size"] for entry in self.documents.values())
+        return {
+            "documents": len(self.documents),
+            "blobs": blobs,
+            "compressed_blobs": compressed_blobs,
+            "logical_bytes": logical_bytes,
+            "stored_bytes": stored_bytes,
+            "ratio": round(logical_bytes / stored_bytes, 2) if stored_bytes else 0.0
+        }
+
+
+async def mirror(client, store: SnapshotStore, product_shorts: Optional[List[str]] = None,
+                 details: bool = True, concurrency: int = 8) -> Dict[str, int]:
+    """通过API客户端获取产品目录、API列表和API详情并写入快照，返回各类文档的数量"""
+    counts = {"products": 0, "apis": 0, "details": 0, "failed": 0}
+    products = await client.get_products()
+    store.put_products(products.model_dump())
+    if product_shorts is None:
+        product_shorts = [product.productshort for group in products.groups for product in group.products]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def mirror_detail(product_short: str, api_name: str):
+        try:
+            async with semaphore:
+                detail = await client.get_api_detail(product_short, api_name)
+            store.put_detail(product_short, api_name, detail)
+            counts["details"] += 1
+        except Exception as e:
+            counts["failed"] += 1
+            print(f"  ❌ {product_short}/{api_name}: {e}", file=sys.stderr)
+
+    async def mirror_product(product_short: str):
+        try:
+            async with semaphore:
+                apis = await client.get_all_apis(product_short)
+        except Exception as e:
+            counts["failed"] += 1
+            print(f"  ❌ {product_short}: {e}", file=sys.stderr)
+            return
+        store.put_apis(product_short, {"count": len(apis), "api_basic_infos": [api.model_dump() for api in apis]})
+        counts["apis"] += 1
+        print(f"  📦 {product_short}: {len(apis)}个API")
+        if details:
+            await asyncio.gather(*(mirror_detail(product_short, api.name) for api in apis))
+
+    await asyncio.gather(*(mirror_product(product_short) for product_short in product_shorts))
+    counts["products"] = len(product_shorts)
+    store.flush()
+    return counts
+
+
+def _format_stats(stats: Dict[str, Any]) -> str:
+    return (f"文档{stats['documents']}个，blob{stats['blobs']}个（zstd压缩{stats['compressed_blobs']}个），"
+            f"原始JSON {stats['logical_bytes'] / 1024 / 1024:.1f}MB，"
+            f"占用 {stats['stored_bytes'] / 1024 / 1024:.1f}MB（{stats['ratio']}倍）")
+
+
+async def _mirror_cli(args: argparse.Namespace):
+    from .client import HuaweiCloudApiClient
+    with SnapshotStore(args.root, args.compression) as store:
+        async with HuaweiCloudApiClient() as client:
+            print(f"🔍 正在镜像到: {args.root}")
+            counts = await mirror(client, store, args.product, not args.no_details, args.concurrency)
+        print(f"✅ 产品{counts['products']}个，API列表{counts['apis']}个，API详情{counts['details']}个，"
+              f"失败{counts['failed']}个")
+        print(f"📊 {_format_stats(store.stats())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="华为云API文档快照存储")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    mirror_parser = subparsers.add_parser("mirror", help="镜像产品目录、API列表和API详情到快照目录")
+    mirror_parser.add_argument("root", help="快照目录")
+    mirror_parser.add_argument("--product", action="append", help="只镜像指定的产品简称，可重复指定（默认：全部产品）")
+    mirror_parser.add_argument("--no-details", action="store_true", help="只镜像产品目录和API列表")
+    mirror_parser.add_argument("--concurrency", type=int, default=8, help="并发请求数（默认：8）")
+    mirror_parser.add_argument("--compression", choices=["auto", "zstd", "none"], default="auto",
+                               help="blob压缩方式，auto在安装了zstandard时使用zstd（默认：auto）")
+
+    stats_parser = subparsers.add_parser("stats", help="显示快照的去重和压缩统计")
+    stats_parser.add_argument("root", help="快照目录")
+
+    args = parser.parse_args()
+    if args.command == "mirror":
+        asyncio.run(_mirror_cli(args))
+    else:
+        if not os.path.exists(os.path.join(args.root, INDEX_FILENAME)):
+            parser.error(f"不是快照目录: {args.root}")
+        print(f"📊 {_format_stats(SnapshotStore(args.root, compression='none').stats())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,35 @@
 """YAML导出工具 - 将华为云API信息导出为YAML文件"""
 
 import yaml
+import hashlib
 import json
 import os
+import re
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import asyncio
-from .client import HuaweiCloudApiClient
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from .client import HuaweiCloudApiClient, BATCH_CONCURRENCY
+from .profiling import RequestProfiler
+from . import progress
+
+# 所有YAML文件共用的序列化选项
+YAML_DUMP_OPTIONS = {
+    "default_flow_style": False,
+    "allow_unicode": True,
+    "sort_keys": False,
+    "indent": 2
+}
+
+# yaml.dump默认的最大行宽
+YAML_WIDTH = 80
+
+# 多进程导出时每个任务序列化的API数量，减少进程间通信次数
+EXPORT_BATCH_SIZE = 8
+
+# 按API分文件导出时的索引文件名
+API_INDEX_FILENAME = "index.json"
 
 
 class YamlExporter:
@@ -125,7 +148,7 @@ class YamlExporter:
     
     def export_products_to_yaml(self, products_data: Dict[str, Any], filename: str = "huawei_cloud_products.yml") -> str:
         """导出产品列表为YAML文件"""
-        output_path = os.path.join(self.output_dir, filename)
+        output_path = self.output_path(filename)
         
         # 构建YAML数据结构
         yaml_data = self.generate_yaml_header(
@@ -171,11 +194,9 @@ class YamlExporter:
             if apis_data and len(apis_data) > 0:
                 product_short = apis_data[0].get("product_short", "unknown")
             
-            # 清理文件名中的特殊字符
-            safe_product_short = product_short.replace(" ", "_").replace("/", "_").replace("-", "_")
-            filename = f"{safe_product_short}_apis.yml"
+            filename = f"{self.safe_filename_part(product_short)}_apis.yml"
         
-        output_path = os.path.join(self.output_dir, filename)
+        output_path = self.output_path(filename)
         
         # 构建YAML数据结构
         yaml_data = self.generate_yaml_header(
@@ -228,13 +249,10 @@ class YamlExporter:
             api_detail = api_info.get("api_detail", {})
             api_name = api_detail.get("name", "unknown")
             
-            # 清理文件名中的特殊字符
-            safe_product_short = product_short.replace(" ", "_").replace("/", "_").replace("-", "_")
-            safe_api_name = api_name.replace(" ", "_").replace("/", "_").replace("-", "_")
-            
-            filename = f"{safe_product_short}_{safe_api_name}.yml"
+            filename = f"{self.safe_filename_part(product_short)}_{self.safe_filename_part(api_name)}.yml"
         
-        output_path = os.path.join(self.output_dir, filename)
+        output_path = self.output_path(filename)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
         # 设置definitions上下文用于解析$ref引用
         api_detail = api_info.get("api_detail", {})
@@ -275,60 +293,197 @@ class YamlExporter:
     
     def export_multiple_apis_to_yaml(self, apis_info: List[Dict[str, Any]], filename: str = "multiple_apis.yml") -> str:
         """导出多个API详细信息为单个YAML文件"""
-        output_path = os.path.join(self.output_dir, filename)
+        return self.write_multiple_apis_yaml([self.render_api_items(apis_info)], len(apis_info), filename)
+    
+    def build_api_item(self, api_info: Dict[str, Any]) -> Dict[str, Any]:
+        """构建多API文件中单个API的数据"""
+        return {
+            "product": {
+                "name": api_info.get("product_name", ""),
+                "short": api_info.get("product_short", "")
+            },
+            "basic_info": api_info.get("api_basic_info", {}),
+            "detail": api_info.get("api_detail", {})
+        }
+    
+    def render_api_items(self, apis_info: List[Dict[str, Any]], indent: int = 2) -> str:
+        """将多个API序列化为可直接拼接在apis.items下的YAML片段"""
+        # 片段整体缩进indent个空格，行宽相应减小，按顺序拼接的结果与一次性序列化整个文档相同
+        items = self.clean_data_for_yaml([self.build_api_item(api_info) for api_info in apis_info])
+        text = yaml.dump(items, width=YAML_WIDTH - indent, **YAML_DUMP_OPTIONS) if items else ""
+        prefix = " " * indent
+        return "".join(prefix + line if line.strip() else line for line in text.splitlines(True))
+    
+    def write_multiple_apis_yaml(self, fragments: List[str], count: int, filename: str = "multiple_apis.yml") -> str:
+        """将预先序列化的API片段按顺序写入多API文件"""
+        output_path = self.output_path(filename)
         
-        # 构建YAML数据结构
         yaml_data = self.generate_yaml_header(
             "华为云API详细信息集合",
-            f"包含{len(apis_info)}个API的详细信息"
+            f"包含{count}个API的详细信息"
         )
-        
         yaml_data["apis"] = {
-            "count": len(apis_info),
+            "count": count,
             "items": []
         }
+        head = yaml.dump(self.clean_data_for_yaml(yaml_data), **YAML_DUMP_OPTIONS)
         
-        for api_info in apis_info:
-            api_data = {
-                "product": {
-                    "name": api_info.get("product_name", ""),
-                    "short": api_info.get("product_short", "")
-                },
-                "basic_info": api_info.get("api_basic_info", {}),
-                "detail": api_info.get("api_detail", {})
-            }
-            yaml_data["apis"]["items"].append(api_data)
-        
-        # 写入YAML文件
         with open(output_path, 'w', encoding='utf-8') as f:
-            yaml.dump(
-                self.clean_data_for_yaml(yaml_data),
-                f,
-                default_flow_style=False,
-                allow_unicode=True,
-                sort_keys=False,
-                indent=2
-            )
+            if count:
+                # 去掉空列表的占位，后面接各API片段
+                f.write(head[:-len("[]\n")].rstrip(" ") + "\n")
+                for fragment in fragments:
+                    f.write(fragment)
+            else:
+                f.write(head)
         
         return output_path
 
 
+    @staticmethod
+    def safe_filename_part(value: str) -> str:
+        """清理文件名：字母、数字、下划线和点以外的字符替换为下划线，并去掉开头的点"""
+        return re.sub(r"[^A-Za-z0-9_.]", "_", value).lstrip(".") or "unknown"
+    
+    def output_path(self, filename: str) -> str:
+        """返回输出目录下的文件路径，解析后不在输出目录下时抛出ValueError"""
+        root = os.path.realpath(self.output_dir)
+        resolved = os.path.realpath(os.path.join(root, filename))
+        if os.path.commonpath([root, resolved]) != root:
+            raise ValueError(f"导出路径不在输出目录下: {filename}")
+        return os.path.join(self.output_dir, filename)
+    
+    @staticmethod
+    def api_name(api_info: Dict[str, Any]) -> str:
+        """API的名称，详情中没有时使用基本信息中的名称，文件路径和索引使用同一个名称"""
+        return (api_info.get("api_detail", {}).get("name") or api_info.get("api_basic_info", {}).get("name")
+                or "unknown")
+    
+    def api_detail_relative_path(self, api_info: Dict[str, Any], disambiguate: bool = False) -> str:
+        """按API分文件导出时的相对路径：{product_short}/{api_name}.yml，disambiguate时在文件名后加名称的短哈希"""
+        product_short = self.safe_filename_part(api_info.get("product_short") or "unknown")
+        api_name = self.api_name(api_info)
+        filename = self.safe_filename_part(api_name)
+        if disambiguate:
+            filename += "_" + hashlib.sha256(api_name.encode("utf-8")).hexdigest()[:8]
+        return f"{product_short}/{filename}.yml"
+    
+    def write_api_detail_file(self, api_info: Dict[str, Any], relative_path: str) -> Dict[str, Any]:
+        """将单个API写入按产品分目录的文件，返回索引条目"""
+        self.export_api_detail_to_yaml(api_info, filename=relative_path)
+        api_basic_info = api_info.get("api_basic_info", {})
+        api_detail = api_info.get("api_detail", {})
+        # 哈希基于API详情内容而非YAML文件，不受generated_at影响，内容不变时哈希不变
+        canonical = json.dumps(api_detail, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return {
+            "product_name": api_info.get("product_name", ""),
+            "product_short": api_info.get("product_short", ""),
+            "name": self.api_name(api_info),
+            "summary": api_basic_info.get("summary", ""),
+            "path": relative_path,
+            "info_version": api_basic_info.get("info_version", ""),
+            "hash": "sha256:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        }
+    
+    def write_api_index(self, entries: List[Dict[str, Any]], filename: str = API_INDEX_FILENAME) -> str:
+        """写入按API分文件导出的索引，键为{product_short}/{name}"""
+        output_path = self.output_path(filename)
+        index = {
+            "generated_at": datetime.now().isoformat(),
+            "count": len(entries),
+            "apis": {f"{entry['product_short']}/{entry['name']}": entry for entry in entries}
+        }
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, output_path)
+        return output_path
+
+
+# 导出进程池中各worker使用的导出器
+_worker_exporter = None
+
+
+def _init_export_worker(output_dir: str):
+    """初始化导出worker进程"""
+    global _worker_exporter
+    _worker_exporter = YamlExporter(output_dir)
+
+
+def render_api_items_worker(apis_info: List[Dict[str, Any]]) -> str:
+    """在worker进程中清理、解析并序列化一批API"""
+    return _worker_exporter.render_api_items(apis_info)
+
+
+def write_api_detail_worker(api_info: Dict[str, Any], relative_path: str) -> Dict[str, Any]:
+    """在worker进程中生成并写入单个API文件"""
+    return _worker_exporter.write_api_detail_file(api_info, relative_path)
+
+
+class ExportProgress:
+    """按API规格上报导出进度：已写出或已跳过（获取失败、重复）的规格数/规格总数"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+
+    async def advance(self, count: int = 1):
+        self.done += count
+        await progress.report(progress.EXPORTS, self.done, self.total,
+                              f"已导出{self.done}/{self.total}个API详情")
+
+    async def track(self, awaitable, count: int = 1) -> Any:
+        """等待一次写出或序列化完成后推进进度"""
+        result = await awaitable
+        await self.advance(count)
+        return result
+
+
 class YamlExportCLI:
     """YAML导出命令行工具"""
     
-    def __init__(self, output_dir: str = "api_exports"):
+    def __init__(self, output_dir: str = "api_exports", profiler: Optional[RequestProfiler] = None,
+                 workers: int = 1, client: Optional[HuaweiCloudApiClient] = None):
         self.exporter = YamlExporter(output_dir)
-        self.client = None
+        self.client = client
+        # 未显式传入时根据API_SCAN_PROFILE_DIR环境变量决定是否剖析
+        self.profiler = profiler if profiler is not None else RequestProfiler.from_env()
+        # 大于1时在进程池中序列化YAML，0表示使用全部CPU核心
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self._pool = None
+    
+    async def run_export(self, label: str, func, *args) -> Any:
+        """执行一次导出，启用剖析时记录剖析结果"""
+        if self.profiler is None:
+            return await func(*args)
+        return await self.profiler.run(label, func, *args)
     
     async def __aenter__(self):
-        self.client = HuaweiCloudApiClient()
+        if self.client is None:
+            self.client = HuaweiCloudApiClient()
         await self.client.__aenter__()
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_export_worker,
+                initargs=(self.exporter.output_dir,)
+            )
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
         if self.client:
             await self.client.__aexit__(exc_type, exc_val, exc_tb)
     
+    async def render_api_items(self, apis_info: List[Dict[str, Any]]) -> str:
+        """序列化一批API，启用多进程时在进程池中执行，不阻塞获取详情"""
+        if self._pool is None:
+            return self.exporter.render_api_items(apis_info)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._pool, render_api_items_worker, apis_info)
+    
     async def export_all_products(self) -> str:
         """导出所有产品列表"""
         print("🔍 正在获取华为云产品列表...")
@@ -382,25 +537,114 @@ class YamlExportCLI:
         print(f"✅ API详细信息已导出到: {output_path}")
         return output_path
     
-    async def export_multiple_api_details(self, api_specs: List[tuple]) -> str:
-        """导出多个API的详细信息到单个文件"""
-        print(f"🔍 正在获取{len(api_specs)}个API的详细信息...")
-        
-        apis_info = []
-        for i, (product_name, interface_name) in enumerate(api_specs, 1):
-            print(f"  [{i}/{len(api_specs)}] 获取{product_name}的{interface_name}...")
+    async def iter_api_infos(self, api_specs: List[tuple], concurrency: int = BATCH_CONCURRENCY):
+        """按规格顺序逐个产出(规格, 结果)，结果包含result或error，已获取的前缀立即产出"""
+        # 按产品分组，每个产品的产品简称和API列表只解析一次
+        api_specs = [tuple(spec) for spec in api_specs]
+        interfaces_by_product = {}
+        for product_name, interface_name in api_specs:
+            interfaces_by_product.setdefault(product_name, []).append(interface_name)
+        
+        # 所有产品共享同一个并发限制
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def fetch_product(product_name: str) -> Dict[tuple, Dict[str, Any]]:
+            interface_names = interfaces_by_product[product_name]
+            print(f"  📦 获取{product_name}的{len(interface_names)}个接口...")
             try:
-                api_info = await self.client.get_api_info_by_user_input(product_name, interface_name)
-                apis_info.append(api_info)
+                items = await self.client.get_api_infos_by_user_input(
+                    product_name, interface_names, semaphore=semaphore)
             except Exception as e:
-                print(f"  ⚠️ 获取失败: {e}")
+                items = [{"interface_name": name, "error": str(e)} for name in interface_names]
+            return {(product_name, item["interface_name"]): item for item in items}
+        
+        results = {}
+        next_index = 0
+        for completed in asyncio.as_completed([fetch_product(name) for name in interfaces_by_product]):
+            results.update(await completed)
+            while next_index < len(api_specs) and api_specs[next_index] in results:
+                spec = api_specs[next_index]
+                next_index += 1
+                item = results[spec]
+                if "error" in item:
+                    print(f"  ⚠️ 获取{spec[0]}的{spec[1]}失败: {item['error']}")
+                yield spec, item
+    
+    async def export_multiple_api_details(self, api_specs: List[tuple], concurrency: int = BATCH_CONCURRENCY) -> str:
+        """导出多个API的详细信息到单个文件"""
+        print(f"🔍 正在获取{len(api_specs)}个API的详细信息...")
         
-        if apis_info:
-            output_path = self.exporter.export_multiple_apis_to_yaml(apis_info)
-            print(f"✅ {len(apis_info)}个API详细信息已导出到: {output_path}")
+        # 按规格文件顺序，每凑满一批已获取的API就交给序列化阶段，与其余详情的获取并行
+        tracker = ExportProgress(len(api_specs))
+        render_tasks = []
+        batch = []
+        count = 0
+        async for _, item in self.iter_api_infos(api_specs, concurrency):
+            if "error" in item:
+                await tracker.advance()
+                continue
+            batch.append(item["result"])
+            count += 1
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                render_tasks.append(asyncio.ensure_future(tracker.track(self.render_api_items(batch), len(batch))))
+                batch = []
+        if batch:
+            render_tasks.append(asyncio.ensure_future(tracker.track(self.render_api_items(batch), len(batch))))
+        
+        if count:
+            fragments = await asyncio.gather(*render_tasks)
+            output_path = self.exporter.write_multiple_apis_yaml(fragments, count)
+            print(f"✅ {count}个API详细信息已导出到: {output_path}")
             return output_path
         else:
             raise ValueError("没有成功获取任何API信息")
+    
+    async def write_api_detail_file(self, api_info: Dict[str, Any], relative_path: str) -> Dict[str, Any]:
+        """写入单个API文件，启用多进程时在进程池中执行，否则在线程池中执行"""
+        loop = asyncio.get_event_loop()
+        if self._pool is not None:
+            return await loop.run_in_executor(self._pool, write_api_detail_worker, api_info, relative_path)
+        # 导出器解析$ref时保存了当前API的definitions，每个线程使用独立的导出器
+        exporter = YamlExporter(self.exporter.output_dir)
+        return await loop.run_in_executor(
+            None, functools.partial(exporter.write_api_detail_file, api_info, relative_path))
+    
+    async def export_api_details_per_api(self, api_specs: List[tuple], concurrency: int = BATCH_CONCURRENCY) -> str:
+        """将多个API分别导出到按产品分目录的文件，并写入索引，返回索引文件路径"""
+        print(f"🔍 正在获取{len(api_specs)}个API的详细信息...")
+        
+        # 获取到详情后立即写文件，与其余详情的获取并行；同一API只写一次
+        tracker = ExportProgress(len(api_specs))
+        write_tasks = {}
+        # 已使用的相对路径及对应的API名称
+        paths = {}
+        async for _, item in self.iter_api_infos(api_specs, concurrency):
+            if "error" in item:
+                await tracker.advance()
+                continue
+            api_info = item["result"]
+            key = (api_info.get("product_short", ""), self.exporter.api_name(api_info))
+            if key in write_tasks:
+                await tracker.advance()
+                continue
+            relative_path = self.exporter.api_detail_relative_path(api_info)
+            if relative_path in paths:
+                # 名称不同的API清理特殊字符后文件名相同，加上名称哈希区分，不覆盖也不丢弃
+                relative_path = self.exporter.api_detail_relative_path(api_info, disambiguate=True)
+                print(f"⚠️ {key[1]}与{paths[self.exporter.api_detail_relative_path(api_info)]}的文件名冲突，"
+                      f"已改为: {relative_path}")
+            paths[relative_path] = key[1]
+            write_tasks[key] = asyncio.ensure_future(
+                tracker.track(self.write_api_detail_file(api_info, relative_path)))
+        
+        if not write_tasks:
+            raise ValueError("没有成功获取任何API信息")
+        
+        entries = await asyncio.gather(*write_tasks.values())
+        index_path = self.exporter.write_api_index(entries)
+        print(f"✅ {len(entries)}个API详细信息已分别导出到: {self.exporter.output_dir}")
+        print(f"🗂️ 索引文件: {index_path}")
+        return index_path
 
 
 # 命令行接口函数
@@ -0,0 +1,32 @@
+"""测试公共夹具 - 基于本地模拟的API Explorer，不访问网络"""
+
+import pytest
+
+from scan.client import ClientOptions, HuaweiCloudApiClient
+from scan.mock_explorer import MockExplorer
+
+# 会改变客户端数据来源或行为的环境变量，测试中一律清除
+ISOLATED_ENV = (
+    "API_SCAN_SNAPSHOT", "API_SCAN_CASSETTE", "API_SCAN_CASSETTE_MODE", "API_SCAN_REPLAY_LATENCY",
+    "API_SCAN_PRODUCT_ALIASES", "API_SCAN_CACHE_MB", "API_SCAN_DAEMON", "API_SCAN_METRICS_FILE",
+    "API_SCAN_PROMETHEUS_FILE", "API_SCAN_PROFILE_DIR",
+)
+
+
+@pytest.fixture(autouse=True)
+def isolated_env(monkeypatch):
+    for name in ISOLATED_ENV:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("API_SCAN_WARMUP", "0")
+
+
+@pytest.fixture
+def explorer():
+    return MockExplorer(products=6, apis_per_product=120, definitions_per_api=3)
+
+
+@pytest.fixture
+async def client(explorer):
+    async with HuaweiCloudApiClient(transport=explorer.transport(), options=ClientOptions(http2=False),
+                                    aliases={}) as client:
+        yield client
@@ -0,0 +1,127 @@
+"""TTLCache的过期与旧值返回、共享内存预算的淘汰"""
+
+import asyncio
+
+import pytest
+
+from scan import cache as cache_module
+from scan.cache import FRESH, MISSING, STALE, MemoryAccountant, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_fresh_stale_and_expired(clock):
+    cache = TTLCache(ttl=10, max_stale=5)
+    cache.set("k", "v")
+    assert cache.lookup("k") == ("v", FRESH)
+
+    clock.now += 12
+    assert cache.lookup("k") == ("v", STALE)
+    assert cache.get("k") is None
+    assert "k" not in cache
+
+    clock.now += 4
+    assert cache.lookup("k") == (None, MISSING)
+    assert len(cache) == 0
+    assert cache.stats()["stale_hits"] == 2
+
+
+def test_max_entries_evicts_least_recently_used(clock):
+    cache = TTLCache(ttl=10, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.state("b") == MISSING
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_max_bytes_rejects_oversized_value(clock):
+    cache = TTLCache(ttl=10, max_bytes=100)
+    cache.set("small", "x", size=40)
+    cache.set("huge", "y", size=500)
+    assert "huge" not in cache and "small" in cache
+    cache.set("other", "z", size=80)
+    assert "small" not in cache
+    assert cache.bytes == 80
+
+
+def test_accountant_keeps_total_within_budget(clock):
+    accountant = MemoryAccountant(max_bytes=1000)
+    first = TTLCache(ttl=100, accountant=accountant, name="first")
+    second = TTLCache(ttl=100, accountant=accountant, name="second")
+    for index in range(10):
+        first.set(index, index, size=150)
+        second.set(index, index, size=150)
+        assert accountant.bytes <= 1000
+    assert accountant.bytes == first.bytes + second.bytes
+    assert accountant.evictions == first.evictions + second.evictions > 0
+    assert accountant.stats()["caches"] == {"first": first.bytes, "second": second.bytes}
+
+
+def test_accountant_prefers_evicting_cold_large_entries(clock):
+    accountant = MemoryAccountant(max_bytes=1000)
+    cache = TTLCache(ttl=100, accountant=accountant)
+    cache.set("hot", "h", size=300)
+    cache.set("cold", "c", size=600)
+    for _ in range(5):
+        clock.now += 1
+        cache.get("hot")
+    cache.set("new", "n", size=200)
+    assert "hot" in cache and "new" in cache
+    assert "cold" not in cache
+
+
+def test_accountant_evicts_expired_entries_first(clock):
+    accountant = MemoryAccountant(max_bytes=500)
+    short = TTLCache(ttl=1, accountant=accountant, name="short")
+    long = TTLCache(ttl=100, accountant=accountant, name="long")
+    short.set("old", 1, size=100)
+    long.set("cold", 1, size=200)
+    clock.now += 50
+    long.set("new", 1, size=250)
+    assert "old" not in short._data
+    assert "cold" in long and "new" in long
+
+
+def test_clear_returns_bytes_to_accountant(clock):
+    accountant = MemoryAccountant(max_bytes=None)
+    cache = TTLCache(ttl=10, accountant=accountant)
+    cache.set("a", [1, 2, 3])
+    assert accountant.bytes > 0
+    cache.clear()
+    assert accountant.bytes == 0 and cache.bytes == 0
+
+
+async def test_client_serves_stale_catalog_and_refreshes_in_background(client, explorer):
+    await client.get_products()
+    assert explorer.request_counts["products"] == 1
+
+    # 过期但仍在max_stale内：立即返回旧值，后台刷新一次
+    entry = client.catalog_cache._data["products"]
+    entry[0] -= client.catalog_cache.ttl + 1
+    stale = await client.get_products()
+    assert stale is not None
+    await asyncio.sleep(0.05)
+    assert explorer.request_counts["products"] == 2
+    assert client.catalog_cache.state("products") == FRESH
+
+
+async def test_concurrent_loads_are_coalesced(client, explorer):
+    results = await asyncio.gather(*(client.get_all_apis("ECS") for _ in range(5)))
+    assert all(result is results[0] for result in results)
+    assert explorer.request_counts["apis"] == 2
@@ -0,0 +1,56 @@
+"""cassette录制与离线回放"""
+
+import pytest
+
+from scan.cassette import Cassette, RecordingTransport, ReplayTransport, transport_from_env
+from scan.client import ClientOptions, HuaweiCloudApiClient
+
+
+async def fetch_all(client, explorer):
+    products = await client.get_products()
+    apis = await client.get_all_apis("ECS")
+    detail = await client.get_api_detail("ECS", "EcsApi4")
+    return products.model_dump(), [api.model_dump() for api in apis], detail
+
+
+@pytest.mark.parametrize("filename", ["session.json", "session.json.gz"])
+async def test_replay_matches_recording_without_upstream(tmp_path, explorer, filename):
+    path = str(tmp_path / filename)
+    recorder = RecordingTransport(Cassette(path), explorer.transport())
+    async with HuaweiCloudApiClient(transport=recorder, options=ClientOptions(http2=False), aliases={}) as client:
+        recorded = await fetch_all(client, explorer)
+    requests = sum(explorer.request_counts.values())
+
+    cassette = Cassette.load(path)
+    assert len(cassette.interactions) == requests
+    assert cassette.stats()["endpoints"]["detail"]["requests"] == 1
+
+    replay = ReplayTransport(cassette, latency_scale=0)
+    async with HuaweiCloudApiClient(transport=replay, options=ClientOptions(http2=False), aliases={}) as client:
+        assert await fetch_all(client, explorer) == recorded
+    assert replay.misses == 0
+    assert sum(explorer.request_counts.values()) == requests
+
+
+async def test_unrecorded_request_is_a_miss(tmp_path):
+    replay = ReplayTransport(Cassette(str(tmp_path / "empty.json")), latency_scale=0)
+    async with HuaweiCloudApiClient(transport=replay, options=ClientOptions(http2=False), aliases={}) as client:
+        with pytest.raises(Exception):
+            await client.get_api_detail("ECS", "EcsApi1")
+    assert replay.misses >= 1
+
+
+def test_query_order_does_not_affect_matching(tmp_path):
+    import httpx
+    cassette = Cassette(str(tmp_path / "c.json"))
+    request = httpx.Request("GET", "https://example.com/v3/apis?offset=0&limit=100")
+    cassette.record(request, httpx.Response(200, json={"ok": 1}), 0.01)
+    found = cassette.find(httpx.Request("GET", "https://example.com/v3/apis?limit=100&offset=0"))
+    assert found is not None and found["status"] == 200
+
+
+def test_transport_from_env_rejects_unknown_mode(tmp_path, monkeypatch):
+    monkeypatch.setenv("API_SCAN_CASSETTE", str(tmp_path / "c.json"))
+    monkeypatch.setenv("API_SCAN_CASSETTE_MODE", "rewind")
+    with pytest.raises(ValueError, match="record或replay"):
+        transport_from_env()
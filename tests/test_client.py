@@ -0,0 +1,164 @@
+"""客户端的查找、负缓存与字段投影"""
+
+from scan.cache import MISSING
+from scan.client import project_fields
+
+
+async def test_resolve_api_by_product_and_summary(client, explorer):
+    product_short, api_info = await client.resolve_api("弹性云服务器（ECS）", explorer.api_summary(7))
+    assert product_short == "ECS"
+    assert api_info.name == "EcsApi7"
+
+
+async def test_unknown_product_is_negatively_cached(client, explorer):
+    assert await client.find_product_short("不存在的产品") is None
+    assert explorer.request_counts["products"] == 1
+    assert ("product", "不存在的产品") in client.negative_cache
+    assert await client.find_product_short("不存在的产品") is None
+    assert client.negative_cache.stats()["hits"] == 1
+    assert explorer.request_counts["products"] == 1
+
+
+async def test_unknown_interface_is_negatively_cached(client, explorer):
+    assert await client.find_api_by_summary("ECS", "不存在的接口") is None
+    pages = explorer.request_counts["apis"]
+    assert pages > 0
+    assert await client.find_api_by_summary("ECS", " 不存在的接口 ") is None
+    assert explorer.request_counts["apis"] == pages
+
+
+async def test_refreshing_catalog_forgets_negative_results(client):
+    await client.find_product_short("不存在的产品")
+    await client.get_products(refresh=True)
+    assert ("product", "不存在的产品") not in client.negative_cache
+
+
+async def test_early_match_does_not_fetch_remaining_pages(client, explorer):
+    api_info = await client.find_api_by_summary("ECS", explorer.api_summary(3))
+    assert api_info.name == "EcsApi3"
+    assert explorer.request_counts["apis"] < 2 + client.options.page_concurrency
+    assert client.apis_cache.state("ECS") == MISSING
+
+
+async def test_batch_results_follow_input_order(client, explorer):
+    names = [explorer.api_summary(2), "不存在的接口", explorer.api_summary(2)]
+    items = await client.get_api_infos_by_user_input("ECS", names)
+    assert [item["interface_name"] for item in items] == names
+    assert items[0]["result"]["api_detail"]["name"] == "EcsApi2"
+    assert "error" in items[1]
+    assert explorer.request_counts["detail"] == 1
+
+
+async def test_fields_projection_reports_missing_fields(client, explorer):
+    info = await client.get_api_info_by_user_input("ECS", explorer.api_summary(1), fields=["uri", "nope"])
+    assert info["api_detail"] == {"uri": "/v1/{project_id}/ecs/resources/1"}
+    assert info["missing_fields"] == ["nope"]
+
+
+def test_project_fields_supports_dotted_and_pointer_paths():
+    data = {"a": {"b": 1, "c/d": 2}, "list": [{"x": 1}, {"x": 2}]}
+    projected, missing = project_fields(data, ["a.b", "/a/c~1d", "list.1.x"])
+    assert projected == {"a": {"b": 1, "c/d": 2}, "list": {"1": {"x": 2}}}
+    assert missing == []
+
+
+def test_project_fields_keeps_broader_overlapping_path():
+    data = {"request_params": {"path": [{"name": "project_id"}], "query": []}}
+    for fields in (["request_params.path", "request_params.path.0"],
+                   ["request_params.path.0", "request_params.path"]):
+        projected, missing = project_fields(data, fields)
+        assert projected == {"request_params": {"path": [{"name": "project_id"}]}}
+        assert missing == []
+    projected, _ = project_fields(data, ["request_params.path.0.name", "request_params"])
+    assert projected == data
+
+
+def test_project_fields_list_index_and_missing_paths():
+    data = {"list": [{"x": 1}, {"x": 2}], "scalar": 3}
+    projected, missing = project_fields(data, ["list.0.x", "list.5", "list.x", "scalar.deeper", "absent"])
+    assert projected == {"list": {"0": {"x": 1}}}
+    assert missing == ["list.5", "list.x", "scalar.deeper", "absent"]
+
+
+def test_project_fields_returns_copies():
+    data = {"a": {"b": [1, 2]}}
+    whole, _ = project_fields(data, ["", "a"])
+    whole["a"]["b"].append(3)
+    part, _ = project_fields(data, ["a.b"])
+    part["a"]["b"].append(4)
+    assert data == {"a": {"b": [1, 2]}}
+
+
+async def test_projected_detail_does_not_share_cached_objects(client, explorer):
+    api_name = "EcsApi1"
+    projected, _ = await client.get_api_detail_fields("ECS", api_name, ["request_params"])
+    projected["request_params"]["path"].clear()
+    whole, _ = await client.get_api_detail_fields("ECS", api_name, [""])
+    whole["definitions"].clear()
+    assert await client.get_api_detail("ECS", api_name) == explorer.api_detail("ECS", api_name)
+
+
+async def test_refreshing_one_product_keeps_other_lookups(client, explorer):
+    await client.find_product_short("不存在的产品")
+    await client.find_api_by_summary("ECS", "不存在的接口")
+    await client.find_api_by_summary("VPC", "不存在的接口")
+    await client.find_api_by_summary("OBS", explorer.api_summary(1))
+
+    await client.get_all_apis("ECS", refresh=True)
+    assert ("api", "ECS", "不存在的接口") not in client.negative_cache
+    assert ("api", "VPC", "不存在的接口") in client.negative_cache
+    assert ("product", "不存在的产品") in client.negative_cache
+    assert ("OBS", explorer.api_summary(1)) in client.match_cache
+
+
+async def test_prefetch_refresh_keeps_unrelated_negative_results(client):
+    from scan.prefetch import PrefetchConfig, Prefetcher
+    await client.find_api_by_summary("VPC", "不存在的接口")
+    prefetcher = Prefetcher(lambda: client, PrefetchConfig(hot_products=["ECS"]))
+    await prefetcher.warm_up(refresh=True)
+    assert ("api", "VPC", "不存在的接口") in client.negative_cache
+    assert client.apis_cache.state("ECS") != MISSING
+
+
+async def test_cached_details_share_definitions(client, explorer):
+    from scan.cache import estimate_size
+    first = await client.get_api_detail("ECS", "EcsApi1")
+    second = await client.get_api_detail("VPC", "VpcApi2")
+    assert first == explorer.api_detail("ECS", "EcsApi1")
+    assert first["definitions"]["PageInfo"] is second["definitions"]["PageInfo"]
+    # 共享的子schema只计入池，不在每个详情中重复计入
+    assert client.detail_cache.bytes < estimate_size(first) + estimate_size(second)
+    assert client.cache_stats()["blobs"]["entries"] > 0
+
+
+async def test_concurrent_cold_lookups_share_one_page_stream(client, explorer):
+    import asyncio
+    pages = -(-explorer.apis_per_product // 100)
+    found, apis = await asyncio.gather(
+        client.find_api_by_summary("ECS", explorer.api_summary(explorer.apis_per_product - 1)),
+        client.get_all_apis("ECS"))
+    assert found.name == f"EcsApi{explorer.apis_per_product - 1}"
+    assert len(apis) == explorer.apis_per_product
+    assert explorer.request_counts["apis"] == pages
+    assert client.apis_cache.state("ECS") != MISSING
+
+
+async def test_early_stop_keeps_fetched_pages_for_later_lookups(client, explorer):
+    pages = -(-explorer.apis_per_product // 100)
+    assert (await client.find_api_by_summary("ECS", explorer.api_summary(3))).name == "EcsApi3"
+    last = explorer.api_summary(explorer.apis_per_product - 1)
+    assert (await client.find_api_by_summary("ECS", last)).name == f"EcsApi{explorer.apis_per_product - 1}"
+    assert explorer.request_counts["apis"] == pages
+    assert len(await client.get_all_apis("ECS")) == explorer.apis_per_product
+    assert explorer.request_counts["apis"] == pages
+
+
+def test_prefetch_merges_spellings_of_the_same_product():
+    from scan.prefetch import PrefetchConfig, Prefetcher
+    prefetcher = Prefetcher(lambda: None, PrefetchConfig(hot_products=["VPC"], learn_top_n=2))
+    for name in ["弹性云服务器（ECS）", "弹性云服务器(ecs)", " 弹性云服务器 ECS ", "vpc", "ＯＢＳ", None, ""]:
+        prefetcher.record_query(name)
+    assert len(prefetcher.query_counts) == 3
+    assert prefetcher.query_counts.most_common(1)[0][1] == 3
+    # 热门产品的其他写法不重复预热
+    assert prefetcher.products_to_warm() == ["VPC", " 弹性云服务器 ECS "]
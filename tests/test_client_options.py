@@ -0,0 +1,93 @@
+"""HTTP连接选项：分项超时、连接池、压缩和HTTP/2回退体现在创建的httpx.AsyncClient上"""
+
+import importlib.util
+import logging
+
+import httpx
+import pytest
+
+from scan.client import ClientOptions
+
+OPTION_ENV = (
+    "API_SCAN_HTTP2", "API_SCAN_CONNECT_TIMEOUT", "API_SCAN_READ_TIMEOUT", "API_SCAN_WRITE_TIMEOUT",
+    "API_SCAN_POOL_TIMEOUT", "API_SCAN_MAX_CONNECTIONS", "API_SCAN_MAX_KEEPALIVE", "API_SCAN_COMPRESSION",
+    "API_SCAN_PAGE_CONCURRENCY",
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_option_env(monkeypatch):
+    for name in OPTION_ENV:
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def without_h2(monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *args: None if name == "h2" else find_spec(name, *args))
+
+
+def pool(client: httpx.AsyncClient):
+    return client._transport._pool
+
+
+async def test_options_are_applied_to_client():
+    options = ClientOptions(http2=False, connect_timeout=1.5, read_timeout=20, write_timeout=3, pool_timeout=4,
+                            max_connections=7, max_keepalive_connections=2, keepalive_expiry=9)
+    async with options.build() as client:
+        assert client.timeout == httpx.Timeout(connect=1.5, read=20, write=3, pool=4)
+        assert pool(client)._max_connections == 7
+        assert pool(client)._max_keepalive_connections == 2
+        assert pool(client)._keepalive_expiry == 9
+        assert pool(client)._http2 is False
+        assert client.headers["Accept-Encoding"] != "identity"
+
+
+async def test_options_from_env(monkeypatch):
+    monkeypatch.setenv("API_SCAN_HTTP2", "0")
+    monkeypatch.setenv("API_SCAN_CONNECT_TIMEOUT", "2")
+    monkeypatch.setenv("API_SCAN_READ_TIMEOUT", "40")
+    monkeypatch.setenv("API_SCAN_WRITE_TIMEOUT", "6")
+    monkeypatch.setenv("API_SCAN_POOL_TIMEOUT", "8")
+    monkeypatch.setenv("API_SCAN_MAX_CONNECTIONS", "5")
+    monkeypatch.setenv("API_SCAN_MAX_KEEPALIVE", "3")
+    monkeypatch.setenv("API_SCAN_COMPRESSION", "off")
+    monkeypatch.setenv("API_SCAN_PAGE_CONCURRENCY", "2")
+    options = ClientOptions.from_env()
+    assert options.page_concurrency == 2
+    async with options.build() as client:
+        assert client.timeout == httpx.Timeout(connect=2, read=40, write=6, pool=8)
+        assert pool(client)._max_connections == 5
+        assert pool(client)._max_keepalive_connections == 3
+        assert pool(client)._http2 is False
+        assert client.headers["Accept-Encoding"] == "identity"
+
+
+def test_env_defaults_match_constructor_defaults():
+    defaults, from_env = ClientOptions(), ClientOptions.from_env()
+    assert vars(from_env) == vars(defaults)
+    assert defaults.http2 is None and defaults.compression is True
+
+
+@pytest.mark.parametrize("value, expected", [("auto", None), ("1", True), ("yes", True), ("false", False)])
+def test_http2_env_flag(monkeypatch, value, expected):
+    monkeypatch.setenv("API_SCAN_HTTP2", value)
+    assert ClientOptions.from_env().http2 is expected
+
+
+async def test_http2_is_used_when_h2_is_installed():
+    pytest.importorskip("h2")
+    async with ClientOptions().build() as client:
+        assert pool(client)._http2 is True
+
+
+async def test_http2_falls_back_without_h2(without_h2, caplog):
+    with caplog.at_level(logging.WARNING, logger="scan.client"):
+        assert ClientOptions().use_http2() is False
+        assert not caplog.records
+        options = ClientOptions(http2=True)
+        assert options.use_http2() is False
+        assert "回退到HTTP/1.1" in caplog.text
+        async with options.build() as client:
+            assert pool(client)._http2 is False
+        assert options.transport()._pool._http2 is False
@@ -0,0 +1,87 @@
+"""守护进程的本地访问控制"""
+
+import asyncio
+import json
+import os
+import stat
+
+import pytest
+
+from scan import daemon
+from scan.cursor_optimized_server import CursorOptimizedMCPServer
+from scan.prefetch import PrefetchConfig
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "getuid"), reason="需要Unix套接字")
+
+
+@pytest.fixture
+async def running_daemon(tmp_path, monkeypatch, client):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    server = CursorOptimizedMCPServer()
+    server.prefetcher.config = PrefetchConfig(enabled=False)
+    server.client = client
+    instance = daemon.McpDaemon(server, str(tmp_path / "d.sock"), idle_timeout=0)
+    task = asyncio.ensure_future(instance.serve())
+    for _ in range(100):
+        if instance.token is not None and os.path.exists(tmp_path / "d.sock"):
+            break
+        await asyncio.sleep(0.01)
+    yield instance
+    instance.stop()
+    await task
+
+
+async def send(address, *messages):
+    reader, writer = await daemon.open_connection(address)
+    for message in messages:
+        writer.write((json.dumps(message) + "\n").encode())
+    writer.write_eof()
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        lines.append(json.loads(line))
+    writer.close()
+    return lines
+
+
+PING = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+
+
+async def test_socket_token_and_directory_are_private(running_daemon, tmp_path):
+    assert stat.S_IMODE(os.stat(tmp_path / "d.sock").st_mode) == 0o600
+    token_file = daemon.token_path(str(tmp_path / "d.sock"))
+    assert stat.S_IMODE(os.stat(token_file).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(os.path.dirname(token_file)).st_mode) == 0o700
+
+
+async def test_connection_without_token_is_rejected(running_daemon):
+    for first in (PING, {"jsonrpc": "2.0", "method": daemon.ATTACH_METHOD, "params": {"cwd": "/", "token": "x"}}):
+        responses = await send(running_daemon.address, first, PING)
+        assert len(responses) == 1
+        assert responses[0]["error"]["code"] == daemon.UNAUTHORIZED_CODE
+
+
+async def test_attached_session_is_served(running_daemon, tmp_path):
+    token = daemon.read_token(str(tmp_path / "d.sock"))
+    attach = {"jsonrpc": "2.0", "method": daemon.ATTACH_METHOD, "params": {"cwd": str(tmp_path), "token": token}}
+    responses = await send(running_daemon.address, attach, PING)
+    assert [response["id"] for response in responses] == [1]
+    assert "tools" in responses[0]["result"]
+
+
+async def test_second_daemon_does_not_replace_running_one(running_daemon, tmp_path):
+    token = daemon.read_token(str(tmp_path / "d.sock"))
+    other = daemon.McpDaemon(running_daemon.server, str(tmp_path / "d.sock"), idle_timeout=0)
+    await other.serve()
+    assert other.token is None
+    assert daemon.read_token(str(tmp_path / "d.sock")) == token
+
+
+def test_runtime_dir_owned_by_other_user_is_refused(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    monkeypatch.setattr(daemon.os, "getuid", lambda: os.stat(tmp_path).st_uid + 1)
+    os.makedirs(tmp_path / f"api-scan-{os.stat(tmp_path).st_uid + 1}")
+    with pytest.raises(ValueError, match="不属于当前用户"):
+        daemon.runtime_dir()
@@ -0,0 +1,57 @@
+"""产品名称规范化与索引优先级"""
+
+from scan.models import ProductsResponse
+from scan.product_index import ProductIndex, load_aliases, normalize_name
+
+
+def catalog(*products):
+    return ProductsResponse.model_validate({"groups": [{"name": "计算", "products": [
+        {"name": name, "productshort": short, "description": description} for name, short, description in products
+    ]}]})
+
+
+def test_normalize_name_ignores_width_case_spaces_and_brackets():
+    assert normalize_name("弹性云服务器（ECS）") == normalize_name("弹性云服务器 ecs") == "弹性云服务器ecs"
+    assert normalize_name("ＥＣＳ") == "ecs"
+    assert normalize_name(None) == ""
+
+
+def test_resolves_name_short_and_combinations():
+    index = ProductIndex(catalog(("弹性云服务器", "ECS", "弹性云服务器（Elastic Cloud Server）")))
+    ecs = index.resolve("ECS")
+    assert ecs.productshort == "ECS"
+    for text in ("弹性云服务器", "ecs", "弹性云服务器(ECS)", "ECS 弹性云服务器", "elastic cloud server"):
+        assert index.resolve(text) is ecs
+    assert index.resolve("不存在的产品") is None
+
+
+def test_catalog_names_take_precedence_over_aliases():
+    index = ProductIndex(catalog(("云硬盘", "EVS", ""), ("弹性云服务器", "ECS", "")),
+                         aliases={"云硬盘": "ECS", "虚拟机": "ECS"})
+    assert index.resolve("云硬盘").productshort == "EVS"
+    assert index.resolve("虚拟机").productshort == "ECS"
+
+
+def test_alias_to_unknown_target_is_ignored():
+    index = ProductIndex(catalog(("弹性云服务器", "ECS", "")), aliases={"对象存储": "OBS"})
+    assert index.resolve("对象存储") is None
+
+
+def test_aliases_take_precedence_over_description_keywords():
+    index = ProductIndex(catalog(("弹性云服务器", "ECS", ""), ("裸金属服务器", "BMS", "裸金属服务器（server）")),
+                         aliases={"server": "ECS"})
+    assert index.resolve("server").productshort == "ECS"
+
+
+def test_ambiguous_description_keyword_is_not_indexed():
+    index = ProductIndex(catalog(("弹性云服务器", "ECS", "弹性云服务器（Cloud Server）"),
+                                 ("裸金属服务器", "BMS", "裸金属服务器（Cloud Server，BMS）")))
+    assert index.resolve("cloud server") is None
+    assert index.resolve("bms").productshort == "BMS"
+
+
+def test_load_aliases_merges_configured_json():
+    aliases = load_aliases('{"主机": "ECS"}')
+    assert aliases["主机"] == "ECS"
+    assert aliases["虚拟机"] == "ECS"
+    assert load_aliases("[1, 2]") == load_aliases("")
@@ -0,0 +1,60 @@
+"""请求级剖析：cProfile只计入请求及其启动的任务，等待期间其他任务的执行不计入"""
+
+import asyncio
+import pstats
+
+from scan.cursor_optimized_server import CursorOptimizedMCPServer
+from scan.profiling import RequestProfiler
+
+
+def profiled_functions(tmp_path):
+    (prof,) = tmp_path.glob("*.prof")
+    return {function_name for _, _, function_name in pstats.Stats(str(prof)).stats}
+
+
+async def test_profiles_tool_call_including_started_tasks(tmp_path, client, explorer):
+    server = CursorOptimizedMCPServer()
+    server.client = client
+    profiler = RequestProfiler(str(tmp_path), engine="cprofile")
+    request = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+               "params": {"name": "get_huawei_cloud_api_info",
+                          "arguments": {"product_name": "ECS", "interface_name": explorer.api_summary(1)}}}
+    loop = asyncio.get_running_loop()
+    factory = loop.get_task_factory()
+
+    response = await profiler.run("tools/call get_huawei_cloud_api_info", server.handle_tools_call, request)
+    assert "result" in response
+    assert profiler.captured == 1
+    assert loop.get_task_factory() is factory
+    (report,) = tmp_path.glob("*.txt")
+    assert "按类别统计的自身耗时" in report.read_text(encoding="utf-8")
+    functions = profiled_functions(tmp_path)
+    assert "handle_tools_call" in functions
+    # 详情在_cached启动的加载任务中获取
+    assert "_fetch_api_detail" in functions
+
+
+async def test_other_tasks_during_awaits_are_not_profiled(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), engine="cprofile")
+    started = asyncio.Event()
+
+    def unrelated_work():
+        return sum(range(10000))
+
+    async def other_request():
+        started.set()
+        for _ in range(5):
+            unrelated_work()
+            await asyncio.sleep(0)
+
+    async def request():
+        await started.wait()
+        await asyncio.sleep(0.01)
+        return "done"
+
+    other = asyncio.ensure_future(other_request())
+    assert await profiler.run("request", request) == "done"
+    await other
+    functions = profiled_functions(tmp_path)
+    assert "request" in functions
+    assert "unrelated_work" not in functions
@@ -0,0 +1,98 @@
+"""进度通知：请求带progressToken时各工具按阶段上报，未完成的进度按间隔节流"""
+
+import json
+
+import pytest
+
+from scan import progress
+from scan.client import ClientOptions, HuaweiCloudApiClient
+from scan.cursor_optimized_server import CursorOptimizedMCPServer
+from scan.mock_explorer import MockExplorer
+from scan.yaml_exporter import YamlExportCLI
+
+
+@pytest.fixture
+def explorer():
+    # 每个产品5页API列表
+    return MockExplorer(products=2, apis_per_product=450, definitions_per_api=1)
+
+
+@pytest.fixture
+def server(client):
+    server = CursorOptimizedMCPServer()
+    server.client = client
+    return server
+
+
+@pytest.fixture
+def notifications():
+    sent = []
+
+    async def notify(line):
+        message = json.loads(line)
+        assert message["method"] == "notifications/progress"
+        sent.append(message["params"])
+
+    reset = progress.NOTIFIER.set(notify)
+    yield sent
+    progress.NOTIFIER.reset(reset)
+
+
+def call(name, arguments, token="t1"):
+    return {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+            "params": {"name": name, "arguments": arguments, "_meta": {"progressToken": token}}}
+
+
+async def test_list_product_apis_reports_pages(server, notifications, monkeypatch):
+    monkeypatch.setenv("API_SCAN_PROGRESS_INTERVAL", "0")
+    await server.handle_tools_call(call("list_product_apis", {"product_name": "ECS"}))
+    assert [(item["progress"], item["total"]) for item in notifications] == [(page, 5) for page in range(1, 6)]
+    assert {item["progressToken"] for item in notifications} == {"t1"}
+    assert "ECS: 已获取5/5页API列表" == notifications[-1]["message"]
+
+
+async def test_get_info_reports_pages_until_match(server, explorer, notifications, monkeypatch):
+    monkeypatch.setenv("API_SCAN_PROGRESS_INTERVAL", "0")
+    await server.handle_tools_call(call("get_huawei_cloud_api_info",
+                                        {"product_name": "ECS", "interface_name": explorer.api_summary(250)}))
+    assert [item["progress"] for item in notifications][:3] == [1, 2, 3]
+    assert all(item["total"] == 5 for item in notifications)
+
+
+async def test_batch_tool_reports_details(server, explorer, notifications, monkeypatch):
+    monkeypatch.setenv("API_SCAN_PROGRESS_INTERVAL", "0")
+    names = [explorer.api_summary(index) for index in range(4)]
+    await server.handle_tools_call(call("batch_get_huawei_cloud_api_info",
+                                        {"product_name": "ECS", "interface_names": names}))
+    assert [(item["progress"], item["total"]) for item in notifications] == [(done, 4) for done in range(1, 5)]
+
+
+async def test_progress_interval_throttles_all_but_first_and_final(server, notifications, monkeypatch):
+    monkeypatch.setenv("API_SCAN_PROGRESS_INTERVAL", "3600")
+    await server.handle_tools_call(call("list_product_apis", {"product_name": "ECS"}))
+    assert [item["progress"] for item in notifications] == [1, 5]
+
+
+async def test_no_notifications_without_progress_token(server, notifications):
+    request = call("list_product_apis", {"product_name": "ECS"})
+    del request["params"]["_meta"]
+    await server.handle_tools_call(request)
+    assert notifications == []
+
+
+@pytest.mark.parametrize("per_api", [False, True])
+async def test_export_reports_exported_details(tmp_path, explorer, notifications, monkeypatch, per_api):
+    monkeypatch.setenv("API_SCAN_PROGRESS_INTERVAL", "0")
+    specs = [("ECS", explorer.api_summary(index)) for index in range(10)] + [("ECS", "不存在的接口")]
+    client = HuaweiCloudApiClient(transport=explorer.transport(), options=ClientOptions(http2=False), aliases={})
+    async with YamlExportCLI(str(tmp_path), client=client) as cli:
+        with progress.tracking({"_meta": {"progressToken": "export"}}, progress.EXPORTS):
+            if per_api:
+                await cli.export_api_details_per_api(specs)
+            else:
+                await cli.export_multiple_api_details(specs)
+    assert notifications, "导出时应上报进度"
+    assert all(item["total"] == len(specs) for item in notifications)
+    values = [item["progress"] for item in notifications]
+    assert values == sorted(set(values)) and values[-1] == len(specs)
+    assert notifications[-1]["message"] == f"已导出{len(specs)}/{len(specs)}个API详情"
@@ -0,0 +1,66 @@
+"""分页游标与按字节预算分页"""
+
+import base64
+import json
+
+import pytest
+
+from scan.rendering import decode_cursor, encode_cursor, paginate_lines, request_fingerprint
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("apis", 300, p="ECS")
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "apis", p="ECS") == 300
+
+
+def test_empty_cursor_starts_at_zero():
+    assert decode_cursor(None, "apis") == 0
+    assert decode_cursor("", "detail", s="full") == 0
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!!", "e30", base64.urlsafe_b64encode(b"[1]").decode()])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="无效的分页游标"):
+        decode_cursor(cursor, "apis")
+
+
+def test_cursor_for_other_request_is_rejected():
+    cursor = encode_cursor("apis", 100, p="ECS")
+    with pytest.raises(ValueError, match="不匹配"):
+        decode_cursor(cursor, "apis", p="VPC")
+    with pytest.raises(ValueError, match="不匹配"):
+        decode_cursor(cursor, "detail", p="ECS")
+
+
+def test_tampered_negative_offset_is_rejected():
+    raw = json.dumps({"k": "apis", "o": -5, "p": "ECS"}).encode()
+    cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "apis", p="ECS")
+
+
+def test_paginate_lines_respects_byte_budget_and_item_limit():
+    lines = [f"line{i}" for i in range(10)]
+    page, next_offset = paginate_lines(lines, 0, max_bytes=20)
+    assert page == ["line0", "line1", "line2"]
+    assert next_offset == 3
+
+    page, next_offset = paginate_lines(lines, 8, max_bytes=1000)
+    assert page == ["line8", "line9"]
+    assert next_offset is None
+
+    page, next_offset = paginate_lines(lines, 0, max_bytes=1000, max_items=4)
+    assert len(page) == 4 and next_offset == 4
+
+
+def test_paginate_lines_always_advances():
+    page, next_offset = paginate_lines(["x" * 100, "y"], 0, max_bytes=10)
+    assert page == ["x" * 100]
+    assert next_offset == 1
+
+
+def test_request_fingerprint_is_stable_and_order_sensitive():
+    assert request_fingerprint("ECS", ["a", "b"], None) == request_fingerprint("ECS", ["a", "b"], None)
+    assert request_fingerprint("ECS", ["a", "b"], None) != request_fingerprint("ECS", ["b", "a"], None)
+    assert request_fingerprint("ECS", "EcsApi1", None) != request_fingerprint("ECS", "EcsApi2", None)
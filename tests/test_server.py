@@ -0,0 +1,164 @@
+"""MCP服务器的工具调用：分页游标只能用于生成它的请求"""
+
+import pytest
+
+from scan.cursor_optimized_server import CursorOptimizedMCPServer
+from scan.models import ApiBasicInfo
+
+
+@pytest.fixture
+def server(client):
+    server = CursorOptimizedMCPServer()
+    server.client = client
+    return server
+
+
+def next_cursor(result):
+    text = result["content"][0]["text"]
+    assert "cursor='" in text
+    return text.split("cursor='", 1)[1].split("'", 1)[0]
+
+
+async def test_detail_cursor_is_bound_to_interface(server, explorer):
+    arguments = {"product_name": "ECS", "interface_name": explorer.api_summary(1), "section": "full",
+                 "max_bytes": 1024}
+    cursor = next_cursor(await server._get_api_info(arguments))
+    second_page = await server._get_api_info(dict(arguments, cursor=cursor))
+    assert "第" in second_page["content"][0]["text"]
+
+    with pytest.raises(Exception, match="不匹配"):
+        await server._get_api_info(dict(arguments, interface_name=explorer.api_summary(2), cursor=cursor))
+    with pytest.raises(Exception, match="不匹配"):
+        await server._get_api_info(dict(arguments, fields=["definitions"], cursor=cursor))
+
+
+async def test_batch_cursor_is_bound_to_interface_names(server, explorer):
+    names = [explorer.api_summary(index) for index in range(6)]
+    arguments = {"product_name": "ECS", "interface_names": names, "fields": ["definitions"], "max_bytes": 1024}
+    cursor = next_cursor(await server._batch_get_api_info(arguments))
+    await server._batch_get_api_info(dict(arguments, cursor=cursor))
+
+    with pytest.raises(Exception, match="不匹配"):
+        await server._batch_get_api_info(dict(arguments, interface_names=names[::-1], cursor=cursor))
+
+
+def call(name, arguments):
+    return {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": name, "arguments": arguments}}
+
+
+async def test_output_dir_without_export_flag_enables_export(server, tmp_path):
+    response = await server.handle_tools_call(call("list_product_apis", {"product_name": "ECS",
+                                                                         "output_dir": str(tmp_path)}))
+    assert "YAML文件已成功导出" in response["result"]["content"][0]["text"]
+    assert list(tmp_path.iterdir())
+
+
+async def test_keywords_in_names_do_not_enable_export(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server.client.aliases = {"文件导出yaml服务": "ECS"}
+    response = await server.handle_tools_call(call("list_product_apis", {"product_name": "文件导出yaml服务"}))
+    text = response["result"]["content"][0]["text"]
+    assert "共120个" in text and "YAML" not in text
+    assert not list(tmp_path.iterdir())
+
+
+async def test_cache_request_counters_cover_every_cache(server, explorer, monkeypatch):
+    from scan.metrics import metrics
+    monkeypatch.setattr(server.memory, "max_bytes", None)
+    metrics.reset()
+    await server._get_api_info({"product_name": "ECS", "interface_name": explorer.api_summary(1)})
+    server._collect_cache_metrics()
+    text = metrics.to_prometheus()
+    for cache_name in server.cache_stats():
+        for result in ("hit", "stale", "miss"):
+            assert f'cache_requests_total{{cache="{cache_name}",result="{result}"}}' in text
+    assert not [line for line in text.splitlines() if line.startswith("cache_memory_limit_bytes")]
+
+
+@pytest.fixture
+def renders(server, monkeypatch):
+    """记录实际渲染的次数"""
+    counts = {"detail": 0, "list": 0}
+    render_api_info, render_api_list = server._render_api_info, server._render_api_list
+
+    def count_api_info(*args):
+        counts["detail"] += 1
+        return render_api_info(*args)
+
+    def count_api_list(*args):
+        counts["list"] += 1
+        return render_api_list(*args)
+
+    monkeypatch.setattr(server, "_render_api_info", count_api_info)
+    monkeypatch.setattr(server, "_render_api_list", count_api_list)
+    return counts
+
+
+async def test_warm_detail_call_hits_render_cache(server, explorer, renders):
+    arguments = {"product_name": "ECS", "interface_name": explorer.api_summary(1)}
+    first = await server._get_api_info(dict(arguments))
+    second = await server._get_api_info(dict(arguments))
+    assert second == first
+    assert renders["detail"] == 1
+    assert server.render_cache.stats()["hits"] == 1
+
+
+async def test_new_info_version_invalidates_detail_render(server, explorer, renders):
+    apis = await server.client.get_all_apis("ECS")
+    arguments = {"product_name": "ECS", "interface_name": explorer.api_summary(1)}
+    await server._get_api_info(dict(arguments))
+    await server._get_api_info(dict(arguments))
+    assert renders["detail"] == 1
+
+    updated = [ApiBasicInfo(**dict(api.model_dump(), info_version="v2")) if api.name == "EcsApi1" else api
+               for api in apis]
+    server.client.apis_cache.set("ECS", updated)
+    await server._get_api_info(dict(arguments))
+    assert renders["detail"] == 2
+
+
+async def test_new_apis_version_invalidates_list_render(server, renders):
+    arguments = {"product_name": "ECS"}
+    first = await server._list_product_apis(dict(arguments))
+    assert await server._list_product_apis(dict(arguments)) == first
+    assert renders["list"] == 1
+
+    version = server.client.apis_version("ECS")
+    await server.client.get_all_apis("ECS", refresh=True)
+    assert server.client.apis_version("ECS") != version
+    assert await server._list_product_apis(dict(arguments)) == first
+    assert renders["list"] == 2
+
+
+STATIC_METHODS = ["initialize", "tools/list", "listOfferings", "serverInfo"]
+REQUEST_IDS = [1, 2, "abc", 'quote"d', "中文", None, 0]
+
+
+@pytest.mark.parametrize("method", STATIC_METHODS)
+async def test_static_response_bytes_match_dynamic_encoding(server, method):
+    import json
+    # 同一静态结果在多次调用间复用，每次输出各自请求的id
+    for request_id in REQUEST_IDS:
+        response = await server._dispatch(method, {"jsonrpc": "2.0", "id": request_id, "method": method})
+        encoded = server.encode_response(response)
+        assert json.loads(encoded) == json.loads(json.dumps(response, ensure_ascii=False))
+        assert json.loads(encoded)["id"] == request_id
+    assert len(server._static_results) == 1
+
+
+async def test_static_results_match_freshly_built_payloads(server):
+    import json
+    initialize = json.loads(server.encode_response(await server._dispatch("initialize", {"id": 7})))
+    assert initialize["result"]["protocolVersion"] == "2024-11-05"
+    assert initialize["result"]["serverInfo"]["name"] == "api_scan"
+    tools = json.loads(server.encode_response(await server._dispatch("tools/list", {"id": 8})))
+    assert tools["result"] == json.loads(json.dumps({"tools": server._tool_descriptors()}, ensure_ascii=False))
+
+
+async def test_dynamic_and_error_responses_are_encoded_in_full(server):
+    import json
+    await server._dispatch("tools/list", {"id": 1})
+    ping = await server._dispatch("ping", {"id": 3})
+    assert json.loads(server.encode_response(ping)) == ping
+    error = server.create_response(4, error={"code": -32601, "message": "Method not found"})
+    assert json.loads(server.encode_response(error)) == error
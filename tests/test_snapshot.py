@@ -0,0 +1,88 @@
+"""内容寻址快照与打包快照的读写往返"""
+
+import pytest
+
+from scan.client import ClientOptions, HuaweiCloudApiClient
+from scan.packed_snapshot import PackedSnapshot, pack_store
+from scan.snapshot_store import SnapshotStore, mirror
+
+
+@pytest.fixture
+def mock_client(explorer):
+    return HuaweiCloudApiClient(transport=explorer.transport(), options=ClientOptions(http2=False), aliases={})
+
+
+def test_store_round_trip_deduplicates_shared_definitions(tmp_path, explorer):
+    details = [explorer.api_detail("ECS", f"EcsApi{index}") for index in range(5)]
+    with SnapshotStore(str(tmp_path / "store"), compression="none") as store:
+        for index, detail in enumerate(details):
+            store.put_detail("ECS", f"EcsApi{index}", detail)
+        store.put_products(explorer.catalog())
+
+    store = SnapshotStore(str(tmp_path / "store"))
+    for index, detail in enumerate(details):
+        assert store.get_detail("ECS", f"EcsApi{index}") == detail
+    assert store.get_products() == explorer.catalog()
+    assert store.get_detail("ECS", "EcsApi99") is None
+    stats = store.stats()
+    assert stats["documents"] == 6
+    assert stats["stored_bytes"] < stats["logical_bytes"]
+
+
+@pytest.mark.parametrize("compression", ["none", "zstd"])
+async def test_packed_snapshot_serves_client_without_upstream(tmp_path, explorer, mock_client, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    store = SnapshotStore(str(tmp_path / "store"), compression="none")
+    async with mock_client:
+        await mirror(mock_client, store, ["ECS", "VPC"], details=True)
+    store.flush()
+    pack_path = str(tmp_path / "snapshot.pack")
+    records = pack_store(store, pack_path, compression)
+
+    requests_before = sum(explorer.request_counts.values())
+    snapshot = PackedSnapshot(pack_path)
+    # 详情以清单保存，共享的子schema只打包一次
+    blob_keys = [key for key in snapshot.keys() if key.startswith("blob/")]
+    assert records == len(store.keys()) + len(blob_keys)
+    assert len(blob_keys) < 2 * explorer.apis_per_product * (explorer.definitions_per_api + 3)
+    assert "PageInfo" in snapshot.get("detail/ECS/EcsApi1")["definitions"]
+    assert snapshot.get_detail("ECS", "EcsApi1") == explorer.api_detail("ECS", "EcsApi1")
+    assert (snapshot.get_detail("ECS", "EcsApi1")["definitions"]["PageInfo"]
+            is snapshot.get_detail("VPC", "VpcApi7")["definitions"]["PageInfo"])
+    assert "detail/ECS/EcsApi500" not in snapshot
+    page = snapshot.respond("apis", {"product_short": "ECS", "offset": 100, "limit": 100})
+    assert page["count"] == explorer.apis_per_product
+    assert [api["name"] for api in page["api_basic_infos"]] == [f"EcsApi{index}" for index in range(100, 120)]
+    assert snapshot.respond("apis", {"product_short": "NOPE"}) == {"count": 0, "api_basic_infos": []}
+
+    async with HuaweiCloudApiClient(snapshot=snapshot, options=ClientOptions(http2=False), aliases={}) as client:
+        product_short, api_info = await client.resolve_api("VPC", explorer.api_summary(2))
+        detail = await client.get_api_detail(product_short, api_info.name)
+        assert detail == explorer.api_detail("VPC", "VpcApi2")
+        assert len(await client.get_all_apis("ECS")) == explorer.apis_per_product
+    assert sum(explorer.request_counts.values()) == requests_before
+
+
+def test_invalid_pack_file_is_rejected(tmp_path):
+    path = tmp_path / "bad.pack"
+    path.write_bytes(b"not a snapshot at all, just some bytes")
+    with pytest.raises(ValueError, match="不是有效的打包快照"):
+        PackedSnapshot(str(path))
+
+
+def test_api_list_pages_decode_the_record_once(tmp_path, explorer, monkeypatch):
+    from scan.packed_snapshot import pack
+    import json
+    apis = explorer.apis_page("ECS", 0, explorer.apis_per_product)
+    pack(iter([("apis/ECS", json.dumps(apis).encode())]), str(tmp_path / "s.pack"))
+
+    with PackedSnapshot(str(tmp_path / "s.pack")) as snapshot:
+        decoded = []
+        original_get = snapshot.get
+        monkeypatch.setattr(snapshot, "get", lambda key: decoded.append(key) or original_get(key))
+        pages = [snapshot.respond("apis", {"product_short": "ECS", "offset": offset, "limit": 50})
+                 for offset in range(0, explorer.apis_per_product, 50)]
+        assert decoded == ["apis/ECS"]
+        names = [api["name"] for page in pages for api in page["api_basic_infos"]]
+        assert names == [api["name"] for api in apis["api_basic_infos"]]
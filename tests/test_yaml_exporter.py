@@ -0,0 +1,179 @@
+"""YAML导出：分批序列化的片段拼接结果与整体序列化逐字节相同"""
+
+import pytest
+import yaml
+
+from scan.yaml_exporter import YAML_DUMP_OPTIONS, YamlExporter
+
+
+FIXED_HEADER = {"metadata": {"title": "t", "description": "d", "generated_at": "2024-01-01T00:00:00",
+                             "generator": "g", "version": "1.0.0"}}
+
+
+async def fetch_api_infos(client, explorer, count):
+    names = [explorer.api_summary(index) for index in range(count)]
+    items = await client.get_api_infos_by_user_input("ECS", names)
+    return [item["result"] for item in items]
+
+
+async def test_fragment_concatenation_is_byte_identical(tmp_path, client, explorer, monkeypatch):
+    exporter = YamlExporter(str(tmp_path))
+    monkeypatch.setattr(exporter, "generate_yaml_header", lambda title, description="": {
+        "metadata": dict(FIXED_HEADER["metadata"], title=title, description=description)})
+    apis_info = await fetch_api_infos(client, explorer, 7)
+    # 人为加入需要折行和转义的长文本
+    apis_info[0]["api_detail"] = dict(apis_info[0]["api_detail"], description="很长的说明 " * 40 + "'quoted': yes")
+
+    fragments = [exporter.render_api_items(apis_info[start:start + 3]) for start in range(0, len(apis_info), 3)]
+    path = exporter.write_multiple_apis_yaml(fragments, len(apis_info), "fragments.yml")
+
+    document = exporter.generate_yaml_header("华为云API详细信息集合", f"包含{len(apis_info)}个API的详细信息")
+    document["apis"] = {"count": len(apis_info), "items": [exporter.build_api_item(info) for info in apis_info]}
+    expected = yaml.dump(exporter.clean_data_for_yaml(document), **YAML_DUMP_OPTIONS)
+
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == expected
+
+
+def test_empty_export_writes_empty_items(tmp_path):
+    exporter = YamlExporter(str(tmp_path))
+    with open(exporter.export_multiple_apis_to_yaml([], "empty.yml"), encoding="utf-8") as f:
+        assert yaml.safe_load(f)["apis"] == {"count": 0, "items": []}
+
+
+def api_info(name, basic_name="Basic", product_short="ECS"):
+    detail = {"name": name} if name else {}
+    return {"product_name": "弹性云服务器", "product_short": product_short,
+            "api_basic_info": {"name": basic_name, "summary": f"{name}的摘要"}, "api_detail": detail}
+
+
+def test_path_and_index_use_the_same_name_fallback(tmp_path):
+    exporter = YamlExporter(str(tmp_path))
+    info = api_info(None, basic_name="ListServers")
+    relative_path = exporter.api_detail_relative_path(info)
+    assert relative_path == "ECS/ListServers.yml"
+    assert exporter.write_api_detail_file(info, relative_path)["name"] == "ListServers"
+
+
+async def test_per_api_export_keeps_names_that_collide_after_sanitising(tmp_path, capsys):
+    from scan.yaml_exporter import YamlExportCLI
+    import json
+
+    cli = YamlExportCLI(str(tmp_path), profiler=None, client=object())
+    infos = [api_info("List-Servers"), api_info("List Servers"), api_info("List-Servers"), api_info("Other")]
+
+    async def iter_api_infos(api_specs, concurrency):
+        for info in infos:
+            yield None, {"result": info}
+
+    cli.iter_api_infos = iter_api_infos
+    index_path = await cli.export_api_details_per_api([("ECS", "x")] * len(infos))
+
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    assert index["count"] == 3
+    paths = {entry["name"]: entry["path"] for entry in index["apis"].values()}
+    assert paths["List-Servers"] == "ECS/List_Servers.yml"
+    assert paths["List Servers"].startswith("ECS/List_Servers_") and paths["List Servers"] != paths["List-Servers"]
+    for path in paths.values():
+        assert (tmp_path / path).exists()
+    assert "文件名冲突" in capsys.readouterr().out
+
+
+async def collect_api_infos(cli, specs):
+    return [(spec, item) async for spec, item in cli.iter_api_infos(specs)]
+
+
+async def test_iter_api_infos_resolves_each_product_once(tmp_path, client, explorer, monkeypatch):
+    from scan.yaml_exporter import YamlExportCLI
+    cli = YamlExportCLI(str(tmp_path), profiler=None, client=client)
+    calls = []
+    get_all_apis = client.get_all_apis
+    monkeypatch.setattr(client, "get_all_apis", lambda short, *args: calls.append(short) or get_all_apis(short, *args))
+
+    specs = [(product, explorer.api_summary(index)) for index in range(4) for product in ("ECS", "VPC")]
+    results = await collect_api_infos(cli, specs)
+    assert sorted(calls) == ["ECS", "VPC"]
+    assert explorer.request_counts["products"] == 1
+    assert explorer.request_counts["apis"] == 2 * -(-explorer.apis_per_product // 100)
+    assert [item["result"]["api_basic_info"]["name"] for _, item in results] == [
+        f"{product.title()}Api{index}" for index in range(4) for product in ("ECS", "VPC")]
+
+
+async def test_iter_api_infos_keeps_spec_order_when_products_finish_out_of_order(tmp_path, client, explorer,
+                                                                                 monkeypatch):
+    import asyncio
+    from scan.yaml_exporter import YamlExportCLI
+    cli = YamlExportCLI(str(tmp_path), profiler=None, client=client)
+    finished = []
+    get_infos = client.get_api_infos_by_user_input
+
+    async def delayed(product_name, interface_names, **kwargs):
+        # 规格中靠前的产品最后完成
+        await asyncio.sleep({"ECS": 0.05, "VPC": 0.02, "OBS": 0.0}[product_name])
+        items = await get_infos(product_name, interface_names, **kwargs)
+        finished.append(product_name)
+        return items
+
+    monkeypatch.setattr(client, "get_api_infos_by_user_input", delayed)
+    specs = [("ECS", explorer.api_summary(1)), ("VPC", explorer.api_summary(2)), ("OBS", explorer.api_summary(3)),
+             ("ECS", explorer.api_summary(4)), ("OBS", explorer.api_summary(5))]
+    results = await collect_api_infos(cli, specs)
+    assert finished == ["OBS", "VPC", "ECS"]
+    assert [spec for spec, _ in results] == specs
+    assert [item["result"]["api_basic_info"]["name"] for _, item in results] == [
+        "EcsApi1", "VpcApi2", "ObsApi3", "EcsApi4", "ObsApi5"]
+
+
+async def test_iter_api_infos_keeps_other_results_when_product_or_interface_fails(tmp_path, client, explorer,
+                                                                                  monkeypatch):
+    from scan.yaml_exporter import YamlExportCLI
+    cli = YamlExportCLI(str(tmp_path), profiler=None, client=client)
+    get_infos = client.get_api_infos_by_user_input
+
+    async def failing(product_name, interface_names, **kwargs):
+        if product_name == "VPC":
+            raise RuntimeError("上游超时")
+        return await get_infos(product_name, interface_names, **kwargs)
+
+    monkeypatch.setattr(client, "get_api_infos_by_user_input", failing)
+    specs = [("ECS", explorer.api_summary(1)), ("VPC", explorer.api_summary(2)), ("不存在的产品", "接口"),
+             ("ECS", "不存在的接口"), ("OBS", explorer.api_summary(3))]
+    results = dict(await collect_api_infos(cli, specs))
+    assert list(results) == specs
+    assert results[specs[0]]["result"]["api_basic_info"]["name"] == "EcsApi1"
+    assert results[specs[1]]["error"] == "上游超时"
+    assert "未找到产品" in results[specs[2]]["error"]
+    assert "未找到接口" in results[specs[3]]["error"]
+    assert results[specs[4]]["result"]["api_basic_info"]["name"] == "ObsApi3"
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("List-Servers v2", "List_Servers_v2"),
+    ("../../etc/passwd", "_.._etc_passwd"),
+    ("..\\..\\evil", "_.._evil"),
+    ("C:evil", "C_evil"),
+    (".hidden", "hidden"),
+    ("...", "unknown"),
+    ("创建云服务器", "______"),
+])
+def test_safe_filename_part_keeps_only_whitelisted_characters(value, expected):
+    assert YamlExporter.safe_filename_part(value) == expected
+
+
+def test_hostile_names_stay_under_output_dir(tmp_path):
+    exporter = YamlExporter(str(tmp_path / "out"))
+    info = api_info("../../escape", basic_name="x")
+    info["product_short"] = ".."
+    relative_path = exporter.api_detail_relative_path(info)
+    assert relative_path == "unknown/_.._escape.yml"
+    exporter.write_api_detail_file(info, relative_path)
+    assert (tmp_path / "out" / "unknown" / "_.._escape.yml").exists()
+    assert not (tmp_path / "escape.yml").exists()
+
+
+@pytest.mark.parametrize("filename", ["../outside.yml", "sub/../../outside.yml", "/tmp/outside.yml"])
+def test_output_path_outside_output_dir_is_rejected(tmp_path, filename):
+    exporter = YamlExporter(str(tmp_path / "out"))
+    with pytest.raises(ValueError, match="不在输出目录下"):
+        exporter.export_multiple_apis_to_yaml([], filename)
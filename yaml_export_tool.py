@@ -14,6 +14,7 @@ from typing import List, Tuple
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from scan.yaml_exporter import YamlExportCLI
+from scan.profiling import RequestProfiler
 
 
 def print_help():
@@ -27,6 +28,10 @@ def print_help():
   python3.10 yaml_export_tool.py --api-detail <产品名> <接口名>        # 导出指定API详细信息
   python3.10 yaml_export_tool.py --multiple-apis <规格文件>           # 导出多个API详细信息
   python3.10 yaml_export_tool.py --output-dir <目录>                  # 指定输出目录（默认：api_exports）
+  python3.10 yaml_export_tool.py --profile-dir <目录>                 # 剖析导出过程并保存结果
+  python3.10 yaml_export_tool.py --multiple-apis <规格文件> --per-api  # 每个API单独一个文件，按产品分目录并生成索引
+  python3.10 yaml_export_tool.py --concurrency <并发数>               # 批量导出时同时获取的API详情数量（默认：8）
+  python3.10 yaml_export_tool.py --workers <进程数>                   # 多进程生成YAML（0表示使用全部CPU核心）
 
 示例:
   # 导出所有产品列表
@@ -43,6 +48,15 @@ def print_help():
   
   # 指定输出目录
   python3.10 yaml_export_tool.py --products --output-dir /path/to/output
+  
+  # 导出大量API时使用4个进程生成YAML
+  python3.10 yaml_export_tool.py --multiple-apis apis_spec.txt --workers 4
+  
+  # 每个API单独导出到<产品简称>/<API名称>.yml，并生成index.json
+  python3.10 yaml_export_tool.py --multiple-apis apis_spec.txt --per-api --workers 4
+  
+  # 剖析耗时超过500ms的导出
+  python3.10 yaml_export_tool.py --multiple-apis apis_spec.txt --profile-dir profiles --profile-slow-ms 500
 
 多个API规格文件格式:
   每行一个API，格式为：产品名,接口名
@@ -56,6 +70,7 @@ def print_help():
   - 产品API列表: <产品名>_apis.yml
   - API详细信息: <产品名>_<接口名>_detail.yml
   - 多个API: multiple_apis.yml
+  - 多个API（--per-api）: <产品简称>/<API名称>.yml 以及索引 index.json
     """.strip())
 
 
@@ -108,6 +123,16 @@ async def main():
     
     # 配置选项
     parser.add_argument('--output-dir', default='api_exports', help='输出目录（默认：api_exports）')
+    parser.add_argument('--per-api', action='store_true',
+                        help='配合--multiple-apis使用，每个API单独导出到按产品分目录的文件，并生成索引文件')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='--multiple-apis同时获取的API详情数量（默认：8）')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='生成YAML的进程数，0表示使用全部CPU核心（默认：1）')
+    parser.add_argument('--profile-dir', help='剖析导出过程并将结果写入该目录')
+    parser.add_argument('--profile-slow-ms', type=float, default=0.0, help='只保存耗时超过该毫秒数的剖析结果（默认：0）')
+    parser.add_argument('--profiler', choices=['auto', 'cprofile', 'pyinstrument'], default='auto',
+                        help='剖析器（默认：auto，已安装pyinstrument时使用采样剖析）')
     
     args = parser.parse_args()
     
@@ -115,23 +140,29 @@ async def main():
         print_help()
         return
     
+    profiler = None
+    if args.profile_dir:
+        profiler = RequestProfiler(args.profile_dir, slow_ms=args.profile_slow_ms, engine=args.profiler)
+    
     try:
-        async with YamlExportCLI(args.output_dir) as exporter:
+        async with YamlExportCLI(args.output_dir, profiler=profiler, workers=args.workers) as exporter:
             if args.products:
                 print("📋 导出所有华为云产品列表...")
-                output_path = await exporter.export_all_products()
+                output_path = await exporter.run_export("export_all_products", exporter.export_all_products)
                 print(f"🎉 导出完成！文件位置: {output_path}")
                 
             elif args.product_apis:
                 product_name = args.product_apis
                 print(f"📋 导出{product_name}的API列表...")
-                output_path = await exporter.export_product_apis(product_name)
+                output_path = await exporter.run_export("export_product_apis", exporter.export_product_apis,
+                                                        product_name)
                 print(f"🎉 导出完成！文件位置: {output_path}")
                 
             elif args.api_detail:
                 product_name, interface_name = args.api_detail
                 print(f"📋 导出{product_name}的{interface_name}接口详细信息...")
-                output_path = await exporter.export_api_detail(product_name, interface_name)
+                output_path = await exporter.run_export("export_api_detail", exporter.export_api_detail,
+                                                        product_name, interface_name)
                 print(f"🎉 导出完成！文件位置: {output_path}")
                 
             elif args.multiple_apis:
@@ -147,8 +178,19 @@ async def main():
                 for i, (product, interface) in enumerate(api_specs, 1):
                     print(f"  {i}. {product} - {interface}")
                 
-                output_path = await exporter.export_multiple_api_details(api_specs)
-                print(f"🎉 导出完成！文件位置: {output_path}")
+                if args.per_api:
+                    output_path = await exporter.run_export("export_api_details_per_api",
+                                                            exporter.export_api_details_per_api, api_specs,
+                                                            args.concurrency)
+                    print(f"🎉 导出完成！索引文件位置: {output_path}")
+                else:
+                    output_path = await exporter.run_export("export_multiple_api_details",
+                                                            exporter.export_multiple_api_details, api_specs,
+                                                            args.concurrency)
+                    print(f"🎉 导出完成！文件位置: {output_path}")
+                
+        if profiler is not None and profiler.captured:
+            print(f"🔬 剖析结果已保存到: {args.profile_dir}")
                 
     except KeyboardInterrupt:
         print("\n⏹️  用户取消操作")